@@ -1,8 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from .deps import set_request_now
 from .endpoints import auth, dashboard, users, nodes, subscriptions
 from .v1.api import api_router as api_v1_router
 
-api_router = APIRouter()
+api_router = APIRouter(dependencies=[Depends(set_request_now)])
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
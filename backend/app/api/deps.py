@@ -7,15 +7,12 @@
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
-from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.security import ALGORITHM
 from app.db.session import AsyncSessionLocal
 from app.models.user import User
-from app.schemas.token import TokenPayload
+from app.services.auth import AuthService
 
 # Схема для аутентификации через OAuth2 с Bearer токенами
 oauth2_scheme = OAuth2PasswordBearer(
@@ -59,47 +56,39 @@ async def get_current_user(
     Raises:
         HTTPException: Если токен невалидный или пользователь не найден
     """
-    try:
-        # Декодируем токен
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[ALGORITHM]
-        )
-        
-        # Валидируем данные токена
-        token_data = TokenPayload(**payload)
-        
-        # Проверяем тип токена (должен быть access)
-        if token_data.type != "access":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Неверный тип токена"
-            )
-        
-        # Получаем пользователя из БД
-        user = await User.get(db, id=token_data.user_id)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Пользователь не найден"
-            )
-            
-        # Проверяем, активен ли пользователь
-        if not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Пользователь неактивен"
-            )
-            
-        return user
-        
-    except (jwt.JWTError, ValidationError) as e:
+    # Проверка подписи кэшируется в AuthService: повторные запросы с тем же
+    # токеном не декодируют его заново, а смена пароля сбрасывает кэш
+    payload = AuthService.verify_token(token)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Не удалось проверить учетные данные",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    # Проверяем тип токена (должен быть access)
+    if payload.get("type") != "access":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный тип токена"
+        )
+    
+    # Получаем пользователя из БД
+    user = await User.get(db, id=payload.get("user_id"))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден"
+        )
+        
+    # Проверяем, активен ли пользователь
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Пользователь неактивен"
+        )
+        
+    return user
 
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
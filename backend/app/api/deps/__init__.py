@@ -5,6 +5,7 @@
     get_current_active_user,
     get_current_active_superuser,
     get_pagination_params,
+    set_request_now,
 )
 
 __all__ = [
@@ -13,4 +14,5 @@
     'get_current_active_user',
     'get_current_active_superuser',
     'get_pagination_params',
+    'set_request_now',
 ]
@@ -1,15 +1,16 @@
 """
 Базовые зависимости для API.
 """
-from typing import Generator, Optional
+from datetime import datetime
+from typing import AsyncGenerator, Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import JWTError, jwt
 
 from app.database import async_session_factory
-from app.core.config import settings
+from app.core import clock
 from app import crud, models
+from app.services.auth import AuthService
 
 # Схема безопасности
 security = HTTPBearer()
@@ -24,6 +25,19 @@ async def get_db() -> AsyncSession:
         finally:
             await session.close()
 
+async def set_request_now() -> AsyncGenerator[datetime, None]:
+    """
+    Dependency, фиксирующая текущее время на весь запрос.
+    
+    Подключена ко всем маршрутам API: is_expired/is_online моделей
+    читают это значение вместо вызова utcnow для каждой строки.
+    """
+    token = clock.set_now()
+    try:
+        yield clock.utcnow()
+    finally:
+        clock.reset_now(token)
+
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -37,16 +51,12 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            settings.JWT_SECRET_KEY, 
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    # Проверка подписи кэшируется в AuthService, см. AuthService.verify_token
+    payload = AuthService.verify_token(credentials.credentials)
+    if payload is None or payload.get("type") != "access":
+        raise credentials_exception
+    user_id = payload.get("user_id")
+    if user_id is None:
         raise credentials_exception
     
     user = await crud.user.get(db, id=user_id)
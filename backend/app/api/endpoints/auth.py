@@ -3,10 +3,11 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, timedelta, timezone
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import jwt
 import os
 
+from app.core.security import get_password_hash, verify_password
+
 # Настройки безопасности
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
@@ -45,17 +46,10 @@ class UserInDB(User):
     }
 }
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 router = APIRouter()
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
 def get_user(db, username: str):
     if username in db:
         user_dict = db[username]
@@ -91,7 +85,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
-    except JWTError:
+    except jwt.PyJWTError:
         raise credentials_exception
     user = get_user(fake_users_db, username=token_data.username)
     if user is None:
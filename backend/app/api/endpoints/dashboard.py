@@ -29,8 +29,8 @@ async def get_dashboard_stats(db: AsyncSession) -> Dict[str, Any]:
     # Общий трафик за последний месяц (в GB)
     month_ago = datetime.utcnow() - timedelta(days=30)
     traffic_result = await db.execute(
-        select(func.sum(TrafficLog.download + TrafficLog.upload)).where(
-            TrafficLog.created_at >= month_ago
+        select(func.sum(TrafficLog.total_traffic)).where(
+            TrafficLog.started_at >= month_ago
         )
     )
     total_traffic_bytes = traffic_result.scalar() or 0
@@ -66,7 +66,7 @@ async def get_nodes(
                 "id": str(node.id),
                 "name": node.name,
                 "fqdn": node.fqdn,
-                "ip_address": node.ip_address,
+                "ip_address": str(node.ip_address),
                 "api_address": node.api_address,
                 "api_port": node.api_port,
                 "api_tag": node.api_tag,
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
@@ -62,6 +63,7 @@ async def get_subscriptions(
         result = db.execute(select(Subscription))
         subscriptions = result.scalars().all()
 
+        now = datetime.utcnow()
         subscriptions_list = []
         for subscription in subscriptions:
             subscriptions_list.append({
@@ -77,8 +79,8 @@ async def get_subscriptions(
                 "settings": subscription.settings,
                 "created_at": subscription.created_at.isoformat() if subscription.created_at else None,
                 "updated_at": subscription.updated_at.isoformat() if subscription.updated_at else None,
-                "is_expired": subscription.is_expired,
-                "days_remaining": subscription.days_remaining
+                "is_expired": subscription.is_expired_at(now),
+                "days_remaining": subscription.days_remaining_at(now)
             })
         return subscriptions_list
     except Exception as e:
@@ -1,7 +1,7 @@
 from datetime import timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Body, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -135,6 +135,7 @@ async def test_token(
 async def recover_password(
     email: str,
     request: Request,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ) -> Any:
     """
@@ -143,7 +144,9 @@ async def recover_password(
     Отправляет письмо с инструкциями по сбросу пароля на указанный email.
     """
     try:
-        await AuthService.request_password_reset(db, email=email)
+        await AuthService.request_password_reset(
+            db, email=email, background_tasks=background_tasks
+        )
         return {"message": "Если аккаунт с таким email существует, на него отправлено письмо с инструкциями по сбросу пароля"}
     except Exception as e:
         # В продакшене не сообщаем об ошибках
@@ -185,6 +188,7 @@ async def reset_password(
 
 @router.post("/send-verification-email", response_model=MessageResponse)
 async def send_verification_email(
+    background_tasks: BackgroundTasks,
     email: str = Body(..., embed=True),
     db: AsyncSession = Depends(get_db)
 ) -> Any:
@@ -198,7 +202,9 @@ async def send_verification_email(
         dict: Сообщение об успешной отправке
     """
     try:
-        await AuthService.send_email_verification(db, email=email)
+        await AuthService.send_email_verification(
+            db, email=email, background_tasks=background_tasks
+        )
         return {"message": "Письмо с подтверждением отправлено на указанный email"}
     except ValueError as e:
         raise HTTPException(
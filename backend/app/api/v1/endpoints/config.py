@@ -68,13 +68,15 @@ async def list_configs(
         order_by=ConfigVersion.created_at.desc()
     )
     
-    return {
-        "items": configs,
-        "total": total,
-        "page": skip // limit + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit if limit > 0 else 1
-    }
+    # Строки прочитаны из БД: схемы собираются без валидации, а готовый
+    # экземпляр response_model FastAPI не валидирует повторно
+    return ConfigList.model_construct(
+        items=[schemas.construct_from_orm(Config, config) for config in configs],
+        total=total,
+        page=skip // limit + 1,
+        size=limit,
+        pages=(total + limit - 1) // limit if limit > 0 else 1
+    )
 
 @router.get(
     "/active",
@@ -203,8 +205,8 @@ async def update_config(
                 detail=f"Конфигурация с версией {config_in.version} уже существует"
             )
     
-    # Обновляем конфигурацию
-    config = await crud.config.update(db, db_obj=config, obj_in=config_in)
+    # Обновляем конфигурацию с пересчётом контрольной суммы
+    config = await crud.config.update_config(db, db_obj=config, obj_in=config_in)
     
     return config
 
@@ -45,14 +45,14 @@ async def read_devices(
         # Вычисляем общее количество страниц
         pages = (total + limit - 1) // limit if limit > 0 else 1
         
-        return {
-            "items": devices,
-            "total": total,
-            "page": (skip // limit) + 1 if limit > 0 else 1,
-            "size": limit,
-            "pages": pages,
-            "limits": limit_info
-        }
+        # Готовый экземпляр response_model FastAPI не валидирует повторно
+        return schemas.DeviceList.model_construct(
+            items=devices,
+            total=total,
+            page=(skip // limit) + 1 if limit > 0 else 1,
+            size=limit,
+            pages=pages
+        )
     except Exception as e:
         logger.error(f"Ошибка при получении списка устройств: {str(e)}", exc_info=True)
         raise HTTPException(
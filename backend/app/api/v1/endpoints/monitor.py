@@ -1,14 +1,17 @@
 """
 API endpoints для мониторинга и управления состоянием VPN-нод.
 """
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, models, schemas
 from app.api import deps
+from app.database import async_session_factory
 from app.models.node import NodeStatus
 from app.services.node_monitor import NodeMonitor
 
@@ -100,6 +103,35 @@ async def sync_node_config(
     
     return {"status": "success", "message": "Конфигурация успешно синхронизирована"}
 
+@router.get("/events/stream")
+async def stream_events(
+    hours_back: int = Query(1, ge=1, le=24 * 31, description="За сколько часов отдать события"),
+    level: Optional[str] = Query(None, description="Фильтр по уровню"),
+    source: Optional[str] = Query(None, description="Фильтр по источнику"),
+    current_user: models.User = Depends(deps.get_current_active_superuser)
+) -> StreamingResponse:
+    """
+    Потоковая выдача системных событий в формате NDJSON (одно событие на строку).
+    
+    События читаются из БД порциями и сразу отправляются клиенту,
+    поэтому память не зависит от размера выборки.
+    """
+    start_time = datetime.utcnow() - timedelta(hours=hours_back)
+    
+    async def generate() -> AsyncIterator[bytes]:
+        # Собственная сессия: зависимость get_db может закрыться раньше,
+        # чем ответ будет отправлен целиком
+        async with async_session_factory() as session:
+            async for event in crud.system_event.stream_events(
+                session,
+                start_time=start_time,
+                level=level,
+                source=source
+            ):
+                yield orjson.dumps(event) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @router.get("/dashboard", response_model=Dict[str, Any])
 async def get_dashboard_stats(
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -130,7 +162,7 @@ async def get_dashboard_stats(
             "id": node.id,
             "name": node.name,
             "fqdn": node.fqdn,
-            "ip_address": node.ip_address,
+            "ip_address": str(node.ip_address),
             "status": "online" if is_online else "offline",
             "location": node.location,
             "users_online": 0,
@@ -226,7 +258,7 @@ async def _get_recent_events(db: AsyncSession, limit: int = 10) -> List[Dict[str
                 "category": event.category,
                 "user_id": event.user_id,
                 "node_id": event.node_id,
-                "ip_address": event.ip_address,
+                "ip_address": str(event.ip_address) if event.ip_address else None,
                 "details": event.details
             }
             for event in events
@@ -17,9 +17,9 @@
 
 # Эндпоинты для управления тарифными планами
 
-@router.post("/plans/", response_model=schemas.SubscriptionPlan)
+@router.post("/plans/", response_model=schemas.Plan)
 async def create_subscription_plan(
-    plan_in: schemas.SubscriptionPlanCreate,
+    plan_in: schemas.PlanCreate,
     current_user: models.User = Depends(deps.get_current_active_superuser),
     db: AsyncSession = Depends(deps.get_db)
 ) -> Any:
@@ -29,7 +29,7 @@ async def create_subscription_plan(
     subscription_service = SubscriptionService(db)
     return await subscription_service.create_subscription_plan(plan_in, current_user)
 
-@router.get("/plans/", response_model=List[schemas.SubscriptionPlan])
+@router.get("/plans/", response_model=List[schemas.Plan])
 async def read_subscription_plans(
     skip: int = 0,
     limit: int = 100,
@@ -42,7 +42,7 @@ async def read_subscription_plans(
     plans = await crud.subscription_plan.get_multi(db, skip=skip, limit=limit)
     return plans
 
-@router.get("/plans/{plan_id}", response_model=schemas.SubscriptionPlan)
+@router.get("/plans/{plan_id}", response_model=schemas.Plan)
 async def read_subscription_plan(
     plan_id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -59,10 +59,10 @@ async def read_subscription_plan(
         )
     return plan
 
-@router.put("/plans/{plan_id}", response_model=schemas.SubscriptionPlan)
+@router.put("/plans/{plan_id}", response_model=schemas.Plan)
 async def update_subscription_plan(
     plan_id: int,
-    plan_in: schemas.SubscriptionPlanUpdate,
+    plan_in: schemas.PlanUpdate,
     current_user: models.User = Depends(deps.get_current_active_superuser),
     db: AsyncSession = Depends(deps.get_db)
 ) -> Any:
@@ -72,7 +72,7 @@ async def update_subscription_plan(
     subscription_service = SubscriptionService(db)
     return await subscription_service.update_subscription_plan(plan_id, plan_in, current_user)
 
-@router.delete("/plans/{plan_id}", response_model=schemas.SubscriptionPlan)
+@router.delete("/plans/{plan_id}", response_model=schemas.Plan)
 async def delete_subscription_plan(
     plan_id: int,
     current_user: models.User = Depends(deps.get_current_active_superuser),
@@ -86,7 +86,7 @@ async def delete_subscription_plan(
 
 # Эндпоинты для управления подписками пользователей
 
-@router.post("/subscribe/", response_model=schemas.UserSubscription)
+@router.post("/subscribe/", response_model=schemas.Subscription)
 async def subscribe_user(
     subscription_in: schemas.UserSubscribe,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -113,7 +113,7 @@ async def get_my_subscription(
     subscription_service = SubscriptionService(db)
     return await subscription_service.check_subscription_status(current_user.id)
 
-@router.get("/users/{user_id}", response_model=List[schemas.UserSubscription])
+@router.get("/users/{user_id}", response_model=List[schemas.Subscription])
 async def get_user_subscriptions(
     user_id: int,
     skip: int = 0,
@@ -141,7 +141,7 @@ async def get_user_subscriptions(
     
     return subscriptions
 
-@router.put("/{subscription_id}/status", response_model=schemas.UserSubscription)
+@router.put("/{subscription_id}/status", response_model=schemas.Subscription)
 async def update_subscription_status(
     subscription_id: int,
     status_update: Dict[str, str],
@@ -0,0 +1,33 @@
+"""
+Общее «текущее время» в пределах запроса.
+
+Свойства моделей вроде is_expired/is_online сравнивают даты с текущим
+временем. При сериализации больших списков это тысячи вызовов
+datetime.utcnow(); вместо этого время фиксируется один раз на запрос
+(см. app.api.deps.set_request_now) и читается из ContextVar.
+"""
+from contextvars import ContextVar, Token
+from datetime import datetime
+from typing import Optional
+
+_now_ctx: ContextVar[Optional[datetime]] = ContextVar("now", default=None)
+
+
+def utcnow() -> datetime:
+    """Время, зафиксированное для текущего запроса, или datetime.utcnow() вне запроса."""
+    return _now_ctx.get() or datetime.utcnow()
+
+
+def set_now(now: Optional[datetime] = None) -> Token:
+    """
+    Зафиксировать текущее время для контекста.
+
+    Returns:
+        Токен для сброса значения через reset_now
+    """
+    return _now_ctx.set(now or datetime.utcnow())
+
+
+def reset_now(token: Token) -> None:
+    """Вернуть значение, действовавшее до set_now."""
+    _now_ctx.reset(token)
@@ -87,6 +87,31 @@ class Settings(BaseSettings):
     HWID_MAX_DEVICES_ANNOUNCE: str = "Вы достигли максимального количества разрешенных устройств для вашей подписки."
     HWID_DEVICE_INACTIVITY_DAYS: int = 30  # Через сколько дней неактивное устройство считается устаревшим
     HWID_AUTO_REVOKE_INACTIVE: bool = True  # Автоматически отзывать неактивные устройства
+    # Сколько секунд кэшируется то, что устройство пользователя уже
+    # зарегистрировано. Кэш локален для процесса: отзыв устройства другим
+    # воркером виден не позже чем через это время. Новые устройства всегда
+    # проверяются по БД
+    HWID_DEVICE_LIMIT_CACHE_TTL: int = 60
+    # Хеш отпечатка устройства (IP, User-Agent, Accept-Language). Отпечаток не
+    # секрет, поэтому подходит и более быстрый blake3 (нужен пакет blake3, без
+    # него приложение не запустится). Смена алгоритма меняет идентификаторы:
+    # устройства будут зарегистрированы заново
+    HWID_DEVICE_ID_ALGORITHM: Literal["sha256", "blake3"] = "sha256"
+    
+    # Алгоритм контрольной суммы конфигураций Xray; blake3 требует пакета blake3,
+    # без него приложение не запустится
+    XRAY_CONFIG_CHECKSUM_ALGORITHM: Literal["sha256", "blake3"] = "sha256"
+    
+    # Сколько нод одновременно получают конфигурацию при развёртывании
+    CONFIG_SYNC_MAX_CONCURRENCY: int = 32
+    # Окно (мс), в котором повторные синхронизации всех нод схлопываются в одну
+    # рассылку последней запрошенной версии; 0 — синхронизировать сразу
+    CONFIG_SYNC_DEBOUNCE_MS: int = 500
+    # Сжимать тело запроса синхронизации zstd (Content-Encoding: zstd), если оно
+    # больше CONFIG_SYNC_COMPRESS_MIN_BYTES. Агент ноды должен распаковывать
+    # такие запросы; нужен пакет zstandard, без него тело отправляется как есть
+    CONFIG_SYNC_ZSTD: bool = False
+    CONFIG_SYNC_COMPRESS_MIN_BYTES: int = 4096
     
     # Валидация CORS
     @validator("BACKEND_CORS_ORIGINS", pre=True)
@@ -1,14 +1,15 @@
 """
 Модуль для работы с безопасностью: JWT, OAuth2, хеширование паролей.
 """
+import hashlib
+import hmac
 from datetime import datetime, timedelta
 from typing import Optional, Any, Union, Dict, List, Tuple
 
+import bcrypt
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
-from jose import JWTError, jwt
-from jose.exceptions import ExpiredSignatureError
-from passlib.context import CryptContext
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -17,12 +18,9 @@
 from app.models.user import User
 from app.schemas.token import TokenPayload
 
-# Контекст для хеширования паролей
-pwd_context = CryptContext(
-    schemes=["bcrypt"], 
-    deprecated="auto",
-    bcrypt__rounds=settings.SECURITY_BCRYPT_ROUNDS
-)
+# bcrypt учитывает только первые 72 байта пароля; passlib обрезал пароль
+# молча, а bcrypt>=4.1 на длинный пароль бросает ValueError
+BCRYPT_MAX_PASSWORD_BYTES = 72
 
 # Схема OAuth2 для аутентификации
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -131,19 +129,6 @@ def create_refresh_token(
     )
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Проверяет, соответствует ли пароль хешу.
-    
-    Args:
-        plain_password: Пароль в открытом виде
-        hashed_password: Хешированный пароль
-        
-    Returns:
-        bool: True если пароль верный, иначе False
-    """
-    return pwd_context.verify(plain_password, hashed_password)
-
 def get_password_hash(password: str) -> str:
     """
     Генерирует хеш пароля с использованием bcrypt.
@@ -159,7 +144,11 @@ def get_password_hash(password: str) -> str:
     """
     if not password:
         raise ValueError("Password cannot be empty")
-    return pwd_context.hash(password)
+    hashed = bcrypt.hashpw(
+        password.encode()[:BCRYPT_MAX_PASSWORD_BYTES],
+        bcrypt.gensalt(rounds=settings.SECURITY_BCRYPT_ROUNDS)
+    )
+    return hashed.decode()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -175,7 +164,43 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     if not plain_password or not hashed_password:
         return False
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(
+            plain_password.encode()[:BCRYPT_MAX_PASSWORD_BYTES],
+            hashed_password.encode()
+        )
+    except ValueError:
+        # Хеш не в формате bcrypt
+        return False
+
+
+def get_token_hash(token: str) -> str:
+    """
+    Хеширует случайный токен (refresh-токен, API-ключ) для хранения в БД.
+    
+    Токену с высокой энтропией не нужен медленный KDF: достаточно
+    HMAC-SHA256 от всего токена на ключе SECRET_KEY. В отличие от bcrypt
+    токен не обрезается до 72 байт — у JWT длинный общий префикс.
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_token_hash(token: str, hashed_token: str) -> bool:
+    """Проверяет токен по хешу, полученному из get_token_hash."""
+    if not token or not hashed_token:
+        return False
+    return hmac.compare_digest(get_token_hash(token), hashed_token)
+
+
+def warmup_password_hashing() -> None:
+    """
+    Прогревает bcrypt при старте приложения.
+    
+    Первый вызов загружает расширение и инициализирует генератор соли;
+    делаем это заранее с минимальной стоимостью, чтобы задержку не получил
+    первый вход пользователя.
+    """
+    bcrypt.checkpw(b"warmup", bcrypt.hashpw(b"warmup", bcrypt.gensalt(rounds=4)))
 
 
 def generate_password_reset_token(email: str) -> str:
@@ -193,10 +218,12 @@ def generate_password_reset_token(email: str) -> str:
     expires = now + delta
     
     to_encode = {
+        "iss": settings.JWT_TOKEN_ISSUER,
         "exp": expires,
         "iat": now,
         "sub": email,
-        "type": "password_reset"
+        "type": "password_reset",
+        "aud": settings.JWT_TOKEN_AUDIENCE
     }
     
     return jwt.encode(
@@ -227,7 +254,7 @@ def verify_password_reset_token(token: str) -> Optional[str]:
         if decoded_token.get("type") != "password_reset":
             return None
         return decoded_token.get("sub")
-    except (JWTError, ValidationError):
+    except (jwt.PyJWTError, ValidationError):
         return None
 
 async def get_current_user(
@@ -291,13 +318,13 @@ async def get_current_user(
                         detail="Not enough permissions",
                         headers={"WWW-Authenticate": f"Bearer scope=\"{scope}\""},
                     )
-    except ExpiredSignatureError:
+    except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except JWTError as e:
+    except jwt.PyJWTError as e:
         raise credentials_exception from e
     
     # Ищем пользователя в БД
@@ -373,7 +400,7 @@ def verify_password_reset_token(token: str) -> Optional[str]:
         if decoded_token.get("type") != "password_reset":
             return None
         return decoded_token.get("sub")
-    except (JWTError, ValidationError):
+    except (jwt.PyJWTError, ValidationError):
         return None
 
 
@@ -392,10 +419,12 @@ def generate_email_verification_token(email: str) -> str:
     expires = now + delta
     
     to_encode = {
+        "iss": settings.JWT_TOKEN_ISSUER,
         "exp": expires,
         "iat": now,
         "sub": email,
-        "type": "email_verification"
+        "type": "email_verification",
+        "aud": settings.JWT_TOKEN_AUDIENCE
     }
     
     return jwt.encode(
@@ -426,7 +455,7 @@ def verify_email_verification_token(token: str) -> Optional[str]:
         if decoded_token.get("type") != "email_verification":
             return None
         return decoded_token.get("sub")
-    except (JWTError, ValidationError):
+    except (jwt.PyJWTError, ValidationError):
         return None
 
 def verify_node_token(token: str) -> Optional[str]:
@@ -450,7 +479,7 @@ def verify_node_token(token: str) -> Optional[str]:
         if decoded_token.get("type") != "node_auth":
             return None
         return decoded_token.get("sub")
-    except (JWTError, ValidationError):
+    except (jwt.PyJWTError, ValidationError):
         return None
 
 def generate_node_token(node_id: str, expires_delta: Optional[timedelta] = None) -> str:
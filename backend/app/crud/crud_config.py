@@ -1,17 +1,19 @@
 """
 CRUD-операции для управления конфигурациями Xray.
 """
-import hashlib
-import json
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 
 from fastapi import HTTPException, status
 from sqlalchemy import and_, or_, select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import raiseload, selectinload
 
 from app import models, schemas
+from app.core.clock import utcnow
 from app.core.config import settings
 from app.crud.base import CRUDBase
 from app.models.config_version import ConfigVersion
@@ -55,46 +57,45 @@ async def create_with_owner(
     ) -> ConfigVersion:
         """Создать новую конфигурацию."""
         # Генерируем контрольную сумму конфигурации
-        config_json = json.dumps(obj_in.config, sort_keys=True)
-        checksum = hashlib.sha256(config_json.encode()).hexdigest()
-        
-        # Проверяем, существует ли уже конфигурация с такой контрольной суммой
-        existing_config = await self.get_by_checksum(db, checksum=checksum)
-        if existing_config:
-            return existing_config
+        checksum = ConfigVersion.compute_checksum(obj_in.config)
         
         # Если это первая конфигурация, делаем её активной и по умолчанию
         count = await self.count(db)
         is_first = count == 0
-        
-        # Создаем объект конфигурации
-        db_obj = ConfigVersion(
-            version=obj_in.version,
-            description=obj_in.description,
-            config=obj_in.config,
-            checksum=checksum,
-            status=obj_in.status,
-            is_active=is_first or obj_in.is_default,
-            is_default=is_first or obj_in.is_default,
-            created_by_id=owner_id,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+        is_default = is_first or obj_in.is_default
+        
+        # Вставка с ON CONFLICT (checksum) DO NOTHING: повторно присланная
+        # конфигурация не записывается, и гонки между проверкой и вставкой нет
+        insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = (
+            insert(ConfigVersion)
+            .values(
+                version=obj_in.version,
+                description=obj_in.description,
+                config=obj_in.config,
+                checksum=checksum,
+                section_hashes=ConfigVersion.compute_section_hashes(obj_in.config),
+                is_active=is_default,
+                created_by_id=owner_id
+            )
+            .on_conflict_do_nothing(index_elements=["checksum"])
+            .returning(ConfigVersion.id)
         )
+        config_id = (await db.execute(stmt)).scalar_one_or_none()
         
-        # Если новая конфигурация помечена как активная, деактивируем старую
-        if db_obj.is_active:
-            await self.deactivate_all(db, exclude_id=db_obj.id)
+        if config_id is None:
+            # Такая конфигурация уже существует
+            await db.rollback()
+            return await self.get_by_checksum(db, checksum=checksum)
         
-        # Если новая конфигурация помечена как конфигурация по умолчанию,
-        # снимаем этот флаг с других конфигураций
-        if db_obj.is_default:
-            await self.unset_default_flag(db, exclude_id=db_obj.id)
+        # Новая конфигурация по умолчанию становится и активной:
+        # деактивируем старые (колонки is_default у ConfigVersion нет)
+        if is_default:
+            await self.deactivate_all(db, exclude_id=config_id)
         
-        db.add(db_obj)
         await db.commit()
-        await db.refresh(db_obj)
         
-        return db_obj
+        return await self.get(db, id=config_id)
     
     async def update_config(
         self, db: AsyncSession, *, db_obj: ConfigVersion, obj_in: Union[schemas.ConfigUpdate, Dict[str, Any]]
@@ -107,21 +108,24 @@ async def update_config(
         
         # Если обновляется конфигурация, пересчитываем контрольную сумму
         if 'config' in update_data:
-            config_json = json.dumps(update_data['config'], sort_keys=True)
-            update_data['checksum'] = hashlib.sha256(config_json.encode()).hexdigest()
-        
-        # Обновляем объект
-        db_obj = await super().update(db, db_obj=db_obj, obj_in=update_data)
+            update_data['checksum'] = ConfigVersion.compute_checksum(update_data['config'])
+            update_data['section_hashes'] = ConfigVersion.compute_section_hashes(update_data['config'])
+        
+        # Обновляем объект; checksum уникален, и такая же конфигурация
+        # может уже храниться в другой версии
+        try:
+            db_obj = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Такая конфигурация уже существует в другой версии"
+            )
         
         # Если конфигурация помечена как активная, деактивируем остальные
         if db_obj.is_active:
             await self.deactivate_all(db, exclude_id=db_obj.id)
         
-        # Если конфигурация помечена как конфигурация по умолчанию,
-        # снимаем этот флаг с других конфигураций
-        if db_obj.is_default:
-            await self.unset_default_flag(db, exclude_id=db_obj.id)
-        
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
@@ -138,21 +142,7 @@ async def deactivate_all(
             query = query.where(ConfigVersion.id != exclude_id)
         
         await db.execute(
-            query.values(is_active=False, updated_at=datetime.utcnow())
-        )
-        await db.commit()
-    
-    async def unset_default_flag(
-        self, db: AsyncSession, *, exclude_id: Optional[int] = None
-    ) -> None:
-        """Снять флаг конфигурации по умолчанию со всех конфигураций, кроме указанной."""
-        query = update(ConfigVersion).where(ConfigVersion.is_default.is_(True))
-        
-        if exclude_id is not None:
-            query = query.where(ConfigVersion.id != exclude_id)
-        
-        await db.execute(
-            query.values(is_default=False, updated_at=datetime.utcnow())
+            query.values(is_active=False, updated_at=func.now())
         )
         await db.commit()
     
@@ -169,7 +159,11 @@ async def get_sync_status(
         self, db: AsyncSession, *, config_id: int, node_id: Optional[int] = None
     ) -> List[ConfigSync]:
         """Получить статус синхронизации конфигурации."""
-        query = select(ConfigSync).filter(ConfigSync.config_version_id == config_id)
+        query = (
+            select(ConfigSync)
+            .filter(ConfigSync.config_version_id == config_id)
+            .options(selectinload(ConfigSync.node), raiseload("*"))
+        )
         
         if node_id is not None:
             query = query.filter(ConfigSync.node_id == node_id)
@@ -177,6 +171,43 @@ async def get_sync_status(
         result = await db.execute(query)
         return result.scalars().all()
     
+    async def get_or_create_sync_statuses(
+        self, db: AsyncSession, *, config_id: int, node_ids: List[int]
+    ) -> Dict[int, ConfigSync]:
+        """
+        Получить записи о синхронизации конфигурации для набора нод,
+        создав недостающие.
+        
+        Один запрос на любое число нод: INSERT ... ON CONFLICT DO UPDATE
+        ... RETURNING для всех пар (версия, нода). Обновление на конфликте
+        ничего не меняет (статус существующих записей сохраняется) и нужно
+        только для того, чтобы RETURNING вернул и существующие записи.
+        
+        Returns:
+            Словарь node_id -> ConfigSync
+        """
+        if not node_ids:
+            return {}
+        
+        now = utcnow()
+        insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(ConfigSync).values([
+            {"config_version_id": config_id, "node_id": node_id, "last_attempt": now}
+            for node_id in node_ids
+        ])
+        result = await db.execute(
+            stmt
+            .on_conflict_do_update(
+                index_elements=["config_version_id", "node_id"],
+                set_={"config_version_id": stmt.excluded.config_version_id}
+            )
+            .returning(ConfigSync)
+            .execution_options(populate_existing=True)
+        )
+        syncs = {sync.node_id: sync for sync in result.scalars()}
+        await db.commit()
+        return syncs
+    
     async def create_sync_status(
         self, db: AsyncSession, *, config_id: int, node_id: int, status: SyncStatus = SyncStatus.PENDING
     ) -> ConfigSync:
@@ -185,11 +216,9 @@ async def create_sync_status(
             config_version_id=config_id,
             node_id=node_id,
             status=status,
-            last_attempt=datetime.utcnow(),
+            last_attempt=utcnow(),
             retry_count=0,
-            is_active=True,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            is_active=True
         )
         
         db.add(db_obj)
@@ -207,27 +236,29 @@ async def update_sync_status(
         error_message: Optional[str] = None,
         increment_retry: bool = False
     ) -> Optional[ConfigSync]:
-        """Обновить статус синхронизации."""
-        db_obj = await db.get(ConfigSync, sync_id)
-        
-        if not db_obj:
-            return None
-        
-        db_obj.status = status
-        db_obj.last_attempt = datetime.utcnow()
+        """
+        Обновить статус синхронизации одним UPDATE ... RETURNING,
+        без предварительного чтения и refresh.
+        """
+        now = utcnow()
+        values: Dict[str, Any] = {"status": status, "last_attempt": now}
         
         if status == SyncStatus.COMPLETED:
-            db_obj.last_sync = datetime.utcnow()
-            db_obj.error_message = None
-            db_obj.retry_count = 0
+            values.update(last_sync=now, error_message=None, retry_count=0)
         elif status == SyncStatus.FAILED:
-            db_obj.error_message = error_message
+            values["error_message"] = error_message
             if increment_retry:
-                db_obj.retry_count += 1
+                values["retry_count"] = ConfigSync.retry_count + 1
         
-        db.add(db_obj)
+        result = await db.execute(
+            update(ConfigSync)
+            .where(ConfigSync.id == sync_id)
+            .values(**values)
+            .returning(ConfigSync)
+            .execution_options(populate_existing=True)
+        )
+        db_obj = result.scalar_one_or_none()
         await db.commit()
-        await db.refresh(db_obj)
         
         return db_obj
     
@@ -2,17 +2,18 @@
 CRUD-операции для управления устройствами пользователей.
 """
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import and_, or_, select, update
+from sqlalchemy import and_, case, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app import models, schemas
+from app.core.clock import utcnow
 from app.core.security import get_password_hash, verify_password
 from app.crud.base import CRUDBase
-from app.models.device import Device
+from app.models.device import ONLINE_TIMEOUT, Device
 
 class CRUDDevice(CRUDBase[Device, schemas.DeviceCreate, schemas.DeviceUpdate]):
     """CRUD-операции для управления устройствами."""
@@ -63,13 +64,32 @@ async def get_multi_by_owner(
         result = await db.execute(query)
         return result.scalars().all()
     
+    async def get_active_device_state(
+        self, db: AsyncSession, *, user_id: int, device_id: str
+    ) -> Tuple[int, bool]:
+        """
+        Данные для проверки лимита устройств одним запросом.
+        
+        Returns:
+            (число активных устройств пользователя, есть ли среди них device_id)
+        """
+        result = await db.execute(
+            select(
+                func.count(),
+                func.max(case((self.model.device_id == device_id, 1), else_=0))
+            )
+            .where(self.model.user_id == user_id, self.model.is_active.is_(True))
+        )
+        count, has_device = result.one()
+        return count, bool(has_device)
+    
     async def get_online_devices(
         self, db: AsyncSession, *, user_id: Optional[int] = None, limit: int = 100
     ) -> List[Device]:
         """Получить список активных (онлайн) устройств."""
-        five_minutes_ago = datetime.utcnow() - datetime.timedelta(minutes=5)
+        online_cutoff = utcnow() - ONLINE_TIMEOUT
         query = select(self.model).filter(
-            self.model.last_active >= five_minutes_ago,
+            self.model.last_active > online_cutoff,
             self.model.is_active.is_(True)
         )
         
@@ -107,7 +127,6 @@ async def create_with_owner(
             **obj_in.dict(exclude={"vpn_user_id" if not hasattr(obj_in, 'vpn_user_id') else None}),
             user_id=user_id,
             vpn_user_id=getattr(obj_in, 'vpn_user_id', None),
-            created_at=datetime.utcnow(),
             last_active=datetime.utcnow()
         )
         db.add(db_obj)
@@ -157,8 +176,9 @@ async def get_user_devices_stats(
         
         # Считаем статистику
         total_devices = len(devices)
+        online_cutoff = utcnow() - ONLINE_TIMEOUT
         active_devices = sum(1 for d in devices if d.is_active)
-        online_devices = sum(1 for d in devices if d.is_online)
+        online_devices = sum(1 for d in devices if d.was_active_since(online_cutoff))
         trusted_devices = sum(1 for d in devices if d.is_trusted)
         
         # Группируем по ОС и моделям
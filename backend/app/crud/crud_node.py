@@ -1,9 +1,9 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from app.crud.base import CRUDBase
-from app.models.node import Node
+from app.models.node import Node, NodeStatus
 from app.schemas.node import NodeCreate, NodeUpdate
 
 class CRUDNode(CRUDBase[Node, NodeCreate, NodeUpdate]):
@@ -15,6 +15,22 @@ async def get_active_nodes(self, db: AsyncSession) -> List[Node]:
             select(Node).filter(Node.is_active == True)
         )
         return result.scalars().all()
+    
+    async def get_latest_statuses(
+        self, db: AsyncSession, *, node_ids: List[int]
+    ) -> Dict[int, NodeStatus]:
+        """Последние записи о состоянии для набора нод одним запросом (node_id -> NodeStatus)"""
+        if not node_ids:
+            return {}
+        latest_ids = (
+            select(func.max(NodeStatus.id))
+            .where(NodeStatus.node_id.in_(node_ids))
+            .group_by(NodeStatus.node_id)
+        )
+        result = await db.execute(
+            select(NodeStatus).where(NodeStatus.id.in_(latest_ids))
+        )
+        return {node_status.node_id: node_status for node_status in result.scalars()}
 
 # Создаем экземпляр CRUD класса
 node = CRUDNode(Node)
\ No newline at end of file
@@ -1,11 +1,12 @@
 """
 CRUD операции для системных событий.
 """
+import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import and_, desc, select, func
+from sqlalchemy import and_, desc, insert, select, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base import CRUDBase
@@ -110,6 +111,55 @@ async def get_events_by_timerange(
         result = await db.execute(query)
         return result.scalars().all()
     
+    async def stream_events(
+        self,
+        db: AsyncSession,
+        *,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        level: Optional[str] = None,
+        source: Optional[str] = None,
+        yield_per: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Построчно отдать события за период, не создавая ORM-объектов.
+        
+        Выбираются только нужные колонки, строки читаются с сервера
+        порциями по yield_per, поэтому память не растёт с размером выборки.
+        
+        Args:
+            db: Сессия базы данных
+            start_time: Начальное время
+            end_time: Конечное время (по умолчанию — без ограничения)
+            level: Фильтр по уровню
+            source: Фильтр по источнику
+            yield_per: Размер порции, читаемой из курсора
+            
+        Yields:
+            Словари с полями события
+        """
+        query = select(
+            self.model.id,
+            self.model.timestamp,
+            self.model.level,
+            self.model.message,
+            self.model.source,
+            self.model.category,
+            self.model.user_id,
+            self.model.node_id,
+        ).where(self.model.timestamp >= start_time).order_by(self.model.timestamp)
+        
+        if end_time:
+            query = query.where(self.model.timestamp <= end_time)
+        if level:
+            query = query.where(self.model.level == level)
+        if source:
+            query = query.where(self.model.source == source)
+        
+        result = await db.stream(query.execution_options(yield_per=yield_per))
+        async for row in result.mappings():
+            yield dict(row)
+    
     async def get_events_count_by_level(
         self,
         db: AsyncSession,
@@ -216,6 +266,53 @@ async def create_event(
         await db.refresh(event)
         return event
     
+    async def create_events(
+        self,
+        db: AsyncSession,
+        *,
+        events: List[Dict[str, Any]]
+    ) -> List[int]:
+        """
+        Создать несколько системных событий одним INSERT.
+        
+        Вместо добавления объектов в сессию по одному выполняется один
+        INSERT ... VALUES (...), (...) RETURNING id без накладных расходов
+        unit-of-work на каждую строку.
+        
+        Args:
+            db: Сессия базы данных
+            events: Список словарей с полями события (как у create_event)
+            
+        Returns:
+            Список ID созданных событий
+        """
+        if not events:
+            return []
+        
+        # Все строки executemany должны иметь одинаковый набор ключей
+        rows = [
+            {
+                "uuid": uuid.uuid4(),
+                "level": event["level"],
+                "message": event["message"],
+                "source": event["source"],
+                "category": event.get("category"),
+                "user_id": event.get("user_id"),
+                "node_id": event.get("node_id"),
+                "ip_address": event.get("ip_address"),
+                "details": event.get("details") or {},
+            }
+            for event in events
+        ]
+        
+        result = await db.execute(
+            insert(self.model).returning(self.model.id),
+            rows
+        )
+        ids = list(result.scalars().all())
+        await db.commit()
+        return ids
+    
     async def cleanup_old_events(
         self,
         db: AsyncSession,
@@ -241,7 +338,12 @@ async def cleanup_old_events(
         count_result = await db.execute(count_query)
         count = count_result.scalar()
         
-        # Удаляем старые события
+        # В PostgreSQL целиком устаревшие партиции удаляются через DROP TABLE
+        # вместо построчного DELETE + VACUUM
+        if db.get_bind().dialect.name == "postgresql":
+            await self._drop_expired_partitions(db, cutoff_date=cutoff_date)
+        
+        # Удаляем оставшиеся старые события
         delete_query = self.model.__table__.delete().where(
             self.model.timestamp < cutoff_date
         )
@@ -250,6 +352,63 @@ async def cleanup_old_events(
         
         return count
     
+    async def ensure_partitions(
+        self,
+        db: AsyncSession,
+        *,
+        months_ahead: int = 1
+    ) -> None:
+        """
+        Создать месячные партиции system_events (только PostgreSQL).
+        
+        Вызывается периодически из TrafficRollupAggregator, чтобы партиция
+        следующего месяца существовала до начала записи в неё; события
+        без партиции попадают в system_events_default.
+        
+        Args:
+            db: Сессия базы данных
+            months_ahead: На сколько месяцев вперед создавать партиции
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return
+        
+        for offset in range(months_ahead + 1):
+            await db.execute(
+                text(
+                    "SELECT create_system_events_partition("
+                    "(date_trunc('month', now()) + make_interval(months => :offset))::date)"
+                ),
+                {"offset": offset}
+            )
+        await db.commit()
+    
+    async def _drop_expired_partitions(
+        self,
+        db: AsyncSession,
+        *,
+        cutoff_date: datetime
+    ) -> None:
+        """Удалить партиции system_events, все события которых старше cutoff_date."""
+        result = await db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table"
+            ),
+            {"table": self.model.__tablename__}
+        )
+        
+        for (partition_name,) in result.all():
+            # Имя партиции: system_events_pYYYYMM
+            suffix = partition_name.rsplit("_p", 1)[-1]
+            if len(suffix) != 6 or not suffix.isdigit():
+                continue
+            year, month = int(suffix[:4]), int(suffix[4:])
+            partition_end = datetime(year + month // 12, month % 12 + 1, 1)
+            if partition_end <= cutoff_date:
+                await db.execute(text(f'DROP TABLE IF EXISTS "{partition_name}"'))
+    
     async def get_error_events(
         self,
         db: AsyncSession,
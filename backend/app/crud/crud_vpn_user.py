@@ -86,6 +86,24 @@ async def get_traffic_stats(self, db: AsyncSession) -> Dict[str, Any]:
             'total_users': row.total_users or 0
         }
 
+    async def get_traffic_exceeded(self, db: AsyncSession, *, limit: int = 1000) -> List[VPNUser]:
+        """
+        Получить активных пользователей, превысивших лимит трафика.
+        
+        Условие строится по хранимой колонке total_traffic, поэтому
+        не требует вычисления суммы для каждой строки.
+        """
+        result = await db.execute(
+            select(VPNUser)
+            .where(
+                VPNUser.status == VPNUserStatus.ACTIVE,
+                VPNUser.traffic_limit > 0,
+                VPNUser.total_traffic >= VPNUser.traffic_limit
+            )
+            .limit(limit)
+        )
+        return result.scalars().all()
+
     async def get_recently_active(self, db: AsyncSession, *, limit: int = 10) -> List[VPNUser]:
         """Получить недавно активных пользователей."""
         result = await db.execute(
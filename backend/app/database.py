@@ -1,4 +1,6 @@
-from typing import AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, Optional
+
+import orjson
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncSession,
@@ -26,6 +28,13 @@
     "pool_timeout": 30,
 }
 
+
+def json_serializer(value: Any) -> str:
+    """Сериализует значения JSON/JSONB колонок через orjson."""
+    # OPT_NON_STR_KEYS сохраняет поведение json.dumps для нестроковых ключей
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # Создаем асинхронный движок SQLAlchemy
 if IS_SQLITE:
     # Для SQLite используем NullPool, так как он не поддерживает одновременный доступ
@@ -34,6 +43,8 @@
         echo=settings.DEBUG,
         connect_args={"check_same_thread": False},
         poolclass=NullPool,
+        json_serializer=json_serializer,
+        json_deserializer=orjson.loads,
     )
 else:
     # Для PostgreSQL и других СУБД используем настраиваемый пул соединений
@@ -45,6 +56,8 @@
         pool_recycle=POOL_SETTINGS["pool_recycle"],
         pool_pre_ping=POOL_SETTINGS["pool_pre_ping"],
         pool_timeout=POOL_SETTINGS["pool_timeout"],
+        json_serializer=json_serializer,
+        json_deserializer=orjson.loads,
     )
 
 # Создаем фабрику сессий с настройками
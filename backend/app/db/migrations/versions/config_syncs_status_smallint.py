@@ -0,0 +1,53 @@
+"""Store config_syncs.status as SMALLINT codes
+
+Revision ID: config_syncs_status_smallint
+Revises: partition_system_events
+Create Date: 2024-01-06 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'config_syncs_status_smallint'
+down_revision = 'partition_system_events'
+branch_labels = None
+depends_on = None
+
+# Порядок совпадает с порядком объявления SyncStatus
+STATUSES = ['pending', 'in_progress', 'completed', 'failed', 'outdated']
+
+
+def upgrade() -> None:
+    """Replace the string status column with a SMALLINT code."""
+    op.add_column('config_syncs', sa.Column('status_code', sa.SmallInteger(), nullable=True))
+
+    # Старая колонка могла хранить как имена (PENDING), так и значения (pending)
+    cases = " ".join(f"WHEN '{name}' THEN {code}" for code, name in enumerate(STATUSES))
+    op.execute(f"UPDATE config_syncs SET status_code = CASE lower(status) {cases} ELSE 0 END")
+
+    with op.batch_alter_table('config_syncs') as batch_op:
+        batch_op.drop_column('status')
+        batch_op.alter_column(
+            'status_code',
+            new_column_name='status',
+            existing_type=sa.SmallInteger(),
+            nullable=False,
+        )
+
+
+def downgrade() -> None:
+    """Restore the string status column."""
+    op.add_column('config_syncs', sa.Column('status_name', sa.String(length=20), nullable=True))
+
+    cases = " ".join(f"WHEN {code} THEN '{name.upper()}'" for code, name in enumerate(STATUSES))
+    op.execute(f"UPDATE config_syncs SET status_name = CASE status {cases} ELSE 'PENDING' END")
+
+    with op.batch_alter_table('config_syncs') as batch_op:
+        batch_op.drop_column('status')
+        batch_op.alter_column(
+            'status_name',
+            new_column_name='status',
+            existing_type=sa.String(length=20),
+            nullable=False,
+        )
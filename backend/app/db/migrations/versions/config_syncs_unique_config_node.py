@@ -0,0 +1,37 @@
+"""Make (config_version_id, node_id) unique in config_syncs
+
+Revision ID: config_syncs_unique_config_node
+Revises: config_versions_section_hashes
+Create Date: 2024-01-22 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'config_syncs_unique_config_node'
+down_revision = 'config_versions_section_hashes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Keep the newest sync row per (config, node) and add a unique index."""
+    op.execute(
+        """
+        DELETE FROM config_syncs
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM config_syncs GROUP BY config_version_id, node_id
+        )
+        """
+    )
+    op.create_index(
+        'ix_config_syncs_config_node',
+        'config_syncs',
+        ['config_version_id', 'node_id'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Drop the unique index."""
+    op.drop_index('ix_config_syncs_config_node', table_name='config_syncs')
@@ -0,0 +1,58 @@
+"""Add config_versions.section_hashes for partial config sync
+
+Revision ID: config_versions_section_hashes
+Revises: vpn_users_status_smallint
+Create Date: 2024-01-21 12:00:00.000000
+
+"""
+import hashlib
+
+import orjson
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'config_versions_section_hashes'
+down_revision = 'vpn_users_status_smallint'
+branch_labels = None
+depends_on = None
+
+config_versions = sa.table(
+    'config_versions',
+    sa.column('id', sa.Integer),
+    sa.column('config', sa.JSON),
+    sa.column('section_hashes', sa.JSON),
+)
+
+
+def _section_hashes(config) -> dict:
+    """Как ConfigVersion.compute_section_hashes."""
+    return {
+        key: hashlib.sha256(orjson.dumps(section, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        for key, section in (config or {}).items()
+    }
+
+
+def upgrade() -> None:
+    """Add the column and fill it for existing config versions."""
+    bind = op.get_bind()
+    json_type = postgresql.JSONB(astext_type=sa.Text()) if bind.dialect.name == 'postgresql' else sa.JSON()
+    op.add_column('config_versions', sa.Column('section_hashes', json_type, nullable=True))
+
+    rows = bind.execute(sa.select(config_versions.c.id, config_versions.c.config)).all()
+    for row in rows:
+        bind.execute(
+            config_versions.update()
+            .where(config_versions.c.id == row.id)
+            .values(section_hashes=_section_hashes(row.config))
+        )
+
+    with op.batch_alter_table('config_versions') as batch_op:
+        batch_op.alter_column('section_hashes', existing_type=json_type, nullable=False)
+
+
+def downgrade() -> None:
+    """Drop the column."""
+    with op.batch_alter_table('config_versions') as batch_op:
+        batch_op.drop_column('section_hashes')
@@ -0,0 +1,48 @@
+"""Make config_versions.checksum unique
+
+Revision ID: config_versions_unique_checksum
+Revises: recompute_config_checksums
+Create Date: 2024-01-10 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'config_versions_unique_checksum'
+down_revision = 'recompute_config_checksums'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Deduplicate configs by checksum and add a unique index."""
+    # Синхронизации дубликатов переносим на самую старую версию
+    # с той же контрольной суммой, затем удаляем дубликаты
+    op.execute(
+        """
+        UPDATE config_syncs
+        SET config_version_id = (
+            SELECT MIN(keep.id) FROM config_versions keep
+            WHERE keep.checksum = (
+                SELECT dup.checksum FROM config_versions dup
+                WHERE dup.id = config_syncs.config_version_id
+            )
+        )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM config_versions
+        WHERE id NOT IN (SELECT MIN(id) FROM config_versions GROUP BY checksum)
+        """
+    )
+
+    op.drop_index('ix_config_versions_checksum', table_name='config_versions')
+    op.create_index('ix_config_versions_checksum', 'config_versions', ['checksum'], unique=True)
+
+
+def downgrade() -> None:
+    """Restore the non-unique checksum index."""
+    op.drop_index('ix_config_versions_checksum', table_name='config_versions')
+    op.create_index('ix_config_versions_checksum', 'config_versions', ['checksum'], unique=False)
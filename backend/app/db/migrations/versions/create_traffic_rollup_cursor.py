@@ -0,0 +1,31 @@
+"""Create traffic_rollup_cursor for the traffic rollup aggregator
+
+Revision ID: create_traffic_rollup_cursor
+Revises: system_events_default_partition
+Create Date: 2024-01-25 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'create_traffic_rollup_cursor'
+down_revision = 'system_events_default_partition'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the single-row cursor table; the first rollup run fills it."""
+    op.create_table(
+        'traffic_rollup_cursor',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('last_log_id', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Drop the cursor table."""
+    op.drop_table('traffic_rollup_cursor')
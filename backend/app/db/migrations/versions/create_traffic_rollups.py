@@ -0,0 +1,33 @@
+"""Create traffic_rollups table with hourly/daily/monthly traffic aggregates
+
+Revision ID: create_traffic_rollups
+Revises: total_traffic_generated_columns
+Create Date: 2024-01-14 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'create_traffic_rollups'
+down_revision = 'total_traffic_generated_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Таблица заполняется фоновым агрегатором при первом запуске
+    op.create_table(
+        'traffic_rollups',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period_type', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('upload', sa.BigInteger(), nullable=False),
+        sa.Column('download', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'period_type', 'bucket_start')
+    )
+
+
+def downgrade():
+    op.drop_table('traffic_rollups')
@@ -0,0 +1,31 @@
+"""Drop the unused index on system_events.uuid
+
+Revision ID: drop_system_events_uuid_index
+Revises: config_syncs_status_smallint
+Create Date: 2024-01-07 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'drop_system_events_uuid_index'
+down_revision = 'config_syncs_status_smallint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    uuid событий только отдаётся в API, выборок по нему нет.
+
+    Индекс лишь удорожает каждую вставку в самую нагруженную таблицу,
+    а после секционирования он и так не уникальный (PostgreSQL).
+    """
+    op.drop_index('ix_system_events_uuid', table_name='system_events')
+
+
+def downgrade() -> None:
+    """Restore the uuid index."""
+    # В секционированной таблице уникальный индекс без ключа секционирования невозможен
+    unique = op.get_bind().dialect.name != 'postgresql'
+    op.create_index('ix_system_events_uuid', 'system_events', ['uuid'], unique=unique)
@@ -0,0 +1,60 @@
+"""Store ip_address columns as INET
+
+Revision ID: ip_address_columns_to_inet
+Revises: config_versions_unique_checksum
+Create Date: 2024-01-11 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'ip_address_columns_to_inet'
+down_revision = 'config_versions_unique_checksum'
+branch_labels = None
+depends_on = None
+
+IP_TABLES = ['devices', 'nodes', 'system_events']
+
+
+def upgrade() -> None:
+    """Switch VARCHAR(45) ip_address columns to INET (PostgreSQL only)."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # В SQLite INET хранится строкой той же длины
+        return
+
+    for table in IP_TABLES:
+        op.alter_column(
+            table,
+            'ip_address',
+            type_=postgresql.INET(),
+            postgresql_using="NULLIF(ip_address, '')::inet",
+        )
+
+    # GiST-индекс для выборок по подсети (оператор <<=)
+    op.create_index(
+        'ix_system_events_ip_address_gist',
+        'system_events',
+        ['ip_address'],
+        postgresql_using='gist',
+        postgresql_ops={'ip_address': 'inet_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Switch INET columns back to VARCHAR(45) (PostgreSQL only)."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_system_events_ip_address_gist', table_name='system_events')
+
+    for table in IP_TABLES:
+        op.alter_column(
+            table,
+            'ip_address',
+            type_=sa.String(length=45),
+            postgresql_using='host(ip_address)',
+        )
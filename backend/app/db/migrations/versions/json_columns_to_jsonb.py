@@ -0,0 +1,55 @@
+"""Convert remaining JSON columns to JSONB
+
+Revision ID: json_columns_to_jsonb
+Revises: system_events_covering_index
+Create Date: 2024-01-04 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'json_columns_to_jsonb'
+down_revision = 'system_events_covering_index'
+branch_labels = None
+depends_on = None
+
+# (таблица, колонка) — config_versions.config и config_syncs.metadata
+# уже созданы как JSONB в create_all_tables
+JSON_COLUMNS = [
+    ('system_events', 'details'),
+    ('devices', 'metadata'),
+    ('subscriptions', 'settings'),
+]
+
+
+def upgrade() -> None:
+    """Switch JSON columns to JSONB (PostgreSQL only)."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # В SQLite JSONB отсутствует, модели используют JSON
+        return
+
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            postgresql_using=f'"{column}"::jsonb',
+        )
+
+
+def downgrade() -> None:
+    """Switch JSONB columns back to JSON (PostgreSQL only)."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.JSON(),
+            postgresql_using=f'"{column}"::json',
+        )
@@ -0,0 +1,25 @@
+"""Add nodes.auth_token for node agent API requests
+
+Revision ID: nodes_auth_token
+Revises: config_syncs_unique_config_node
+Create Date: 2024-01-23 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'nodes_auth_token'
+down_revision = 'config_syncs_unique_config_node'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add the nullable auth_token column."""
+    op.add_column('nodes', sa.Column('auth_token', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop the auth_token column."""
+    op.drop_column('nodes', 'auth_token')
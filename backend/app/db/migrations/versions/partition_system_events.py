@@ -0,0 +1,134 @@
+"""Partition system_events by month on PostgreSQL
+
+Revision ID: partition_system_events
+Revises: json_columns_to_jsonb
+Create Date: 2024-01-05 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'partition_system_events'
+down_revision = 'json_columns_to_jsonb'
+branch_labels = None
+depends_on = None
+
+# Индексы пересоздаются на родительской таблице; PostgreSQL создаёт
+# локальную копию каждого индекса в каждой партиции
+INDEXES = [
+    ('ix_system_events_uuid', ['uuid'], {}),
+    ('ix_system_events_timestamp', ['timestamp'], {}),
+    ('ix_system_events_level', ['level'], {}),
+    ('ix_system_events_source', ['source'], {}),
+    ('ix_system_events_category', ['category'], {}),
+    ('ix_system_events_user_id', ['user_id'], {}),
+    ('ix_system_events_node_id', ['node_id'], {}),
+    ('ix_system_events_timestamp_level', ['timestamp', 'level'], {}),
+    ('ix_system_events_user_timestamp', ['user_id', 'timestamp'], {}),
+    ('ix_system_events_node_timestamp', ['node_id', 'timestamp'], {}),
+    (
+        'ix_system_events_source_category_timestamp',
+        ['source', 'category', sa.text('timestamp DESC')],
+        {'postgresql_include': ['level', 'message', 'user_id', 'node_id']},
+    ),
+    (
+        'ix_system_events_alerts',
+        [sa.text('timestamp DESC')],
+        {'postgresql_where': sa.text("level IN ('error', 'critical')")},
+    ),
+]
+
+# Создаёт партицию system_events_pYYYYMM для месяца, содержащего month_start
+CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_system_events_partition(month_start date)
+RETURNS void AS $$
+DECLARE
+    start_date date := date_trunc('month', month_start)::date;
+    end_date date := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name text := 'system_events_p' || to_char(start_date, 'YYYYMM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF system_events '
+        'FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def _create_indexes() -> None:
+    for name, columns, kwargs in INDEXES:
+        op.create_index(name, 'system_events', columns, **kwargs)
+
+
+def upgrade() -> None:
+    """Convert system_events into a table range-partitioned by timestamp."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Партиционирование доступно только в PostgreSQL
+        return
+
+    op.rename_table('system_events', 'system_events_old')
+    op.execute("ALTER SEQUENCE system_events_id_seq OWNED BY NONE")
+
+    # Первичный и уникальные ключи партиционированной таблицы обязаны
+    # включать ключ партиционирования, поэтому PK — (id, timestamp),
+    # а индекс по uuid не уникальный
+    op.execute(
+        "CREATE TABLE system_events "
+        "(LIKE system_events_old INCLUDING DEFAULTS INCLUDING COMMENTS) "
+        'PARTITION BY RANGE ("timestamp")'
+    )
+    op.execute('ALTER TABLE system_events ALTER COLUMN "timestamp" SET NOT NULL')
+    op.execute('ALTER TABLE system_events ADD PRIMARY KEY (id, "timestamp")')
+    op.execute("ALTER SEQUENCE system_events_id_seq OWNED BY system_events.id")
+
+    op.execute(CREATE_PARTITION_FUNCTION)
+
+    # Партиции на каждый месяц с существующими данными и на следующий месяц
+    op.execute(
+        """
+        SELECT create_system_events_partition(month::date)
+        FROM generate_series(
+            date_trunc('month', COALESCE((SELECT min("timestamp") FROM system_events_old), now())),
+            date_trunc('month', now() + interval '1 month'),
+            interval '1 month'
+        ) AS month
+        """
+    )
+
+    op.execute("INSERT INTO system_events SELECT * FROM system_events_old")
+    op.drop_table('system_events_old')
+
+    _create_indexes()
+
+
+def downgrade() -> None:
+    """Convert system_events back into a regular table."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.rename_table('system_events', 'system_events_partitioned')
+    op.execute("ALTER SEQUENCE system_events_id_seq OWNED BY NONE")
+    for name, _, _ in INDEXES:
+        op.drop_index(name, table_name='system_events_partitioned')
+
+    op.execute(
+        "CREATE TABLE system_events "
+        "(LIKE system_events_partitioned INCLUDING DEFAULTS INCLUDING COMMENTS)"
+    )
+    op.execute("ALTER TABLE system_events ADD PRIMARY KEY (id)")
+    op.execute("ALTER SEQUENCE system_events_id_seq OWNED BY system_events.id")
+    op.execute("INSERT INTO system_events SELECT * FROM system_events_partitioned")
+
+    # Удаление родительской таблицы удаляет и все партиции
+    op.drop_table('system_events_partitioned')
+    op.execute("DROP FUNCTION IF EXISTS create_system_events_partition(date)")
+
+    _create_indexes()
+    op.drop_index('ix_system_events_uuid', table_name='system_events')
+    op.create_index('ix_system_events_uuid', 'system_events', ['uuid'], unique=True)
+    op.create_index('ix_system_events_id', 'system_events', ['id'])
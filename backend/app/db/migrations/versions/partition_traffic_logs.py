@@ -0,0 +1,149 @@
+"""Partition traffic_logs by month and by user_id hash on PostgreSQL
+
+Revision ID: partition_traffic_logs
+Revises: create_traffic_rollups
+Create Date: 2024-01-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'partition_traffic_logs'
+down_revision = 'create_traffic_rollups'
+branch_labels = None
+depends_on = None
+
+# Индексы пересоздаются на родительской таблице; PostgreSQL создаёт
+# локальную копию каждого индекса в каждой партиции
+INDEXES = [
+    ('ix_traffic_logs_id', ['id']),
+    ('ix_traffic_logs_uuid', ['uuid']),
+    ('ix_traffic_logs_user_id', ['user_id']),
+    ('ix_traffic_logs_node_id', ['node_id']),
+    ('ix_traffic_logs_device_id', ['device_id']),
+    ('ix_traffic_logs_started_at', ['started_at']),
+    ('ix_traffic_logs_ended_at', ['ended_at']),
+    ('ix_traffic_logs_total_traffic', ['total_traffic']),
+]
+
+# Все колонки, кроме вычисляемой total_traffic, в которую нельзя писать
+COPY_COLUMNS = (
+    'id, uuid, user_id, node_id, remote_ip, user_agent, device_id, '
+    'upload, download, started_at, ended_at, created_at, protocol, metadata'
+)
+
+# Создаёт месячную партицию traffic_logs_pYYYYMM, разбитую по hash(user_id)
+# на 8 подпартиций traffic_logs_pYYYYMM_h0..h7
+CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_traffic_logs_partition(month_start date)
+RETURNS void AS $$
+DECLARE
+    start_date date := date_trunc('month', month_start)::date;
+    end_date date := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name text := 'traffic_logs_p' || to_char(start_date, 'YYYYMM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF traffic_logs '
+        'FOR VALUES FROM (%L) TO (%L) PARTITION BY HASH (user_id)',
+        partition_name, start_date, end_date
+    );
+    FOR remainder IN 0..7 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I '
+            'FOR VALUES WITH (MODULUS 8, REMAINDER %s)',
+            partition_name || '_h' || remainder, partition_name, remainder
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def _create_indexes() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, 'traffic_logs', columns)
+
+
+def upgrade() -> None:
+    """Convert traffic_logs into a table range-partitioned by started_at."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Партиционирование доступно только в PostgreSQL
+        return
+
+    op.rename_table('traffic_logs', 'traffic_logs_old')
+    op.execute("ALTER SEQUENCE traffic_logs_id_seq OWNED BY NONE")
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='traffic_logs_old')
+
+    # Первичный и уникальные ключи партиционированной таблицы обязаны
+    # включать ключ партиционирования, поэтому PK — (id, started_at),
+    # а индекс по uuid не уникальный
+    op.execute(
+        "CREATE TABLE traffic_logs "
+        "(LIKE traffic_logs_old INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING COMMENTS) "
+        "PARTITION BY RANGE (started_at)"
+    )
+    op.execute("UPDATE traffic_logs_old SET started_at = created_at WHERE started_at IS NULL")
+    op.execute("ALTER TABLE traffic_logs ALTER COLUMN started_at SET NOT NULL")
+    op.execute("ALTER TABLE traffic_logs ADD PRIMARY KEY (id, started_at)")
+    op.create_foreign_key(None, 'traffic_logs', 'users', ['user_id'], ['id'])
+    op.create_foreign_key(None, 'traffic_logs', 'nodes', ['node_id'], ['id'])
+    op.execute("ALTER SEQUENCE traffic_logs_id_seq OWNED BY traffic_logs.id")
+
+    op.execute(CREATE_PARTITION_FUNCTION)
+
+    # Партиции на каждый месяц с существующими данными и на следующий месяц
+    op.execute(
+        """
+        SELECT create_traffic_logs_partition(month::date)
+        FROM generate_series(
+            date_trunc('month', COALESCE((SELECT min(started_at) FROM traffic_logs_old), now())),
+            date_trunc('month', now() + interval '1 month'),
+            interval '1 month'
+        ) AS month
+        """
+    )
+
+    op.execute(
+        f"INSERT INTO traffic_logs ({COPY_COLUMNS}) "
+        f"SELECT {COPY_COLUMNS} FROM traffic_logs_old"
+    )
+    op.drop_table('traffic_logs_old')
+
+    _create_indexes()
+
+
+def downgrade() -> None:
+    """Convert traffic_logs back into a regular table."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.rename_table('traffic_logs', 'traffic_logs_partitioned')
+    op.execute("ALTER SEQUENCE traffic_logs_id_seq OWNED BY NONE")
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='traffic_logs_partitioned')
+
+    op.execute(
+        "CREATE TABLE traffic_logs "
+        "(LIKE traffic_logs_partitioned INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING COMMENTS)"
+    )
+    op.execute("ALTER TABLE traffic_logs ALTER COLUMN started_at DROP NOT NULL")
+    op.execute("ALTER TABLE traffic_logs ADD PRIMARY KEY (id)")
+    op.create_foreign_key(None, 'traffic_logs', 'users', ['user_id'], ['id'])
+    op.create_foreign_key(None, 'traffic_logs', 'nodes', ['node_id'], ['id'])
+    op.execute("ALTER SEQUENCE traffic_logs_id_seq OWNED BY traffic_logs.id")
+    op.execute(
+        f"INSERT INTO traffic_logs ({COPY_COLUMNS}) "
+        f"SELECT {COPY_COLUMNS} FROM traffic_logs_partitioned"
+    )
+
+    # Удаление родительской таблицы удаляет и все партиции
+    op.drop_table('traffic_logs_partitioned')
+    op.execute("DROP FUNCTION IF EXISTS create_traffic_logs_partition(date)")
+
+    _create_indexes()
+    op.drop_index('ix_traffic_logs_uuid', table_name='traffic_logs')
+    op.create_index('ix_traffic_logs_uuid', 'traffic_logs', ['uuid'], unique=True)
@@ -0,0 +1,47 @@
+"""Recompute config_versions.checksum over orjson-canonical bytes
+
+Revision ID: recompute_config_checksums
+Revises: system_events_timestamp_brin
+Create Date: 2024-01-09 12:00:00.000000
+
+"""
+import hashlib
+import json
+
+import orjson
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'recompute_config_checksums'
+down_revision = 'system_events_timestamp_brin'
+branch_labels = None
+depends_on = None
+
+config_versions = sa.table(
+    'config_versions',
+    sa.column('id', sa.Integer),
+    sa.column('config', sa.JSON),
+    sa.column('checksum', sa.String),
+)
+
+
+def _recompute(checksum) -> None:
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(config_versions.c.id, config_versions.c.config)).all()
+    for row in rows:
+        bind.execute(
+            config_versions.update()
+            .where(config_versions.c.id == row.id)
+            .values(checksum=checksum(row.config))
+        )
+
+
+def upgrade() -> None:
+    """Hash compact sorted JSON produced by orjson (see ConfigVersion.compute_checksum)."""
+    _recompute(lambda config: hashlib.sha256(orjson.dumps(config, option=orjson.OPT_SORT_KEYS)).hexdigest())
+
+
+def downgrade() -> None:
+    """Hash json.dumps(sort_keys=True) output, as before."""
+    _recompute(lambda config: hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest())
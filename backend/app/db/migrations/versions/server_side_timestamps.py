@@ -0,0 +1,52 @@
+"""Use DB-side defaults and timestamptz for created_at/updated_at
+
+Revision ID: server_side_timestamps
+Revises: ip_address_columns_to_inet
+Create Date: 2024-01-12 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'server_side_timestamps'
+down_revision = 'ip_address_columns_to_inet'
+branch_labels = None
+depends_on = None
+
+# Колонки, которые раньше заполнялись datetime.utcnow в Python: {таблица: [(колонка, nullable)]}
+TIMESTAMP_COLUMNS = {
+    'config_syncs': [('created_at', False), ('updated_at', True)],
+    'config_versions': [('created_at', False), ('updated_at', True)],
+    'devices': [('created_at', False)],
+}
+
+
+def _alter_timestamps(*, timezone: bool) -> None:
+    is_postgresql = op.get_bind().dialect.name == 'postgresql'
+
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column, nullable in columns:
+                kwargs = {}
+                if is_postgresql:
+                    # Существующие значения записаны в UTC
+                    kwargs['postgresql_using'] = f"{column} AT TIME ZONE 'UTC'"
+                batch_op.alter_column(
+                    column,
+                    existing_type=sa.DateTime(timezone=not timezone),
+                    type_=sa.DateTime(timezone=timezone),
+                    server_default=sa.func.now() if timezone else None,
+                    existing_nullable=nullable,
+                    **kwargs,
+                )
+
+
+def upgrade() -> None:
+    """Switch to DateTime(timezone=True) with server_default now()."""
+    _alter_timestamps(timezone=True)
+
+
+def downgrade() -> None:
+    """Restore naive DateTime columns without server defaults."""
+    _alter_timestamps(timezone=False)
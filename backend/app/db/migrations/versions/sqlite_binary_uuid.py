@@ -0,0 +1,87 @@
+"""Store UUID columns as 16-byte BINARY on SQLite
+
+Revision ID: sqlite_binary_uuid
+Revises: traffic_metadata_jsonb
+Create Date: 2024-01-19 12:00:00.000000
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'sqlite_binary_uuid'
+down_revision = 'traffic_metadata_jsonb'
+branch_labels = None
+depends_on = None
+
+UUID_TABLES = [
+    'users',
+    'subscriptions',
+    'system_events',
+    'traffic_logs',
+    'traffic_limits',
+    'vpn_users',
+]
+
+
+def _to_uuid(value) -> uuid.UUID:
+    if isinstance(value, (bytes, memoryview)):
+        value = bytes(value)
+        if len(value) == 16:
+            return uuid.UUID(bytes=value)
+        value = value.decode()
+    return uuid.UUID(value)
+
+
+def _convert(table: str, *, to_binary: bool) -> None:
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(f'SELECT id, uuid FROM {table} WHERE uuid IS NOT NULL')
+    ).all()
+    if not rows:
+        return
+
+    bind.execute(
+        sa.text(f'UPDATE {table} SET uuid = :uuid WHERE id = :id'),
+        [
+            {
+                'id': row_id,
+                'uuid': _to_uuid(value).bytes if to_binary else str(_to_uuid(value)),
+            }
+            for row_id, value in rows
+        ]
+    )
+
+
+def upgrade() -> None:
+    """Convert CHAR(36) UUIDs to BINARY(16) (SQLite only)."""
+    if op.get_bind().dialect.name != 'sqlite':
+        # В PostgreSQL используется нативный тип UUID
+        return
+
+    for table in UUID_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                'uuid',
+                existing_type=sa.String(36),
+                type_=sa.BINARY(16),
+            )
+        # SQLite не меняет хранимые значения при смене типа колонки
+        _convert(table, to_binary=True)
+
+
+def downgrade() -> None:
+    """Convert BINARY(16) UUIDs back to CHAR(36) (SQLite only)."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for table in UUID_TABLES:
+        _convert(table, to_binary=False)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                'uuid',
+                existing_type=sa.BINARY(16),
+                type_=sa.String(36),
+            )
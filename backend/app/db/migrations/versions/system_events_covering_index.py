@@ -0,0 +1,44 @@
+"""Covering index for system_events feed and partial index for alerts
+
+Revision ID: system_events_covering_index
+Revises: create_all_tables
+Create Date: 2024-01-03 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'system_events_covering_index'
+down_revision = 'create_all_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Replace (source, category) index with a covering one and add alerts index."""
+    op.drop_index('ix_system_events_source_category', table_name='system_events')
+
+    # Покрывающий индекс: source + category + timestamp DESC, INCLUDE для
+    # колонок, которые читает лента событий (PostgreSQL 11+)
+    op.create_index(
+        'ix_system_events_source_category_timestamp',
+        'system_events',
+        ['source', 'category', sa.text('timestamp DESC')],
+        postgresql_include=['level', 'message', 'user_id', 'node_id'],
+    )
+
+    # Частичный индекс только для error/critical событий
+    op.create_index(
+        'ix_system_events_alerts',
+        'system_events',
+        [sa.text('timestamp DESC')],
+        postgresql_where=sa.text("level IN ('error', 'critical')"),
+    )
+
+
+def downgrade() -> None:
+    """Restore the plain (source, category) index."""
+    op.drop_index('ix_system_events_alerts', table_name='system_events')
+    op.drop_index('ix_system_events_source_category_timestamp', table_name='system_events')
+    op.create_index('ix_system_events_source_category', 'system_events', ['source', 'category'])
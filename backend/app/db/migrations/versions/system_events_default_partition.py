@@ -0,0 +1,97 @@
+"""Add a DEFAULT partition to system_events on PostgreSQL
+
+Revision ID: system_events_default_partition
+Revises: nodes_auth_token
+Create Date: 2024-01-24 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'system_events_default_partition'
+down_revision = 'nodes_auth_token'
+branch_labels = None
+depends_on = None
+
+# DEFAULT-партиция принимает события, для месяца которых ещё нет партиции.
+# PostgreSQL не даёт создать партицию, если подходящие ей строки уже лежат
+# в DEFAULT, поэтому новая партиция создаётся отдельной таблицей, события
+# месяца переносятся в неё из DEFAULT и только затем она подключается
+CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_system_events_partition(month_start date)
+RETURNS void AS $$
+DECLARE
+    start_date date := date_trunc('month', month_start)::date;
+    end_date date := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name text := 'system_events_p' || to_char(start_date, 'YYYYMM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE system_events INCLUDING DEFAULTS)',
+        partition_name
+    );
+    EXECUTE format(
+        'WITH moved AS ('
+        'DELETE FROM system_events_default '
+        'WHERE "timestamp" >= %L AND "timestamp" < %L RETURNING *'
+        ') INSERT INTO %I SELECT * FROM moved',
+        start_date, end_date, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE system_events ATTACH PARTITION %I '
+        'FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Прежняя версия функции из partition_system_events, восстанавливается при откате
+OLD_CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_system_events_partition(month_start date)
+RETURNS void AS $$
+DECLARE
+    start_date date := date_trunc('month', month_start)::date;
+    end_date date := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name text := 'system_events_p' || to_char(start_date, 'YYYYMM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF system_events '
+        'FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Create system_events_default and make partition creation move rows out of it."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Партиционирование доступно только в PostgreSQL
+        return
+
+    op.execute("CREATE TABLE IF NOT EXISTS system_events_default PARTITION OF system_events DEFAULT")
+    op.execute(CREATE_PARTITION_FUNCTION)
+
+
+def downgrade() -> None:
+    """Move rows from system_events_default into monthly partitions and drop it."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute(
+        """
+        SELECT create_system_events_partition(month::date)
+        FROM (
+            SELECT DISTINCT date_trunc('month', "timestamp") AS month
+            FROM system_events_default
+        ) AS months
+        """
+    )
+    op.drop_table('system_events_default')
+    op.execute(OLD_CREATE_PARTITION_FUNCTION)
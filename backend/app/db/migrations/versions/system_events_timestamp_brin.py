@@ -0,0 +1,42 @@
+"""Replace the BTREE index on system_events.timestamp with BRIN
+
+Revision ID: system_events_timestamp_brin
+Revises: drop_system_events_uuid_index
+Create Date: 2024-01-08 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'system_events_timestamp_brin'
+down_revision = 'drop_system_events_uuid_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Drop the single-column timestamp BTREE and add a BRIN index.
+
+    Сортировку по timestamp обслуживает составной
+    ix_system_events_timestamp_level, а для диапазонных условий
+    по времени в append-only таблице достаточно BRIN.
+    """
+    op.drop_index('ix_system_events_timestamp', table_name='system_events')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_system_events_timestamp_brin',
+            'system_events',
+            ['timestamp'],
+            postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32},
+        )
+
+
+def downgrade() -> None:
+    """Restore the BTREE timestamp index."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_system_events_timestamp_brin', table_name='system_events')
+
+    op.create_index('ix_system_events_timestamp', 'system_events', ['timestamp'])
@@ -0,0 +1,46 @@
+"""Store total_traffic as a generated column on vpn_users and traffic_logs
+
+Revision ID: total_traffic_generated_columns
+Revises: server_side_timestamps
+Create Date: 2024-01-13 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'total_traffic_generated_columns'
+down_revision = 'server_side_timestamps'
+branch_labels = None
+depends_on = None
+
+# {таблица: выражение для хранимой суммы}
+TOTAL_TRAFFIC_COLUMNS = {
+    'vpn_users': 'upload_traffic + download_traffic',
+    'traffic_logs': 'upload + download',
+}
+
+
+def upgrade():
+    # SQLite не умеет добавлять STORED-колонки через ALTER TABLE,
+    # поэтому там таблица пересоздаётся целиком
+    recreate = 'always' if op.get_bind().dialect.name == 'sqlite' else 'auto'
+
+    for table, expression in TOTAL_TRAFFIC_COLUMNS.items():
+        with op.batch_alter_table(table, recreate=recreate) as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    'total_traffic',
+                    sa.BigInteger(),
+                    sa.Computed(expression, persisted=True),
+                    nullable=True
+                )
+            )
+            batch_op.create_index(f'ix_{table}_total_traffic', ['total_traffic'])
+
+
+def downgrade():
+    for table in TOTAL_TRAFFIC_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(f'ix_{table}_total_traffic')
+            batch_op.drop_column('total_traffic')
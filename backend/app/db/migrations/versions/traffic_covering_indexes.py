@@ -0,0 +1,45 @@
+"""Covering indexes for per-user traffic and quota lookups
+
+Revision ID: traffic_covering_indexes
+Revises: traffic_logs_brin_indexes
+Create Date: 2024-01-17 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'traffic_covering_indexes'
+down_revision = 'traffic_logs_brin_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Replace the user_id indexes with covering composite ones."""
+    # Составные индексы начинаются с user_id, поэтому одиночные не нужны.
+    # INCLUDE-колонки позволяют выполнять проверки квоты как
+    # Index Only Scan (PostgreSQL 11+)
+    op.drop_index('ix_traffic_logs_user_id', table_name='traffic_logs')
+    op.create_index(
+        'ix_traffic_logs_user_started_at',
+        'traffic_logs',
+        ['user_id', 'started_at'],
+        postgresql_include=['upload', 'download'],
+    )
+
+    op.drop_index('ix_traffic_limits_user_id', table_name='traffic_limits')
+    op.create_index(
+        'ix_traffic_limits_user_period',
+        'traffic_limits',
+        ['user_id', 'period_start', 'period_end'],
+        postgresql_include=['data_limit', 'data_used'],
+    )
+
+
+def downgrade() -> None:
+    """Restore the single-column user_id indexes."""
+    op.drop_index('ix_traffic_limits_user_period', table_name='traffic_limits')
+    op.create_index('ix_traffic_limits_user_id', 'traffic_limits', ['user_id'])
+
+    op.drop_index('ix_traffic_logs_user_started_at', table_name='traffic_logs')
+    op.create_index('ix_traffic_logs_user_id', 'traffic_logs', ['user_id'])
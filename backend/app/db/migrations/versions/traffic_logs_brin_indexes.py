@@ -0,0 +1,48 @@
+"""Replace the BTREE indexes on traffic_logs.started_at/ended_at with BRIN
+
+Revision ID: traffic_logs_brin_indexes
+Revises: partition_traffic_logs
+Create Date: 2024-01-16 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'traffic_logs_brin_indexes'
+down_revision = 'partition_traffic_logs'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ['started_at', 'ended_at']
+
+
+def upgrade() -> None:
+    """
+    Swap the time BTREE indexes for BRIN on PostgreSQL.
+
+    Логи трафика только дописываются, и время коррелирует с физическим
+    порядком строк, поэтому BRIN отсекает блоки не хуже BTREE при
+    размере индекса в сотни раз меньше. В SQLite BTREE остаются.
+    """
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for column in COLUMNS:
+        op.drop_index(f'ix_traffic_logs_{column}', table_name='traffic_logs')
+        op.create_index(
+            f'ix_traffic_logs_{column}_brin',
+            'traffic_logs',
+            [column],
+            postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32},
+        )
+
+
+def downgrade() -> None:
+    """Restore the BTREE time indexes."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for column in COLUMNS:
+        op.drop_index(f'ix_traffic_logs_{column}_brin', table_name='traffic_logs')
+        op.create_index(f'ix_traffic_logs_{column}', 'traffic_logs', [column])
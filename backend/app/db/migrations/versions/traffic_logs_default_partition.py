@@ -0,0 +1,120 @@
+"""Add a DEFAULT partition to traffic_logs on PostgreSQL
+
+Revision ID: traffic_logs_default_partition
+Revises: create_traffic_rollup_cursor
+Create Date: 2024-01-26 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'traffic_logs_default_partition'
+down_revision = 'create_traffic_rollup_cursor'
+branch_labels = None
+depends_on = None
+
+# Все колонки, кроме вычисляемой total_traffic, в которую нельзя писать
+COPY_COLUMNS = (
+    'id, uuid, user_id, node_id, remote_ip, user_agent, device_id, '
+    'upload, download, started_at, ended_at, created_at, protocol, metadata'
+)
+
+# DEFAULT-партиция принимает логи с started_at вне созданных месяцев
+# (запоздавшие или задним числом). PostgreSQL не даёт создать партицию,
+# если подходящие ей строки уже лежат в DEFAULT, поэтому новая месячная
+# партиция создаётся отдельной таблицей со своими hash-подпартициями,
+# логи месяца переносятся в неё из DEFAULT и только затем она подключается
+CREATE_PARTITION_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION create_traffic_logs_partition(month_start date)
+RETURNS void AS $$
+DECLARE
+    start_date date := date_trunc('month', month_start)::date;
+    end_date date := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name text := 'traffic_logs_p' || to_char(start_date, 'YYYYMM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE traffic_logs INCLUDING DEFAULTS INCLUDING GENERATED) '
+        'PARTITION BY HASH (user_id)',
+        partition_name
+    );
+    FOR remainder IN 0..7 LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I '
+            'FOR VALUES WITH (MODULUS 8, REMAINDER %s)',
+            partition_name || '_h' || remainder, partition_name, remainder
+        );
+    END LOOP;
+    EXECUTE format(
+        'WITH moved AS ('
+        'DELETE FROM traffic_logs_default '
+        'WHERE started_at >= %L AND started_at < %L '
+        'RETURNING {COPY_COLUMNS}'
+        ') INSERT INTO %I ({COPY_COLUMNS}) SELECT {COPY_COLUMNS} FROM moved',
+        start_date, end_date, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE traffic_logs ATTACH PARTITION %I '
+        'FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Прежняя версия функции из partition_traffic_logs, восстанавливается при откате
+OLD_CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_traffic_logs_partition(month_start date)
+RETURNS void AS $$
+DECLARE
+    start_date date := date_trunc('month', month_start)::date;
+    end_date date := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name text := 'traffic_logs_p' || to_char(start_date, 'YYYYMM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF traffic_logs '
+        'FOR VALUES FROM (%L) TO (%L) PARTITION BY HASH (user_id)',
+        partition_name, start_date, end_date
+    );
+    FOR remainder IN 0..7 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I '
+            'FOR VALUES WITH (MODULUS 8, REMAINDER %s)',
+            partition_name || '_h' || remainder, partition_name, remainder
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Create traffic_logs_default and make partition creation move rows out of it."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Партиционирование доступно только в PostgreSQL
+        return
+
+    op.execute("CREATE TABLE IF NOT EXISTS traffic_logs_default PARTITION OF traffic_logs DEFAULT")
+    op.execute(CREATE_PARTITION_FUNCTION)
+
+
+def downgrade() -> None:
+    """Move rows from traffic_logs_default into monthly partitions and drop it."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute(
+        """
+        SELECT create_traffic_logs_partition(month::date)
+        FROM (
+            SELECT DISTINCT date_trunc('month', started_at) AS month
+            FROM traffic_logs_default
+        ) AS months
+        """
+    )
+    op.drop_table('traffic_logs_default')
+    op.execute(OLD_CREATE_PARTITION_FUNCTION)
@@ -0,0 +1,63 @@
+"""Convert traffic_logs.metadata and xray_configs.config to JSONB
+
+Revision ID: traffic_metadata_jsonb
+Revises: traffic_covering_indexes
+Create Date: 2024-01-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'traffic_metadata_jsonb'
+down_revision = 'traffic_covering_indexes'
+branch_labels = None
+depends_on = None
+
+# (таблица, колонка), пропущенные в json_columns_to_jsonb
+JSON_COLUMNS = [
+    ('traffic_logs', 'metadata'),
+    ('xray_configs', 'config'),
+]
+
+
+def upgrade() -> None:
+    """Switch JSON columns to JSONB and index traffic metadata (PostgreSQL only)."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # В SQLite JSONB отсутствует, модели используют JSON
+        return
+
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            postgresql_using=f'"{column}"::jsonb',
+        )
+
+    op.create_index(
+        'ix_traffic_logs_metadata_gin',
+        'traffic_logs',
+        ['metadata'],
+        postgresql_using='gin',
+        postgresql_ops={'metadata': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Switch JSONB columns back to JSON (PostgreSQL only)."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_traffic_logs_metadata_gin', table_name='traffic_logs')
+
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.JSON(),
+            postgresql_using=f'"{column}"::json',
+        )
@@ -0,0 +1,59 @@
+"""Store vpn_users.status as SMALLINT codes
+
+Revision ID: vpn_users_status_smallint
+Revises: sqlite_binary_uuid
+Create Date: 2024-01-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'vpn_users_status_smallint'
+down_revision = 'sqlite_binary_uuid'
+branch_labels = None
+depends_on = None
+
+# Порядок совпадает с порядком объявления VPNUserStatus
+STATUSES = ['active', 'suspended', 'expired', 'disabled']
+
+
+def upgrade() -> None:
+    """Replace the string status column with a SMALLINT code."""
+    op.drop_index('ix_vpn_users_status', table_name='vpn_users')
+    op.add_column('vpn_users', sa.Column('status_code', sa.SmallInteger(), nullable=True))
+
+    # SQLEnum хранил имена членов (ACTIVE), поэтому сравнение без учёта регистра
+    cases = " ".join(f"WHEN '{name}' THEN {code}" for code, name in enumerate(STATUSES))
+    op.execute(f"UPDATE vpn_users SET status_code = CASE lower(status) {cases} ELSE 0 END")
+
+    with op.batch_alter_table('vpn_users') as batch_op:
+        batch_op.drop_column('status')
+        batch_op.alter_column(
+            'status_code',
+            new_column_name='status',
+            existing_type=sa.SmallInteger(),
+            nullable=False,
+        )
+
+    op.create_index('ix_vpn_users_status', 'vpn_users', ['status'])
+
+
+def downgrade() -> None:
+    """Restore the string status column."""
+    op.drop_index('ix_vpn_users_status', table_name='vpn_users')
+    op.add_column('vpn_users', sa.Column('status_name', sa.String(length=20), nullable=True))
+
+    cases = " ".join(f"WHEN {code} THEN '{name.upper()}'" for code, name in enumerate(STATUSES))
+    op.execute(f"UPDATE vpn_users SET status_name = CASE status {cases} ELSE 'ACTIVE' END")
+
+    with op.batch_alter_table('vpn_users') as batch_op:
+        batch_op.drop_column('status')
+        batch_op.alter_column(
+            'status_name',
+            new_column_name='status',
+            existing_type=sa.String(length=20),
+            nullable=False,
+        )
+
+    op.create_index('ix_vpn_users_status', 'vpn_users', ['status'])
@@ -3,8 +3,10 @@
 """
 from app.database import async_session_factory, get_db
 
-# Алиас для совместимости
+# Алиасы для совместимости: все сессии создаются одной фабрикой
+# (expire_on_commit=False — без перечитывания колонок после коммита)
 get_async_db = get_db
+AsyncSessionLocal = async_session_factory
 
 # Экспортируем для обратной совместимости
-__all__ = ['async_session_factory', 'get_db', 'get_async_db']
\ No newline at end of file
+__all__ = ['async_session_factory', 'AsyncSessionLocal', 'get_db', 'get_async_db']
\ No newline at end of file
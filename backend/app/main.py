@@ -1,5 +1,8 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 import uvicorn
@@ -13,6 +16,29 @@
 
 # Импортируем API роутеры
 from app.api.api import api_router
+from app.core.security import warmup_password_hashing
+from app.services.config_sync_service import close_http_session, flush_pending_sync
+from app.services.event_writer import system_event_writer
+from app.services.traffic_buffer import traffic_buffer
+from app.services.traffic_rollup import traffic_rollup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка фоновых задач приложения."""
+    warmup_password_hashing()
+    await system_event_writer.start()
+    await traffic_buffer.start()
+    await traffic_rollup.start()
+    try:
+        yield
+    finally:
+        await traffic_rollup.stop()
+        await traffic_buffer.stop()
+        await system_event_writer.stop()
+        await flush_pending_sync()
+        await close_http_session()
+
 
 def create_application() -> FastAPI:
     # Создаем экземпляр приложения
@@ -22,7 +48,9 @@ def create_application() -> FastAPI:
         version="0.1.0",
         docs_url="/api/docs",
         redoc_url="/api/redoc",
-        openapi_url="/api/openapi.json"
+        openapi_url="/api/openapi.json",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
     )
 
     # Настройка CORS
@@ -3,7 +3,7 @@
 from .subscription import Subscription, SubscriptionStatus
 from .node import Node, Plan, NodeStatus
 from .system_event import SystemEvent, SystemEventLevel, SystemEventSource, SystemEventCategory
-from .traffic import TrafficLog, TrafficLimit
+from .traffic import TrafficLog, TrafficLimit, TrafficRollup, TrafficRollupCursor
 from .device import Device
 from .config_sync import ConfigSync, SyncStatus
 from .config_version import ConfigVersion
@@ -25,6 +25,8 @@
     'SystemEventCategory',
     'TrafficLog',
     'TrafficLimit',
+    'TrafficRollup',
+    'TrafficRollupCursor',
     'Device',
     'ConfigSync',
     'SyncStatus',
@@ -0,0 +1,32 @@
+"""
+Сброс значений functools.cached_property у ORM-объектов.
+
+Производные свойства (суммарный трафик, остаток лимита и т.п.) кешируются
+в __dict__ экземпляра. Кеш сбрасывается, когда меняется одна из исходных
+колонок или объект перечитывается/истекает в сессии.
+"""
+from typing import Iterable
+
+from sqlalchemy import event
+
+
+def invalidate_cached_properties(cls: type, names: Iterable[str], columns: Iterable[str]) -> None:
+    """
+    Регистрирует сброс кешированных свойств модели.
+    
+    Args:
+        cls: Класс модели
+        names: Имена свойств, объявленных через cached_property
+        columns: Атрибуты-колонки, от которых зависят эти свойства
+    """
+    names = tuple(names)
+
+    def clear(target, *args, **kwargs) -> None:
+        instance_dict = target.__dict__
+        for name in names:
+            instance_dict.pop(name, None)
+
+    for identifier in ("refresh", "refresh_flush", "expire"):
+        event.listen(cls, identifier, clear)
+    for column in columns:
+        event.listen(getattr(cls, column), "set", clear)
@@ -5,13 +5,21 @@
 from enum import Enum
 from typing import Any, Dict, Optional
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, Text, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Text, Boolean, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
 
 from ..database import Base
+from .serialization import FieldLayout, dict_or_empty, enum_value_or_none, isoformat_or_none
+from .types import JSONB, SmallIntEnum
 
 class SyncStatus(str, Enum):
-    """Статус синхронизации конфигурации на ноде."""
+    """
+    Статус синхронизации конфигурации на ноде.
+    
+    Хранится в БД как SMALLINT (порядковый номер), новые статусы
+    добавлять только в конец.
+    """
     PENDING = "pending"      # Ожидает синхронизации
     IN_PROGRESS = "in_progress"  # В процессе синхронизации
     COMPLETED = "completed"  # Синхронизация завершена успешно
@@ -22,44 +30,54 @@ class ConfigSync(Base):
     """Модель для отслеживания состояния синхронизации конфигурации на нодах."""
     __tablename__ = "config_syncs"
     
-    id = Column(Integer, primary_key=True, index=True)
-    status = Column(SQLEnum(SyncStatus), default=SyncStatus.PENDING, nullable=False, comment="Статус синхронизации")
-    last_sync = Column(DateTime, nullable=True, comment="Время последней успешной синхронизации")
-    last_attempt = Column(DateTime, nullable=True, comment="Время последней попытки синхронизации")
-    error_message = Column(Text, nullable=True, comment="Сообщение об ошибке (если есть)")
-    retry_count = Column(Integer, default=0, nullable=False, comment="Количество попыток синхронизации")
-    is_active = Column(Boolean, default=True, comment="Активна ли синхронизация")
-    metadata_ = Column("metadata", JSON, default={}, comment="Дополнительные метаданные")
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, comment="Дата создания")
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="Дата обновления")
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    status: Mapped[SyncStatus] = mapped_column(SmallIntEnum(SyncStatus), default=SyncStatus.PENDING, nullable=False, comment="Статус синхронизации")
+    last_sync: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, comment="Время последней успешной синхронизации")
+    last_attempt: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, comment="Время последней попытки синхронизации")
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True, comment="Сообщение об ошибке (если есть)")
+    retry_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False, comment="Количество попыток синхронизации")
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True, comment="Активна ли синхронизация")
+    metadata_: Mapped[Optional[Dict[str, Any]]] = mapped_column("metadata", JSONB, default={}, comment="Дополнительные метаданные")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, comment="Дата создания")
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="Дата обновления")
     
     # Связи
-    node_id = Column(Integer, ForeignKey("nodes.id"), nullable=False, comment="ID ноды")
-    config_version_id = Column(Integer, ForeignKey("config_versions.id"), nullable=False, comment="ID версии конфигурации")
+    node_id: Mapped[int] = mapped_column(Integer, ForeignKey("nodes.id"), nullable=False, comment="ID ноды")
+    config_version_id: Mapped[int] = mapped_column(Integer, ForeignKey("config_versions.id"), nullable=False, comment="ID версии конфигурации")
+    
+    # Отношения (lazy="raise": загружаются только явно через selectinload,
+    # чтобы списки не порождали N+1 запросов)
+    node: Mapped["Node"] = relationship("Node", back_populates="config_syncs", lazy="raise")
+    config_version: Mapped["ConfigVersion"] = relationship("ConfigVersion", back_populates="syncs", lazy="raise")
     
-    # Отношения
-    node = relationship("Node", back_populates="config_syncs")
-    config_version = relationship("ConfigVersion", back_populates="syncs")
+    __table_args__ = (
+        # Одна запись на пару (версия, нода): записи для всех нод развёртывания
+        # создаются одним INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+        # (пустое обновление, чтобы RETURNING вернул и существующие строки)
+        Index('ix_config_syncs_config_node', 'config_version_id', 'node_id', unique=True),
+    )
     
     def __repr__(self) -> str:
         return f"<ConfigSync node={self.node_id} version={self.config_version_id} status={self.status}>"
     
     def to_dict(self) -> Dict[str, Any]:
         """Преобразует объект в словарь."""
-        return {
-            "id": self.id,
-            "status": self.status.value if self.status else None,
-            "last_sync": self.last_sync.isoformat() if self.last_sync else None,
-            "last_attempt": self.last_attempt.isoformat() if self.last_attempt else None,
-            "error_message": self.error_message,
-            "retry_count": self.retry_count,
-            "is_active": self.is_active,
-            "metadata": self.metadata_ or {},
-            "node_id": self.node_id,
-            "config_version_id": self.config_version_id,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
+        return _TO_DICT_LAYOUT.dump(self)
+
+_TO_DICT_LAYOUT = FieldLayout([
+    ("id", "id", None),
+    ("status", "status", enum_value_or_none),
+    ("last_sync", "last_sync", isoformat_or_none),
+    ("last_attempt", "last_attempt", isoformat_or_none),
+    ("error_message", "error_message", None),
+    ("retry_count", "retry_count", None),
+    ("is_active", "is_active", None),
+    ("metadata", "metadata_", dict_or_empty),
+    ("node_id", "node_id", None),
+    ("config_version_id", "config_version_id", None),
+    ("created_at", "created_at", isoformat_or_none),
+    ("updated_at", "updated_at", isoformat_or_none),
+])
 
 # Добавляем обратные связи в модели Node и ConfigVersion
 # В models/node.py добавить:
@@ -1,48 +1,82 @@
 """
 Модель для хранения версий конфигурации Xray.
 """
+import hashlib
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Boolean, ForeignKey
+import orjson
+from sqlalchemy import Integer, String, DateTime, Text, Boolean, ForeignKey
 
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
 
 from ..database import Base
+from .serialization import FieldLayout, isoformat_or_none
+from .types import JSONB
 
 class ConfigVersion(Base):
     """Модель версии конфигурации Xray."""
     __tablename__ = "config_versions"
     
-    id = Column(Integer, primary_key=True, index=True)
-    version = Column(String(50), unique=True, index=True, nullable=False, comment="Версия конфигурации")
-    description = Column(Text, nullable=True, comment="Описание изменений")
-    config = Column(JSON, nullable=False, comment="Конфигурация в формате JSON")
-    checksum = Column(String(64), nullable=False, index=True, comment="Контрольная сумма конфигурации")
-    is_active = Column(Boolean, default=True, comment="Активна ли эта версия")
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, comment="Дата создания")
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="Дата обновления")
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    version: Mapped[str] = mapped_column(String(50), unique=True, index=True, nullable=False, comment="Версия конфигурации")
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True, comment="Описание изменений")
+    config: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False, comment="Конфигурация в формате JSON")
+    checksum: Mapped[str] = mapped_column(String(64), unique=True, index=True, nullable=False, comment="Контрольная сумма конфигурации")
+    section_hashes: Mapped[Dict[str, str]] = mapped_column(JSONB, nullable=False, default=dict, comment="Контрольные суммы разделов конфигурации верхнего уровня")
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True, comment="Активна ли эта версия")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, comment="Дата создания")
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="Дата обновления")
     
     # Связи
-    created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True, comment="ID пользователя, создавшего версию")
+    created_by_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"), nullable=True, comment="ID пользователя, создавшего версию")
     
     # Отношения
-    created_by = relationship("User", back_populates="created_configs")
-    syncs = relationship("ConfigSync", back_populates="config_version", cascade="all, delete-orphan")
+    created_by: Mapped[Optional["User"]] = relationship("User", back_populates="created_configs")
+    syncs: Mapped[List["ConfigSync"]] = relationship("ConfigSync", back_populates="config_version", cascade="all, delete-orphan")
+    
+    @staticmethod
+    def compute_checksum(config: Dict[str, Any]) -> str:
+        """
+        Вычисляет контрольную сумму конфигурации.
+        
+        Ключи сортируются, поэтому одинаковые конфигурации дают одинаковый
+        хеш независимо от порядка полей. Считается один раз при записи и
+        хранится в колонке checksum.
+        """
+        return hashlib.sha256(orjson.dumps(config, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    
+    @staticmethod
+    def compute_section_hashes(config: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Вычисляет контрольные суммы разделов конфигурации верхнего уровня.
+        
+        Используются при синхронизации: на ноду отправляются только разделы
+        (inbounds, routing, ...), хеш которых отличается от хеша на ноде.
+        Считаются так же, как compute_checksum, один раз при записи.
+        """
+        return {
+            key: hashlib.sha256(orjson.dumps(section, option=orjson.OPT_SORT_KEYS)).hexdigest()
+            for key, section in config.items()
+        }
     
     def __repr__(self) -> str:
         return f"<ConfigVersion {self.version} ({'active' if self.is_active else 'inactive'})>"
     
     def to_dict(self) -> Dict[str, Any]:
         """Преобразует объект в словарь."""
-        return {
-            "id": self.id,
-            "version": self.version,
-            "description": self.description,
-            "config": self.config,
-            "checksum": self.checksum,
-            "is_active": self.is_active,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "created_by_id": self.created_by_id
-        }
+        return _TO_DICT_LAYOUT.dump(self)
+
+
+_TO_DICT_LAYOUT = FieldLayout([
+    ("id", "id", None),
+    ("version", "version", None),
+    ("description", "description", None),
+    ("config", "config", None),
+    ("checksum", "checksum", None),
+    ("is_active", "is_active", None),
+    ("created_at", "created_at", isoformat_or_none),
+    ("updated_at", "updated_at", isoformat_or_none),
+    ("created_by_id", "created_by_id", None),
+])
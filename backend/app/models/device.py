@@ -1,13 +1,37 @@
 """
 Модель для хранения информации об устройствах пользователей.
 """
-from datetime import datetime
-from typing import Optional, TYPE_CHECKING
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, TYPE_CHECKING
 
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import ForeignKey, Integer, String, DateTime, Boolean
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
 
+try:
+    import blake3
+except ImportError:  # необязательная зависимость, см. HWID_DEVICE_ID_ALGORITHM
+    blake3 = None
+
+from ..core.clock import utcnow
+from ..core.config import settings
 from ..database import Base
+from .serialization import FieldLayout, dict_or_empty, isoformat_or_none, str_or_none
+from .types import INET, IPAddress, JSONB
+
+# Устройство считается в сети, если было активно не позднее этого времени назад
+ONLINE_TIMEOUT = timedelta(minutes=5)
+
+# Хеш отпечатка выбирается один раз при импорте, а не при каждом запросе.
+# Без пакета blake3 нельзя молча перейти на sha256: в смешанном развёртывании
+# одно устройство получило бы два идентификатора и заняло бы два места в лимите
+if settings.HWID_DEVICE_ID_ALGORITHM == "blake3":
+    if blake3 is None:
+        raise RuntimeError("HWID_DEVICE_ID_ALGORITHM=blake3 требует установленного пакета blake3")
+    _device_id_hash = blake3.blake3
+else:
+    _device_id_hash = hashlib.sha256
 
 if TYPE_CHECKING:
     from .user import User  # noqa: F401
@@ -17,55 +41,89 @@ class Device(Base):
     """Модель устройства пользователя."""
     __tablename__ = "devices"
     
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(100), nullable=False, comment="Название устройства, задаваемое пользователем")
-    device_id = Column(String(255), unique=True, index=True, nullable=False, comment="Уникальный идентификатор устройства")
-    device_model = Column(String(100), comment="Модель устройства")
-    os_name = Column(String(50), comment="Название ОС")
-    os_version = Column(String(50), comment="Версия ОС")
-    app_version = Column(String(50), comment="Версия приложения")
-    ip_address = Column(String(45), comment="IP-адрес устройства")
-    last_active = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="Время последней активности")
-    is_active = Column(Boolean, default=True, comment="Активно ли устройство")
-    is_trusted = Column(Boolean, default=False, comment="Доверенное ли устройство")
-    metadata_ = Column("metadata", JSON, default={}, comment="Дополнительные метаданные устройства")
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, comment="Дата создания")
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False, comment="Название устройства, задаваемое пользователем")
+    device_id: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False, comment="Уникальный идентификатор устройства")
+    device_model: Mapped[Optional[str]] = mapped_column(String(100), comment="Модель устройства")
+    os_name: Mapped[Optional[str]] = mapped_column(String(50), comment="Название ОС")
+    os_version: Mapped[Optional[str]] = mapped_column(String(50), comment="Версия ОС")
+    app_version: Mapped[Optional[str]] = mapped_column(String(50), comment="Версия приложения")
+    ip_address: Mapped[Optional[IPAddress]] = mapped_column(INET, comment="IP-адрес устройства")
+    last_active: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="Время последней активности")
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True, comment="Активно ли устройство")
+    is_trusted: Mapped[Optional[bool]] = mapped_column(Boolean, default=False, comment="Доверенное ли устройство")
+    metadata_: Mapped[Optional[Dict[str, Any]]] = mapped_column("metadata", JSONB, default={}, comment="Дополнительные метаданные устройства")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, comment="Дата создания")
     
     # Связи
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, comment="ID пользователя-владельца")
-    vpn_user_id = Column(Integer, ForeignKey("vpn_users.id"), nullable=True, comment="ID VPN-пользователя")
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False, comment="ID пользователя-владельца")
+    vpn_user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("vpn_users.id"), nullable=True, comment="ID VPN-пользователя")
     
     # Отношения
-    user = relationship("User", back_populates="devices")
-    vpn_user = relationship("VPNUser", back_populates="devices")
+    user: Mapped["User"] = relationship("User", back_populates="devices", lazy="raise")
+    vpn_user: Mapped[Optional["VPNUser"]] = relationship("VPNUser", back_populates="devices", lazy="raise")
     
     def __repr__(self) -> str:
         return f"<Device {self.name} ({self.device_model or 'Unknown'})>"
     
+    @staticmethod
+    def compute_device_id(ip: str, user_agent: str, accept_language: str) -> str:
+        """
+        Вычисляет идентификатор устройства по отпечатку запроса.
+        
+        Отпечаток не защищает от подделки (все части задаёт клиент), поэтому
+        криптостойкость не важна: BLAKE3 используется, если он выбран
+        в настройках и установлен, иначе SHA-256. Оба дают 64 hex-символа.
+        """
+        # Одна короткая строка кодируется и хешируется за один вызов: это
+        # быстрее, чем подавать части по отдельности через update()
+        return _device_id_hash(f"{ip}:{user_agent}:{accept_language}".encode()).hexdigest()
+    
     @property
     def is_online(self) -> bool:
         """Проверяет, активно ли устройство (было в сети не позднее 5 минут назад)."""
-        if not self.last_active:
-            return False
-        return (datetime.utcnow() - self.last_active).total_seconds() < 300  # 5 минут
+        return self.is_online_at(utcnow())
     
-    def to_dict(self) -> dict:
+    def is_online_at(self, now: datetime) -> bool:
+        """
+        Проверяет, было ли устройство в сети не позднее 5 минут до `now`.
+        
+        Позволяет вычислить `now` один раз на весь список устройств.
+        """
+        return self.was_active_since(now - ONLINE_TIMEOUT)
+    
+    def was_active_since(self, cutoff: datetime) -> bool:
+        """
+        Было ли устройство активно после `cutoff`.
+        
+        Для списков: граница считается один раз, а на каждое устройство
+        остаётся одно сравнение дат без создания timedelta.
+        """
+        return self.last_active is not None and self.last_active > cutoff
+    
+    def to_dict(self, *, now: Optional[datetime] = None) -> dict:
         """Преобразует объект в словарь."""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "device_id": self.device_id,
-            "device_model": self.device_model,
-            "os_name": self.os_name,
-            "os_version": self.os_version,
-            "app_version": self.app_version,
-            "ip_address": self.ip_address,
-            "last_active": self.last_active.isoformat() if self.last_active else None,
-            "is_active": self.is_active,
-            "is_trusted": self.is_trusted,
-            "is_online": self.is_online,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "user_id": self.user_id,
-            "vpn_user_id": self.vpn_user_id,
-            "metadata": self.metadata_ or {}
-        }
+        if now is None:
+            now = utcnow()
+        data = _TO_DICT_LAYOUT.dump(self)
+        data["is_online"] = self.is_online_at(now)
+        return data
+
+
+_TO_DICT_LAYOUT = FieldLayout([
+    ("id", "id", None),
+    ("name", "name", None),
+    ("device_id", "device_id", None),
+    ("device_model", "device_model", None),
+    ("os_name", "os_name", None),
+    ("os_version", "os_version", None),
+    ("app_version", "app_version", None),
+    ("ip_address", "ip_address", str_or_none),
+    ("last_active", "last_active", isoformat_or_none),
+    ("is_active", "is_active", None),
+    ("is_trusted", "is_trusted", None),
+    ("created_at", "created_at", isoformat_or_none),
+    ("user_id", "user_id", None),
+    ("vpn_user_id", "vpn_user_id", None),
+    ("metadata", "metadata_", dict_or_empty),
+])
@@ -1,55 +1,104 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Numeric
-from sqlalchemy.orm import relationship
+from decimal import Decimal
+from functools import cached_property
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, String, Boolean, DateTime, Text, Numeric
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
 from app.database import Base
+from app.models.cache import invalidate_cached_properties
+from app.models.types import INET, IPAddress
 
 class Node(Base):
     """Модель ноды VPN"""
     __tablename__ = "nodes"
     
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(100), nullable=False)
-    fqdn = Column(String(255), nullable=False)
-    ip_address = Column(String(45), nullable=False)
-    api_address = Column(String(255), default="localhost")
-    api_port = Column(Integer, default=8080)
-    api_tag = Column(String(50), default="api")
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    fqdn: Mapped[str] = mapped_column(String(255), nullable=False)
+    ip_address: Mapped[IPAddress] = mapped_column(INET, nullable=False)
+    api_address: Mapped[Optional[str]] = mapped_column(String(255), default="localhost")
+    api_port: Mapped[Optional[int]] = mapped_column(Integer, default=8080)
+    api_tag: Mapped[Optional[str]] = mapped_column(String(50), default="api")
+    auth_token: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # Токен для запросов к API агента ноды
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
     # Связи
-    traffic_logs = relationship("TrafficLog", back_populates="node")
-    config_syncs = relationship("ConfigSync", back_populates="node")
+    traffic_logs: Mapped[List["TrafficLog"]] = relationship("TrafficLog", back_populates="node")
+    config_syncs: Mapped[List["ConfigSync"]] = relationship("ConfigSync", back_populates="node")
+    
+    # URL и заголовки для запросов к агенту ноды строятся один раз на объект,
+    # а не при каждой синхронизации
+    @cached_property
+    def api_url(self) -> str:
+        """Базовый URL API агента ноды."""
+        return f"http://{self.api_address}:{self.api_port}"
+    
+    @cached_property
+    def sync_url(self) -> str:
+        """URL отправки конфигурации на ноду."""
+        return f"{self.api_url}/api/v1/config/sync"
+    
+    @cached_property
+    def auth_headers(self) -> Dict[str, str]:
+        """Заголовки запросов к API агента ноды (не изменять)."""
+        return {
+            "Authorization": f"Bearer {self.auth_token}",
+            "Content-Type": "application/json"
+        }
+
+invalidate_cached_properties(
+    Node,
+    names=("api_url", "sync_url"),
+    columns=("api_address", "api_port")
+)
+invalidate_cached_properties(
+    Node,
+    names=("auth_headers",),
+    columns=("auth_token",)
+)
 
 class Plan(Base):
     """Модель плана подписки"""
     __tablename__ = "plans"
     
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(100), nullable=False)
-    description = Column(Text)
-    price = Column(Numeric(10, 2), nullable=False)
-    duration_days = Column(Integer, nullable=False)
-    traffic_limit = Column(Integer)  # в ГБ
-    device_limit = Column(Integer, default=5)
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    duration_days: Mapped[int] = mapped_column(Integer, nullable=False)
+    traffic_limit: Mapped[Optional[int]] = mapped_column(Integer)  # в ГБ
+    device_limit: Mapped[Optional[int]] = mapped_column(Integer, default=5)
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
     # Связи
-    subscriptions = relationship("Subscription", back_populates="plan")
+    subscriptions: Mapped[List["Subscription"]] = relationship("Subscription", back_populates="plan")
+
+    @property
+    def price_cents(self) -> Optional[int]:
+        """Цена в минимальных единицах валюты (центах) — представление для API."""
+        if self.price is None:
+            return None
+        return round(self.price * 100)
+
+    @price_cents.setter
+    def price_cents(self, value: int) -> None:
+        self.price = Decimal(value) / 100
 
 class NodeStatus(Base):
     """Модель статуса ноды"""
     __tablename__ = "node_status"
     
-    id = Column(Integer, primary_key=True, index=True)
-    node_id = Column(Integer, nullable=False)
-    status = Column(String(50), default="unknown")
-    last_check = Column(DateTime(timezone=True), server_default=func.now())
-    response_time = Column(Integer)  # в мс
-    error_message = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    node_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[Optional[str]] = mapped_column(String(50), default="unknown")
+    last_check: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    response_time: Mapped[Optional[int]] = mapped_column(Integer)  # в мс
+    error_message: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+Сериализация моделей в словари по заранее собранной схеме полей.
+
+Схема строится один раз при импорте модуля модели: все атрибуты читаются
+одним вызовом operator.attrgetter (реализован на C), а преобразования
+(isoformat, str и т.п.) применяются в одном цикле без ветвлений на
+каждое поле.
+"""
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+Converter = Optional[Callable[[Any], Any]]
+
+
+def isoformat_or_none(value: Any) -> Optional[str]:
+    """datetime -> ISO 8601 строка."""
+    return value.isoformat() if value else None
+
+
+def str_or_none(value: Any) -> Optional[str]:
+    """UUID, IP-адрес и т.п. -> строка."""
+    return str(value) if value else None
+
+
+def enum_value_or_none(value: Any) -> Any:
+    """Enum -> его значение."""
+    return value.value if value else None
+
+
+def dict_or_empty(value: Any) -> Dict[str, Any]:
+    """JSON-колонка, для которой NULL отдаётся как пустой словарь."""
+    return value or {}
+
+
+class FieldLayout:
+    """Набор полей модели для to_dict: (ключ, атрибут, преобразование)."""
+
+    __slots__ = ("_getter", "_fields")
+
+    def __init__(self, fields: Sequence[Tuple[str, str, Converter]]):
+        if len(fields) < 2:
+            # attrgetter с одним атрибутом возвращает значение, а не кортеж
+            raise ValueError("FieldLayout требует минимум два поля")
+        self._getter = attrgetter(*(attribute for _, attribute, _ in fields))
+        self._fields = tuple((key, converter) for key, _, converter in fields)
+
+    def dump(self, obj: Any) -> Dict[str, Any]:
+        """Собирает словарь из атрибутов объекта."""
+        return {
+            key: converter(value) if converter is not None else value
+            for (key, converter), value in zip(self._fields, self._getter(obj))
+        }
@@ -1,13 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, JSON, Boolean, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from uuid import UUID as PyUUID
+from sqlalchemy import Integer, String, DateTime, ForeignKey, BigInteger, Boolean, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 import uuid
 import enum
 
 from ..database import Base
-from .types import UUID
+from .types import UUID, JSONB
 
 
 class SubscriptionStatus(enum.Enum):
@@ -21,34 +22,34 @@ class Subscription(Base):
     """Модель подписки пользователя на тарифный план."""
     __tablename__ = "subscriptions"
 
-    id = Column(Integer, primary_key=True, index=True)
-    uuid = Column(UUID(), default=uuid.uuid4, unique=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    uuid: Mapped[Optional[PyUUID]] = mapped_column(UUID(), default=uuid.uuid4, unique=True, index=True)
     
     # Связи
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    plan_id: Mapped[int] = mapped_column(Integer, ForeignKey("plans.id"), nullable=False)
     
     # Статус подписки
-    is_active = Column(Boolean, default=True)
-    auto_renew = Column(Boolean, default=True)
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    auto_renew: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
     
     # Период подписки
-    start_date = Column(DateTime(timezone=True), server_default=func.now())
-    end_date = Column(DateTime(timezone=True), nullable=True)
+    start_date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    end_date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     
     # Использованные ресурсы
-    data_used = Column(BigInteger, default=0)  # В байтах
+    data_used: Mapped[Optional[int]] = mapped_column(BigInteger, default=0)  # В байтах
     
     # Дополнительные настройки
-    settings = Column(JSON, default=dict)  # Дополнительные настройки подписки
+    settings: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, default=dict)  # Дополнительные настройки подписки
     
     # Временные метки
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
     
     # Связи
-    user = relationship("User", back_populates="subscriptions")
-    plan = relationship("Plan", back_populates="subscriptions")
+    user: Mapped["User"] = relationship("User", back_populates="subscriptions", lazy="raise")
+    plan: Mapped["Plan"] = relationship("Plan", back_populates="subscriptions", lazy="raise")
     
     def __repr__(self):
         return f"<Subscription {self.id} - User {self.user_id}>"
@@ -56,16 +57,24 @@ def __repr__(self):
     @property
     def is_expired(self) -> bool:
         """Истекла ли подписка."""
-        if self.end_date is None:
-            return False
-        return datetime.utcnow() > self.end_date
+        return self.is_expired_at(datetime.utcnow())
     
     @property
     def days_remaining(self) -> Optional[int]:
         """Количество оставшихся дней подписки."""
+        return self.days_remaining_at(datetime.utcnow())
+    
+    def is_expired_at(self, now: datetime) -> bool:
+        """Истекла ли подписка на момент `now`."""
+        if self.end_date is None:
+            return False
+        return now > self.end_date
+    
+    def days_remaining_at(self, now: datetime) -> Optional[int]:
+        """Количество оставшихся дней подписки на момент `now`."""
         if self.end_date is None:
             return None
-        remaining = (self.end_date - datetime.utcnow()).days
+        remaining = (self.end_date - now).days
         return max(0, remaining) if remaining is not None else None
     
     def extend(self, days: int) -> None:
@@ -3,43 +3,83 @@
 """
 from datetime import datetime
 from typing import Optional, Dict, Any
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Index
+from uuid import UUID as PyUUID
+from sqlalchemy import Integer, String, DateTime, Text, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 import uuid
 
 from ..database import Base
-from .types import UUID
+from .serialization import FieldLayout, isoformat_or_none, str_or_none
+from .types import UUID, INET, IPAddress, JSONB
 
 
 class SystemEvent(Base):
-    """Модель системных событий для логирования и мониторинга."""
+    """
+    Модель системных событий для логирования и мониторинга.
+    
+    В PostgreSQL таблица партиционирована по месяцам (RANGE по timestamp),
+    см. миграцию partition_system_events и CRUDSystemEvent.ensure_partitions.
+    """
     __tablename__ = "system_events"
 
-    id = Column(Integer, primary_key=True, index=True)
-    uuid = Column(UUID(), default=uuid.uuid4, unique=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # Отдаётся наружу через API, но поиск по нему не выполняется — индекс не нужен
+    uuid: Mapped[Optional[PyUUID]] = mapped_column(UUID(), default=uuid.uuid4)
     
     # Основная информация о событии
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
-    level = Column(String(20), nullable=False, index=True)  # debug, info, warning, error, critical
-    message = Column(Text, nullable=False)
-    source = Column(String(100), nullable=False, index=True)  # system, xray, node, user, api, auth
+    timestamp: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    level: Mapped[str] = mapped_column(String(20), nullable=False, index=True)  # debug, info, warning, error, critical
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    source: Mapped[str] = mapped_column(String(100), nullable=False, index=True)  # system, xray, node, user, api, auth
     
     # Дополнительная информация
-    category = Column(String(50), nullable=True, index=True)  # auth, vpn, config, monitoring, etc.
-    user_id = Column(Integer, nullable=True, index=True)  # ID пользователя, если событие связано с пользователем
-    node_id = Column(Integer, nullable=True, index=True)  # ID ноды, если событие связано с нодой
-    ip_address = Column(String(45), nullable=True)  # IP-адрес, если применимо
+    category: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, index=True)  # auth, vpn, config, monitoring, etc.
+    user_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)  # ID пользователя, если событие связано с пользователем
+    node_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)  # ID ноды, если событие связано с нодой
+    ip_address: Mapped[Optional[IPAddress]] = mapped_column(INET, nullable=True)  # IP-адрес, если применимо
     
-    # Детали события в JSON формате
-    details = Column(JSON, nullable=True)
+    # Детали события в JSON формате (JSONB в PostgreSQL)
+    details: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
     
     # Метаданные
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Индексы для оптимизации запросов
     __table_args__ = (
+        # Сортировка по timestamp (ORDER BY ... LIMIT) идёт по этому BTREE
         Index('ix_system_events_timestamp_level', 'timestamp', 'level'),
-        Index('ix_system_events_source_category', 'source', 'category'),
+        # Диапазонные выборки по времени: события пишутся по возрастанию
+        # timestamp, поэтому BRIN в сотни раз меньше BTREE (только PostgreSQL)
+        Index(
+            'ix_system_events_timestamp_brin',
+            'timestamp',
+            postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32},
+        ).ddl_if(dialect='postgresql'),
+        # Покрывающий индекс для ленты событий: фильтр по source+category,
+        # сортировка по timestamp DESC без отдельного шага сортировки и
+        # без обращения к таблице (index-only scan в PostgreSQL)
+        Index(
+            'ix_system_events_source_category_timestamp',
+            'source',
+            'category',
+            text('timestamp DESC'),
+            postgresql_include=['level', 'message', 'user_id', 'node_id'],
+        ),
+        # Частичный индекс для алертов: только error/critical события
+        Index(
+            'ix_system_events_alerts',
+            text('timestamp DESC'),
+            postgresql_where=text("level IN ('error', 'critical')"),
+        ),
+        # Поиск событий по подсети (ip_address <<= '10.0.0.0/8'), только PostgreSQL
+        Index(
+            'ix_system_events_ip_address_gist',
+            'ip_address',
+            postgresql_using='gist',
+            postgresql_ops={'ip_address': 'inet_ops'},
+        ).ddl_if(dialect='postgresql'),
         Index('ix_system_events_user_timestamp', 'user_id', 'timestamp'),
         Index('ix_system_events_node_timestamp', 'node_id', 'timestamp'),
     )
@@ -88,20 +128,23 @@ def create_event(
     
     def to_dict(self) -> Dict[str, Any]:
         """Преобразовать событие в словарь для API ответов."""
-        return {
-            "id": self.id,
-            "uuid": str(self.uuid),
-            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
-            "level": self.level,
-            "message": self.message,
-            "source": self.source,
-            "category": self.category,
-            "user_id": self.user_id,
-            "node_id": self.node_id,
-            "ip_address": self.ip_address,
-            "details": self.details,
-            "created_at": self.created_at.isoformat() if self.created_at else None
-        }
+        return _TO_DICT_LAYOUT.dump(self)
+
+
+_TO_DICT_LAYOUT = FieldLayout([
+    ("id", "id", None),
+    ("uuid", "uuid", str),
+    ("timestamp", "timestamp", isoformat_or_none),
+    ("level", "level", None),
+    ("message", "message", None),
+    ("source", "source", None),
+    ("category", "category", None),
+    ("user_id", "user_id", None),
+    ("node_id", "node_id", None),
+    ("ip_address", "ip_address", str_or_none),
+    ("details", "details", None),
+    ("created_at", "created_at", isoformat_or_none),
+])
 
 
 class SystemEventLevel:
@@ -1,244 +1,66 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
 from typing import Optional, Dict, Any, List
-import axios, { AxiosResponse } from 'axios';
-
-// Создаем экземпляр axios с базовой конфигурацией
-const api = axios.create({
-  baseURL: process.env.REACT_APP_API_URL || 'http://localhost:8000/api',
-  timeout: 10000,
-  headers: {
-    'Content-Type': 'application/json',
-  },
-});
-
-// Интерцептор для добавления токена авторизации
-api.interceptors.request.use(
-  (config) => {
-    const token = localStorage.getItem('vpn_panel_auth_token');
-    if (token && config.headers) {
-      config.headers.Authorization = `Bearer ${token}`;
-    }
-    return config;
-  },
-  (error) => {
-    return Promise.reject(error);
-  }
-);
-
-// Интерцептор для обработки ответов и ошибок
-api.interceptors.response.use(
-  (response: AxiosResponse) => {
-    return response;
-  },
-  async (error) => {
-    const originalRequest = error.config;
-
-    // Если получили 401 и это не повторный запрос
-    if (error.response?.status === 401 && !originalRequest._retry) {
-      originalRequest._retry = true;
-      
-      // Пытаемся обновить токен
-      const refreshToken = localStorage.getItem('vpn_panel_refresh_token');
-      if (refreshToken) {
-        try {
-          const response = await axios.post('/auth/refresh', {
-            refresh_token: refreshToken
-          });
-          
-          const newToken = response.data.access_token;
-          localStorage.setItem('vpn_panel_auth_token', newToken);
-          
-          // Повторяем оригинальный запрос с новым токеном
-          originalRequest.headers.Authorization = `Bearer ${newToken}`;
-          return api(originalRequest);
-        } catch (refreshError) {
-          // Если обновление токена не удалось, очищаем хранилище и редиректим
-          localStorage.removeItem('vpn_panel_auth_token');
-          localStorage.removeItem('vpn_panel_refresh_token');
-          window.location.href = '/login';
-          return Promise.reject(refreshError);
-        }
-      } else {
-        // Нет refresh токена, редиректим на логин
-        localStorage.removeItem('vpn_panel_auth_token');
-        window.location.href = '/login';
-      }
-    }
-
-    return Promise.reject(error);
-  }
-);
-
-// Типы для API ответов
-export interface ApiResponse<T = any> {
-  data: T;
-  message?: string;
-  status: string;
-}
-
-export interface PaginatedResponse<T> {
-  items: T[];
-  total: number;
-  page: number;
-  size: number;
-  pages: number;
-}
-
-// Утилитарные функции для работы с API
-export const apiUtils = {
-  // Обработка ошибок
-  handleError: (error: any): string => {
-    if (error.response?.data?.detail) {
-      return Array.isArray(error.response.data.detail) 
-        ? error.response.data.detail.map((e: any) => e.msg).join(', ')
-        : error.response.data.detail;
-    }
-    if (error.response?.data?.message) {
-      return error.response.data.message;
-    }
-    if (error.message) {
-      return error.message;
-    }
-    return 'Произошла неизвестная ошибка';
-  },
-
-  // Построение URL с параметрами
-  buildUrl: (endpoint: string, params?: Record<string, any>): string => {
-    if (!params) return endpoint;
-    
-    const searchParams = new URLSearchParams();
-    Object.entries(params).forEach(([key, value]) => {
-      if (value !== undefined && value !== null) {
-        searchParams.append(key, String(value));
-      }
-    });
-    
-    const queryString = searchParams.toString();
-    return queryString ? `${endpoint}?${queryString}` : endpoint;
-  },
-
-  // Форматирование данных для FormData
-  toFormData: (data: Record<string, any>): FormData => {
-    const formData = new FormData();
-    Object.entries(data).forEach(([key, value]) => {
-      if (value !== undefined && value !== null) {
-        if (value instanceof File) {
-          formData.append(key, value);
-        } else if (typeof value === 'object') {
-          formData.append(key, JSON.stringify(value));
-        } else {
-          formData.append(key, String(value));
-        }
-      }
-    });
-    return formData;
-  }
-};
-
-export default api;from typing import Optional, Dict, Any, List
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, Float, Boolean, JSON
+from sqlalchemy import Column, Computed, Integer, String, DateTime, ForeignKey, BigInteger, Float, Boolean, Index, PrimaryKeyConstraint, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func, and_
 
 import uuid
 import ipaddress
+import orjson
 
 from ..database import Base
-from .types import UUID, INET
+from .cache import invalidate_cached_properties
+from .types import UUID, INET, JSONB
 
-class TrafficLog(Base):
-    """Модель для логирования трафика пользователей."""
-    __tablename__ = "traffic_logs"
+# Колонки, заполняемые при пакетной записи; id и created_at
+# заполняются значениями по умолчанию на стороне БД
+BULK_COLUMNS = [
+    "uuid",
+    "user_id",
+    "node_id",
+    "remote_ip",
+    "user_agent",
+    "device_id",
+    "upload",
+    "download",
+    "started_at",
+    "ended_at",
+    "protocol",
+    "metadata",
+]
 
-    id = Column(Integer, primary_key=True, index=True)
-    uuid = Column(UUID(), default=uuid.uuid4, unique=True, index=True)
-    
-import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
-import { useQueryClient } from '@tanstack/react-query';
-import { useNavigate } from 'react-router-dom';
-import api, { apiUtils } from '../services/api';
-import { AUTH_TOKEN_KEY, REFRESH_TOKEN_KEY } from '../config';
+# Меньшие пачки выгоднее писать обычным INSERT: COPY не окупает накладные расходы
+COPY_THRESHOLD = 100
 
-interface User {
-  id: number;
-  email: string;
-  username?: string;
-  full_name?: string;
-  is_superuser: boolean;
-export const AuthProvider: React.FC<{ children: ReactNode }> = ({ children }) => {
-export const AuthProvider: React.FC<{ children: ReactNode }> = ({ children }) => {
-  const [user, setUser] = useState<User | null>(null);
-  const [isLoading, setIsLoading] = useState(true);
-  const [error, setError] = useState<string | null>(null);
-  const queryClient = useQueryClient();
-  const navigate = useNavigate();  const [isLoading, setIsLoading] = useState(true);
-  const [error, setError] = useState<string | null>(null);
-  // Check if user is already logged in on initial load
-  useEffect(() => {
-    const checkAuth = async () => {
-      const token = localStorage.getItem(AUTH_TOKEN_KEY);
-      if (token) {
-        try {
-          const response = await api.get<User>('/auth/me');
-          setUser(response.data);
-          setError(null);
-        } catch (error) {
-          console.error('Failed to get current user:', error);
-          // Clear invalid token
-          localStorage.removeItem(AUTH_TOKEN_KEY);
-          localStorage.removeItem(REFRESH_TOKEN_KEY);
-          setError(apiUtils.handleError(error));
-        }
-  const login = async (email: string, password: string) => {
-    setIsLoading(true);
-    setError(null);
-    
-    try {
-      // Отправляем данные как form data для OAuth2PasswordRequestForm
-      const formData = new FormData();
-      formData.append('username', email); // FastAPI OAuth2 ожидает username
-      formData.append('password', password);
+# Единицы для TrafficLog.format_bytes и соответствующие делители (1024 ** i)
+BYTE_UNITS = ('Б', 'КБ', 'МБ', 'ГБ', 'ТБ', 'ПБ')
+BYTE_DIVISORS = tuple(1 << (10 * i) for i in range(len(BYTE_UNITS)))
 
-      const response = await api.post('/auth/login', formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-        },
-      });
+# Периоды агрегатов TrafficRollup, от мелкого к крупному
+ROLLUP_PERIODS = ('hour', 'day', 'month')
 
-      const { access_token, refresh_token } = response.data;
 
-      // Store tokens
-      localStorage.setItem(AUTH_TOKEN_KEY, access_token);
-      if (refresh_token) {
-        localStorage.setItem(REFRESH_TOKEN_KEY, refresh_token);
-      }
-
-      // Get user data
-      const userResponse = await api.get<User>('/auth/me');
-      setUser(userResponse.data);
-      
-      setIsLoading(false);
-      navigate('/dashboard');
-    } catch (error) {
-      setIsLoading(false);
-      const errorMessage = apiUtils.handleError(error);
-      setError(errorMessage);
-      throw new Error(errorMessage);
-    }
-  };      setIsLoading(false);
-    };
+class TrafficLog(Base):
+    """
+    Модель для логирования трафика пользователей.
+    
+    В PostgreSQL таблица партиционирована по месяцам (RANGE по started_at),
+    а каждый месяц — по hash(user_id), см. миграцию partition_traffic_logs
+    и TrafficLog.ensure_partitions. Чтобы срабатывало отсечение партиций,
+    запросы к логам должны ограничивать started_at.
+    """
+    __tablename__ = "traffic_logs"
 
-    checkAuth();
-  }, []);  const [error, setError] = useState<string | null>(null);
-  const queryClient = useQueryClient();
-  const navigate = useNavigate();  is_superuser: boolean;
-  is_active: boolean;
-  is_verified: boolean;
-  created_at: string;
-  last_login?: string;
-}    
+    id = Column(Integer, primary_key=True, index=True)
+    # Уникальность в партиционированной таблице возможна только вместе
+    # с started_at, поэтому индекс по uuid не уникальный
+    uuid = Column(UUID(), default=uuid.uuid4, index=True)
+    
     # Связи
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     node_id = Column(Integer, ForeignKey("nodes.id"), nullable=True, index=True)
     
     # Информация о подключении
@@ -249,29 +71,176 @@ class TrafficLog(Base):
     # Статистика трафика
     upload = Column(BigInteger, default=0)    # Исходящий трафик в байтах
     download = Column(BigInteger, default=0)  # Входящий трафик в байтах
+    # Хранимая сумма для агрегатов и сортировки в SQL (доступ через total_traffic)
+    _total_traffic = Column(
+        "total_traffic",
+        BigInteger,
+        Computed("upload + download", persisted=True),
+        index=True
+    )
     
     # Временные метки
-    started_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
-    ended_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    ended_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Дополнительная информация
     protocol = Column(String(50), nullable=True)  # Протокол (vmess, vless и т.д.)
-    metadata_ = Column("metadata", JSON, default=dict)  # Дополнительные метаданные
+    metadata_ = Column("metadata", JSONB, default=dict)  # Дополнительные метаданные (JSONB в PostgreSQL)
     
     # Связи
     user = relationship("User", back_populates="traffic_logs")
     node = relationship("Node", back_populates="traffic_logs")
     
+    __table_args__ = (
+        # Покрывающий индекс для выборок трафика пользователя за период:
+        # upload/download читаются из индекса без обращения к таблице
+        Index(
+            'ix_traffic_logs_user_started_at',
+            'user_id',
+            'started_at',
+            postgresql_include=['upload', 'download'],
+        ),
+        # Логи пишутся по возрастанию времени, поэтому для диапазонных
+        # условий в PostgreSQL хватает BRIN — он в сотни раз меньше BTREE
+        Index(
+            'ix_traffic_logs_started_at_brin',
+            'started_at',
+            postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32},
+        ).ddl_if(dialect='postgresql'),
+        Index(
+            'ix_traffic_logs_ended_at_brin',
+            'ended_at',
+            postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32},
+        ).ddl_if(dialect='postgresql'),
+        # Поиск по содержимому метаданных (@>): jsonb_path_ops меньше
+        # и быстрее класса операторов GIN по умолчанию
+        Index(
+            'ix_traffic_logs_metadata_gin',
+            'metadata',
+            postgresql_using='gin',
+            postgresql_ops={'metadata': 'jsonb_path_ops'},
+        ).ddl_if(dialect='postgresql'),
+        # В остальных СУБД BRIN нет — оставляем обычные индексы
+        Index('ix_traffic_logs_started_at', 'started_at').ddl_if(dialect='sqlite'),
+        Index('ix_traffic_logs_ended_at', 'ended_at').ddl_if(dialect='sqlite'),
+    )
+    
+    # Серверные значения (started_at, created_at, total_traffic) сразу
+    # после записи лога не нужны — не запрашиваем их через RETURNING
+    __mapper_args__ = {"eager_defaults": False}
+    
     def __repr__(self):
         return f"<TrafficLog User:{self.user_id} Node:{self.node_id} {self.upload}↑ {self.download}↓>"
     
-    @property
+    @classmethod
+    async def bulk_copy(cls, session: AsyncSession, rows: List[Dict[str, Any]]) -> int:
+        """
+        Пакетно записать логи трафика в обход unit of work.
+        
+        В PostgreSQL (asyncpg) от COPY_THRESHOLD строк используется COPY,
+        иначе — один INSERT в режиме executemany. Транзакцию фиксирует
+        вызывающий код.
+        
+        Args:
+            session: Сессия базы данных
+            rows: Словари с полями лога; ключ metadata — дополнительные метаданные
+        
+        Returns:
+            Количество записанных строк
+        """
+        if not rows:
+            return 0
+        
+        now = datetime.now(timezone.utc)
+        values = [
+            {
+                "uuid": row.get("uuid") or uuid.uuid4(),
+                "user_id": row["user_id"],
+                "node_id": row.get("node_id"),
+                "remote_ip": row.get("remote_ip"),
+                "user_agent": row.get("user_agent"),
+                "device_id": row.get("device_id"),
+                "upload": row.get("upload") or 0,
+                "download": row.get("download") or 0,
+                "started_at": row.get("started_at") or now,
+                "ended_at": row.get("ended_at"),
+                "protocol": row.get("protocol"),
+                "metadata": row.get("metadata") or {},
+            }
+            for row in rows
+        ]
+        
+        connection = await session.connection()
+        if connection.dialect.driver == "asyncpg" and len(values) >= COPY_THRESHOLD:
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                cls.__tablename__,
+                records=[
+                    tuple(
+                        orjson.dumps(value[column]).decode() if column == "metadata" else value[column]
+                        for column in BULK_COLUMNS
+                    )
+                    for value in values
+                ],
+                columns=BULK_COLUMNS
+            )
+        else:
+            await cls.bulk_insert(session, values)
+        
+        return len(values)
+    
+    @staticmethod
+    async def bulk_insert(session: AsyncSession, values: List[Dict[str, Any]]) -> None:
+        """
+        Записать строки одним INSERT в режиме executemany.
+        
+        Оператор собран заранее (BULK_INSERT), диалект разбивает пачку
+        на многострочные INSERT ... VALUES. Ключи словарей — имена колонок
+        таблицы (metadata, а не атрибут metadata_).
+        """
+        if values:
+            await session.execute(BULK_INSERT, values)
+    
+    @staticmethod
+    async def ensure_partitions(session: AsyncSession, *, months_ahead: int = 1) -> None:
+        """
+        Создать месячные партиции traffic_logs (только PostgreSQL).
+        
+        Вызывается периодически из TrafficRollupAggregator, чтобы партиция
+        следующего месяца существовала до начала записи в неё; логи без
+        партиции попадают в traffic_logs_default. Транзакцию фиксирует
+        вызывающий код.
+        
+        Args:
+            session: Сессия базы данных
+            months_ahead: На сколько месяцев вперед создавать партиции
+        """
+        if session.get_bind().dialect.name != "postgresql":
+            return
+        
+        for offset in range(months_ahead + 1):
+            await session.execute(
+                text(
+                    "SELECT create_traffic_logs_partition("
+                    "(date_trunc('month', now()) + make_interval(months => :offset))::date)"
+                ),
+                {"offset": offset}
+            )
+    
+    @hybrid_property
     def total_traffic(self) -> int:
         """Общий объем трафика в байтах."""
         return self.upload + self.download
     
-    @property
+    @total_traffic.inplace.expression
+    @classmethod
+    def _total_traffic_expression(cls):
+        return cls._total_traffic
+    
+    @cached_property
     def formatted_total_traffic(self) -> str:
         """Отформатированный общий объем трафика."""
         return self.format_bytes(self.total_traffic)
@@ -294,11 +263,20 @@ def format_bytes(size: int) -> str:
         if not size:
             return "0 Б"
         
-        for unit in ['Б', 'КБ', 'МБ', 'ГБ', 'ТБ']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} ПБ"
+        # Номер единицы — целая часть log2(size) / 10, без цикла делений
+        index = min((int(size).bit_length() - 1) // 10, len(BYTE_UNITS) - 1)
+        return f"{size / BYTE_DIVISORS[index]:.1f} {BYTE_UNITS[index]}"
+
+
+# Собранный один раз INSERT для TrafficLog.bulk_insert
+BULK_INSERT = insert(TrafficLog.__table__)
+
+
+invalidate_cached_properties(
+    TrafficLog,
+    names=("formatted_total_traffic",),
+    columns=("upload", "download")
+)
 
 
 class TrafficLimit(Base):
@@ -309,7 +287,7 @@ class TrafficLimit(Base):
     uuid = Column(UUID(), default=uuid.uuid4, unique=True, index=True)
     
     # Связи
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Период
     period_type = Column(String(20), nullable=False, index=True)  # daily, weekly, monthly
@@ -324,10 +302,22 @@ class TrafficLimit(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # Покрывающий индекс для проверки квоты: лимит и расход
+        # пользователя за период читаются только из индекса
+        Index(
+            'ix_traffic_limits_user_period',
+            'user_id',
+            'period_start',
+            'period_end',
+            postgresql_include=['data_limit', 'data_used'],
+        ),
+    )
+    
     def __repr__(self):
         return f"<TrafficLimit User:{self.user_id} {self.period_type} {self.period_start.date()}>"
     
-    @property
+    @cached_property
     def data_remaining(self) -> Optional[int]:
         """Оставшийся трафик в байтах."""
         if self.data_limit is None:
@@ -340,3 +330,92 @@ def is_exceeded(self) -> bool:
         if self.data_limit is None:
             return False
         return self.data_used >= self.data_limit
+
+
+invalidate_cached_properties(
+    TrafficLimit,
+    names=("data_remaining",),
+    columns=("data_limit", "data_used")
+)
+
+
+class TrafficRollup(Base):
+    """
+    Агрегаты трафика пользователя по часам, дням и месяцам.
+    
+    Заполняется фоновым агрегатором (см. app.services.traffic_rollup);
+    проверки квот читают этот небольшой набор строк вместо traffic_logs.
+    """
+    __tablename__ = "traffic_rollups"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period_type = Column(String(10), nullable=False)  # hour, day, month
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    
+    upload = Column(BigInteger, default=0, nullable=False)    # Исходящий трафик в байтах
+    download = Column(BigInteger, default=0, nullable=False)  # Входящий трафик в байтах
+    
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', 'period_type', 'bucket_start'),
+    )
+    
+    def __repr__(self):
+        return f"<TrafficRollup User:{self.user_id} {self.period_type} {self.bucket_start}>"
+    
+    @property
+    def total_traffic(self) -> int:
+        """Общий объем трафика за период в байтах."""
+        return self.upload + self.download
+    
+    @classmethod
+    async def get_usage(
+        cls,
+        session: AsyncSession,
+        *,
+        user_id: int,
+        start: datetime,
+        end: datetime,
+        period_type: str = 'hour'
+    ) -> int:
+        """
+        Получить трафик пользователя за интервал [start, end) по агрегатам.
+        
+        Args:
+            session: Сессия базы данных
+            user_id: ID пользователя
+            start: Начало интервала
+            end: Конец интервала
+            period_type: Гранулярность агрегатов; границы интервала
+                должны быть выровнены по ней
+        
+        Returns:
+            Использованный трафик в байтах
+        """
+        result = await session.execute(
+            select(func.coalesce(func.sum(cls.upload + cls.download), 0))
+            .where(
+                cls.user_id == user_id,
+                cls.period_type == period_type,
+                cls.bucket_start >= start,
+                cls.bucket_start < end
+            )
+        )
+        return result.scalar_one()
+
+
+class TrafficRollupCursor(Base):
+    """
+    Курсор фонового агрегатора трафика (единственная строка, id = 1).
+    
+    Хранит TrafficLog.id, до которого логи уже учтены в TrafficRollup.
+    Курсор ведётся по id, а не по started_at: лог длинной сессии
+    записывается с опозданием, но получает новый id.
+    """
+    __tablename__ = "traffic_rollup_cursor"
+    
+    id = Column(Integer, primary_key=True)
+    last_log_id = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<TrafficRollupCursor {self.last_log_id}>"
@@ -1,44 +1,111 @@
 """
 Кастомные типы данных для SQLAlchemy моделей.
 """
+import enum
 import uuid
 import ipaddress
-from sqlalchemy.types import TypeDecorator, CHAR, String
-from sqlalchemy.dialects.postgresql import UUID as PostgresUUID, INET as PostgresINET
+from typing import Type, Union
+
+from sqlalchemy.types import TypeDecorator, BINARY, String, JSON, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID, INET as PostgresINET, JSONB as PostgresJSONB
+
+
+def _chain(first, second):
+    """Последовательно применяет два процессора значений (любой может быть None)."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+
+    def process(value):
+        return second(first(value))
+    return process
+
+
+def _uuid_to_str(value):
+    if value is None:
+        return None
+    return str(value)
+
+
+def _uuid_to_bytes(value):
+    if value is None:
+        return None
+    if not isinstance(value, uuid.UUID):
+        value = uuid.UUID(value)
+    return value.bytes
+
+
+def _str_to_uuid(value):
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(value)
+
+
+def _bytes_to_uuid(value):
+    if value is None:
+        return None
+    return uuid.UUID(bytes=bytes(value))
 
 
 class UUID(TypeDecorator):
     """Platform-independent UUID type.
     
-    Использует PostgreSQL UUID для PostgreSQL и CHAR(36) для SQLite.
+    Использует PostgreSQL UUID для PostgreSQL и BINARY(16) для SQLite:
+    16 байт вместо 36-символьной строки и без разбора hex при чтении.
+    
+    Процессоры значений выбираются один раз для диалекта в
+    bind_processor/result_processor, поэтому на каждую строку
+    приходится один вызов без проверки диалекта.
     """
-    impl = CHAR
+    impl = BINARY
     cache_ok = True
 
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
             return dialect.type_descriptor(PostgresUUID())
         else:
-            return dialect.type_descriptor(CHAR(36))
+            return dialect.type_descriptor(BINARY(16))
+
+    @staticmethod
+    def _bind_converter(dialect):
+        return _uuid_to_str if dialect.name == 'postgresql' else _uuid_to_bytes
+
+    @staticmethod
+    def _result_converter(dialect):
+        return _str_to_uuid if dialect.name == 'postgresql' else _bytes_to_uuid
+
+    def bind_processor(self, dialect):
+        return _chain(self._bind_converter(dialect), self.impl_instance.bind_processor(dialect))
+
+    def result_processor(self, dialect, coltype):
+        return _chain(self.impl_instance.result_processor(dialect, coltype), self._result_converter(dialect))
 
     def process_bind_param(self, value, dialect):
-        if value is None:
-            return value
-        elif dialect.name == 'postgresql':
-            return str(value)
-        else:
-            if not isinstance(value, uuid.UUID):
-                return str(uuid.UUID(value))
-            else:
-                return str(value)
+        return self._bind_converter(dialect)(value)
 
     def process_result_value(self, value, dialect):
-        if value is None:
-            return value
-        else:
-            if not isinstance(value, uuid.UUID):
-                return uuid.UUID(value)
-            return value
+        return self._result_converter(dialect)(value)
+
+
+# Значения, которые возвращает INET
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+def _ip_to_str(value):
+    if value is None:
+        return None
+    return str(value)
+
+
+def _str_to_ip(value):
+    if value is None:
+        return None
+    try:
+        return ipaddress.ip_address(value)
+    except ValueError:
+        # Если не удается распарсить как IP, возвращаем строку
+        return value
 
 
 class INET(TypeDecorator):
@@ -55,18 +122,59 @@ def load_dialect_impl(self, dialect):
         else:
             return dialect.type_descriptor(String(45))  # Достаточно для IPv6
 
+    def bind_processor(self, dialect):
+        return _chain(_ip_to_str, self.impl_instance.bind_processor(dialect))
+
+    def result_processor(self, dialect, coltype):
+        return _chain(self.impl_instance.result_processor(dialect, coltype), _str_to_ip)
+
+    def process_bind_param(self, value, dialect):
+        return _ip_to_str(value)
+
+    def process_result_value(self, value, dialect):
+        return _str_to_ip(value)
+
+
+class JSONB(TypeDecorator):
+    """Platform-independent JSONB type.
+
+    Использует PostgreSQL JSONB (бинарное представление, без повторного
+    разбора текста при чтении) для PostgreSQL и JSON для SQLite.
+    """
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(PostgresJSONB())
+        else:
+            return dialect.type_descriptor(JSON())
+
+
+class SmallIntEnum(TypeDecorator):
+    """Хранит Python Enum в колонке SMALLINT.
+
+    Код в БД — порядковый номер члена перечисления в порядке объявления,
+    поэтому новые члены можно добавлять только в конец перечисления.
+    В Python значение остается членом Enum.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class: Type[enum.Enum], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enum_class = enum_class
+        self._members = tuple(enum_class)
+        self._codes = {member: code for code, member in enumerate(self._members)}
+
     def process_bind_param(self, value, dialect):
         if value is None:
             return value
-        if isinstance(value, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
-            return str(value)
-        return str(value)
+        if not isinstance(value, self.enum_class):
+            value = self.enum_class(value)
+        return self._codes[value]
 
     def process_result_value(self, value, dialect):
         if value is None:
             return value
-        try:
-            return ipaddress.ip_address(value)
-        except ValueError:
-            # Если не удается распарсить как IP, возвращаем строку
-            return value
+        return self._members[value]
@@ -1,13 +1,20 @@
-from datetime import datetime
+from functools import cached_property
 from typing import Optional, List
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, BigInteger, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 
+from ..core.clock import utcnow
+from ..core.ttl_cache import TTLCache
 from ..database import Base
+from .cache import invalidate_cached_properties
 from .types import UUID
 
+# email -> id пользователя. Сами объекты не кэшируются (они привязаны к сессии):
+# по id пользователь берётся из identity map сессии или по первичному ключу
+_id_by_email = TTLCache(maxsize=5000, ttl=30)
+
 class User(Base):
     """Модель пользователя системы."""
     __tablename__ = "users"
@@ -43,6 +50,10 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
     
+    # created_at заполняется сервером: получаем его через RETURNING того же
+    # INSERT, чтобы после регистрации не нужен был отдельный refresh
+    __mapper_args__ = {"eager_defaults": True}
+    
     # Связи
     subscriptions = relationship("Subscription", back_populates="user")
     traffic_logs = relationship("TrafficLog", back_populates="user")
@@ -55,14 +66,39 @@ class User(Base):
     def __repr__(self):
         return f"<User {self.email}>"
 
+    @classmethod
+    async def get(cls, db: "AsyncSession", user_id: int) -> Optional["User"]:
+        """Получить пользователя по id (из identity map сессии, если он уже загружен)."""
+        return await db.get(cls, user_id)
+
     @classmethod
     async def get_by_email(cls, db: "AsyncSession", email: str) -> Optional["User"]:
-        """Получить пользователя по email."""
+        """
+        Получить пользователя по email.
+        
+        id найденного пользователя кэшируется на 30 секунд; при смене email
+        или удалении пользователя запись кэша не совпадёт и будет сброшена.
+        """
+        user_id = _id_by_email.get(email)
+        if user_id is not None:
+            user = await db.get(cls, user_id)
+            if user is not None and user.email == email:
+                return user
+            _id_by_email.pop(email)
+
         from sqlalchemy import select
         result = await db.execute(select(cls).where(cls.email == email))
-        return result.scalar_one_or_none()
+        user = result.scalar_one_or_none()
+        if user is not None:
+            _id_by_email.set(email, user.id)
+        return user
     
-    @property
+    @cached_property
+    def display_name(self) -> str:
+        """Имя для писем: username, а если его нет — локальная часть email."""
+        return self.username or self.email.split("@", 1)[0]
+    
+    @cached_property
     def data_remaining(self) -> Optional[int]:
         """Оставшийся трафик в байтах."""
         if self.data_limit is None:
@@ -74,7 +110,7 @@ def is_expired(self) -> bool:
         """Истек ли срок действия аккаунта."""
         if self.expire_date is None:
             return False
-        return datetime.utcnow() > self.expire_date
+        return utcnow() > self.expire_date
     
     @property
     def is_data_exhausted(self) -> bool:
@@ -88,3 +124,15 @@ def effective_device_limit(self) -> int:
         """Возвращает эффективный лимит устройств с учётом значения по умолчанию."""
         from ..core.config import settings
         return self.device_limit if self.device_limit is not None else settings.HWID_FALLBACK_DEVICE_LIMIT
+
+
+invalidate_cached_properties(
+    User,
+    names=("data_remaining",),
+    columns=("data_limit", "data_used")
+)
+invalidate_cached_properties(
+    User,
+    names=("display_name",),
+    columns=("username", "email")
+)
@@ -3,20 +3,30 @@
 """
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from functools import cached_property
+from typing import Iterable, List, Optional
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, BigInteger, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Computed, Integer, String, DateTime, Boolean, BigInteger, ForeignKey
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 import uuid
 
+from ..core.clock import utcnow
 from ..database import Base
-from .types import UUID
+from .cache import invalidate_cached_properties
+from .serialization import FieldLayout, enum_value_or_none, isoformat_or_none
+from .types import UUID, SmallIntEnum
 
 
 class VPNUserStatus(str, Enum):
-    """Статусы пользователя VPN."""
+    """
+    Статусы пользователя VPN.
+    
+    В БД хранится код SMALLINT по порядку объявления (см. SmallIntEnum),
+    поэтому новые статусы добавляются только в конец.
+    """
     ACTIVE = "active"
     SUSPENDED = "suspended"
     EXPIRED = "expired"
@@ -36,13 +46,21 @@ class VPNUser(Base):
     hashed_password = Column(String(255), nullable=False)
     
     # Статус и активность
-    status = Column(SQLEnum(VPNUserStatus), default=VPNUserStatus.ACTIVE, nullable=False, index=True)
+    status = Column(SmallIntEnum(VPNUserStatus), default=VPNUserStatus.ACTIVE, nullable=False, index=True)
     is_active = Column(Boolean, default=True, nullable=False)
     
     # Лимиты трафика
     traffic_limit = Column(BigInteger, default=0, nullable=False, comment="Лимит трафика в байтах, 0 = безлимит")
     upload_traffic = Column(BigInteger, default=0, nullable=False, comment="Использованный исходящий трафик в байтах")
     download_traffic = Column(BigInteger, default=0, nullable=False, comment="Использованный входящий трафик в байтах")
+    # Хранимая сумма для фильтров и сортировки по трафику в SQL (доступ через total_traffic)
+    _total_traffic = Column(
+        "total_traffic",
+        BigInteger,
+        Computed("upload_traffic + download_traffic", persisted=True),
+        index=True,
+        comment="Общий использованный трафик в байтах"
+    )
     
     # Временные ограничения
     expires_at = Column(DateTime(timezone=True), nullable=True, comment="Дата истечения доступа")
@@ -62,22 +80,32 @@ class VPNUser(Base):
     user = relationship("User", back_populates="vpn_users")
     devices = relationship("Device", back_populates="vpn_user")
     
+    # Серверные значения (created_at, updated_at, total_traffic) не читаются
+    # через RETURNING при каждом flush: CRUD всё равно делает refresh
+    __mapper_args__ = {"eager_defaults": False}
+    
     def __repr__(self) -> str:
         return f"<VPNUser {self.username} ({self.email})>"
     
-    @property
+    @hybrid_property
     def total_traffic(self) -> int:
         """Общий использованный трафик в байтах."""
+        # В Python считаем по колонкам: хранимое значение обновится только после flush
         return self.upload_traffic + self.download_traffic
     
-    @property
+    @total_traffic.inplace.expression
+    @classmethod
+    def _total_traffic_expression(cls):
+        return cls._total_traffic
+    
+    @cached_property
     def traffic_remaining(self) -> Optional[int]:
         """Оставшийся трафик в байтах. None если безлимит."""
         if self.traffic_limit == 0:
             return None
         return max(0, self.traffic_limit - self.total_traffic)
     
-    @property
+    @cached_property
     def is_traffic_exceeded(self) -> bool:
         """Превышен ли лимит трафика."""
         if self.traffic_limit == 0:
@@ -87,38 +115,65 @@ def is_traffic_exceeded(self) -> bool:
     @property
     def is_expired(self) -> bool:
         """Истек ли срок действия аккаунта."""
-        if not self.expires_at:
-            return False
-        return datetime.utcnow() > self.expires_at
+        return self.is_expired_at(utcnow())
     
     @property
     def is_online(self) -> bool:
         """Был ли пользователь активен в последние 5 минут."""
+        return self.is_online_at(utcnow())
+    
+    def is_expired_at(self, now: datetime) -> bool:
+        """Истек ли срок действия аккаунта на момент `now`."""
+        if not self.expires_at:
+            return False
+        return now > self.expires_at
+    
+    def is_online_at(self, now: datetime) -> bool:
+        """Был ли пользователь активен в течение 5 минут до `now`."""
         if not self.last_active_at:
             return False
-        return (datetime.utcnow() - self.last_active_at).total_seconds() < 300
+        return (now - self.last_active_at).total_seconds() < 300
     
-    def to_dict(self) -> dict:
+    def to_dict(self, *, now: Optional[datetime] = None) -> dict:
         """Преобразует объект в словарь."""
-        return {
-            "id": self.id,
-            "uuid": str(self.uuid),
-            "username": self.username,
-            "email": self.email,
-            "status": self.status.value if self.status else None,
-            "is_active": self.is_active,
-            "traffic_limit": self.traffic_limit,
-            "upload_traffic": self.upload_traffic,
-            "download_traffic": self.download_traffic,
-            "total_traffic": self.total_traffic,
-            "traffic_remaining": self.traffic_remaining,
-            "is_traffic_exceeded": self.is_traffic_exceeded,
-            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
-            "last_active_at": self.last_active_at.isoformat() if self.last_active_at else None,
-            "is_expired": self.is_expired,
-            "is_online": self.is_online,
-            "xtls_enabled": self.xtls_enabled,
-            "user_id": self.user_id,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        if now is None:
+            now = utcnow()
+        data = _TO_DICT_LAYOUT.dump(self)
+        data["is_expired"] = self.is_expired_at(now)
+        data["is_online"] = self.is_online_at(now)
+        return data
+    
+    @classmethod
+    def to_dicts(cls, users: Iterable["VPNUser"], *, now: Optional[datetime] = None) -> List[dict]:
+        """Преобразует список пользователей в словари с общим `now`."""
+        if now is None:
+            now = utcnow()
+        return [user.to_dict(now=now) for user in users]
+
+
+_TO_DICT_LAYOUT = FieldLayout([
+    ("id", "id", None),
+    ("uuid", "uuid", str),
+    ("username", "username", None),
+    ("email", "email", None),
+    ("status", "status", enum_value_or_none),
+    ("is_active", "is_active", None),
+    ("traffic_limit", "traffic_limit", None),
+    ("upload_traffic", "upload_traffic", None),
+    ("download_traffic", "download_traffic", None),
+    ("total_traffic", "total_traffic", None),
+    ("traffic_remaining", "traffic_remaining", None),
+    ("is_traffic_exceeded", "is_traffic_exceeded", None),
+    ("expires_at", "expires_at", isoformat_or_none),
+    ("last_active_at", "last_active_at", isoformat_or_none),
+    ("xtls_enabled", "xtls_enabled", None),
+    ("user_id", "user_id", None),
+    ("created_at", "created_at", isoformat_or_none),
+    ("updated_at", "updated_at", isoformat_or_none),
+])
+
+invalidate_cached_properties(
+    VPNUser,
+    names=("traffic_remaining", "is_traffic_exceeded"),
+    columns=("upload_traffic", "download_traffic", "traffic_limit")
+)
@@ -1,10 +1,25 @@
+import hashlib
 from datetime import datetime
 from typing import Dict, Any, Optional, List
-from sqlalchemy import Column, Integer, String, JSON, Boolean, ForeignKey, DateTime, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 
+import orjson
+
+try:
+    import blake3
+except ImportError:  # необязательная зависимость, см. XRAY_CONFIG_CHECKSUM_ALGORITHM
+    blake3 = None
+
+from ..core.config import settings
 from ..database import Base
+from .types import JSONB
+
+# Без пакета blake3 суммы нельзя молча считать sha256: обе дают 64 hex-символа,
+# и воркеры с пакетом и без него записывали бы разные суммы одной конфигурации
+if settings.XRAY_CONFIG_CHECKSUM_ALGORITHM == "blake3" and blake3 is None:
+    raise RuntimeError("XRAY_CONFIG_CHECKSUM_ALGORITHM=blake3 требует установленного пакета blake3")
 
 class XrayConfig(Base):
     """
@@ -15,7 +30,7 @@ class XrayConfig(Base):
     id = Column(Integer, primary_key=True, index=True)
     version = Column(String(50), unique=True, index=True, nullable=False, comment="Версия конфигурации")
     description = Column(Text, nullable=True, comment="Описание изменений")
-    config = Column(JSON, nullable=False, comment="Конфигурация в формате JSON")
+    config = Column(JSONB, nullable=False, comment="Конфигурация в формате JSON")
     checksum = Column(String(64), unique=True, index=True, nullable=False, comment="Хеш-сумма конфигурации")
     is_active = Column(Boolean, default=False, index=True, comment="Активна ли конфигурация")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -26,10 +41,31 @@ class XrayConfig(Base):
     # Связи
     creator = relationship("User", foreign_keys=[created_by], back_populates="xray_configs_created")
     updater = relationship("User", foreign_keys=[updated_by], back_populates="xray_configs_updated")
+    
+    @staticmethod
+    def compute_checksum(config: Dict[str, Any]) -> str:
+        """
+        Вычисляет контрольную сумму конфигурации.
+        
+        Ключи сортируются, поэтому одинаковые конфигурации дают одинаковый
+        хеш независимо от порядка полей. Алгоритм (SHA-256 или BLAKE3)
+        задаётся XRAY_CONFIG_CHECKSUM_ALGORITHM.
+        """
+        data = orjson.dumps(config, option=orjson.OPT_SORT_KEYS)
+        if settings.XRAY_CONFIG_CHECKSUM_ALGORITHM == "blake3":
+            return blake3.blake3(data).hexdigest()
+        return hashlib.sha256(data).hexdigest()
+    
+    @validates("config")
+    def _update_checksum(self, key: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        # Сумма пересчитывается при каждом присваивании конфигурации,
+        # в том числе в конструкторе, поэтому CRUD её не передаёт
+        self.checksum = self.compute_checksum(config)
+        return config
 
 
 # Pydantic модели для валидации и сериализации
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 from typing import Optional
 from datetime import datetime
 
@@ -63,8 +99,7 @@ class XrayConfigInDBBase(XrayConfigBase):
     created_by: Optional[int]
     updated_by: Optional[int]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class XrayConfigInDB(XrayConfigInDBBase):
     """Схема для конфигурации в БД с дополнительными полями"""
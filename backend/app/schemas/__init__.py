@@ -1,29 +1,84 @@
-# Импортируем все схемы, чтобы они были доступны через app.schemas
-from .base import BaseModel, BaseResponse, PaginatedResponse, Msg
-from .token import Token, TokenPayload, TokenData, RefreshToken, TokenCreate, TokenResponse
-from .user import (
-    UserBase, UserCreate, UserUpdate, UserInDBBase, UserLogin, 
-    UserRegister, UserPasswordReset, UserPasswordResetConfirm,
-    UserPasswordChange, User, UserInDB, UserList
-)
-from .vpn_user import VPNUser, VPNUserCreate, VPNUserUpdate, VPNUserInDB
-from .config import ConfigCreate, ConfigUpdate, ConfigInDB
-from .device import DeviceCreate, DeviceUpdate, DeviceInDB, DeviceStats, Device, DeviceList
-from .node import Node, NodeCreate, NodeUpdate, NodeInDB
-from .subscription import (
-    Plan, PlanCreate, PlanUpdate, PlanInDB,
-    Subscription, SubscriptionCreate, SubscriptionUpdate, SubscriptionInDB, SubscriptionWithPlan,
-    SubscriptionPlan, SubscriptionPlanCreate, SubscriptionPlanUpdate,
-    UserSubscription, UserSubscriptionCreate, UserSubscriptionUpdate
-)
-from .xray import XrayUserCreate, XrayConfigCreate, XrayConfigUpdate
-from .xtls import (
-    XTLSUser, XTLSUserCreate, XTLSUserBase, XTLSConfig, XTLSStats,
-    XTLSReload, XTLSConnectionInfo, XTLSCertificate
-)
+"""
+Схемы доступны через app.schemas.
+
+base загружается сразу; остальные модули схем импортируются при первом
+обращении к их имени (PEP 562), поэтому `from app.schemas import User`
+не тянет за собой XTLS, подписки, конфигурации и т.д.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+from .base import BaseModel, BaseResponse, PaginatedResponse, Msg, construct_from_orm
+
+# Модуль, в котором определено имя
+_LAZY = {
+    **dict.fromkeys((
+        'Token', 'TokenPayload', 'TokenData', 'RefreshToken', 'TokenCreate', 'TokenResponse',
+    ), 'token'),
+    **dict.fromkeys((
+        'UserBase', 'UserCreate', 'UserUpdate', 'UserInDBBase', 'UserLogin',
+        'UserRegister', 'UserPasswordReset', 'UserPasswordResetConfirm',
+        'UserPasswordChange', 'User', 'UserInDB', 'UserList',
+    ), 'user'),
+    **dict.fromkeys(('VPNUser', 'VPNUserCreate', 'VPNUserUpdate', 'VPNUserInDB'), 'vpn_user'),
+    **dict.fromkeys(('ConfigCreate', 'ConfigUpdate', 'ConfigInDB'), 'config'),
+    **dict.fromkeys((
+        'DeviceCreate', 'DeviceUpdate', 'DeviceInDB', 'DeviceStats', 'Device', 'DeviceList',
+    ), 'device'),
+    **dict.fromkeys(('Node', 'NodeCreate', 'NodeUpdate', 'NodeInDB'), 'node'),
+    **dict.fromkeys((
+        'Plan', 'PlanCreate', 'PlanUpdate', 'PlanInDB',
+        'Subscription', 'SubscriptionCreate', 'SubscriptionUpdate', 'SubscriptionInDB', 'SubscriptionWithPlan',
+        'SubscriptionPlan', 'SubscriptionPlanCreate', 'SubscriptionPlanUpdate',
+        'UserSubscription', 'UserSubscriptionCreate', 'UserSubscriptionUpdate',
+    ), 'subscription'),
+    **dict.fromkeys(('XrayUserCreate', 'XrayConfigCreate', 'XrayConfigUpdate'), 'xray'),
+    **dict.fromkeys((
+        'XTLSUser', 'XTLSUserCreate', 'XTLSUserBase', 'XTLSConfig', 'XTLSStats',
+        'XTLSReload', 'XTLSConnectionInfo', 'XTLSCertificate',
+    ), 'xtls'),
+}
+
+
+def __getattr__(name: str):
+    """Импортирует модуль схемы при первом обращении и кэширует имя в пакете."""
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+if TYPE_CHECKING:
+    from .token import Token, TokenPayload, TokenData, RefreshToken, TokenCreate, TokenResponse
+    from .user import (
+        UserBase, UserCreate, UserUpdate, UserInDBBase, UserLogin, 
+        UserRegister, UserPasswordReset, UserPasswordResetConfirm,
+        UserPasswordChange, User, UserInDB, UserList
+    )
+    from .vpn_user import VPNUser, VPNUserCreate, VPNUserUpdate, VPNUserInDB
+    from .config import ConfigCreate, ConfigUpdate, ConfigInDB
+    from .device import DeviceCreate, DeviceUpdate, DeviceInDB, DeviceStats, Device, DeviceList
+    from .node import Node, NodeCreate, NodeUpdate, NodeInDB
+    from .subscription import (
+        Plan, PlanCreate, PlanUpdate, PlanInDB,
+        Subscription, SubscriptionCreate, SubscriptionUpdate, SubscriptionInDB, SubscriptionWithPlan,
+        SubscriptionPlan, SubscriptionPlanCreate, SubscriptionPlanUpdate,
+        UserSubscription, UserSubscriptionCreate, UserSubscriptionUpdate
+    )
+    from .xray import XrayUserCreate, XrayConfigCreate, XrayConfigUpdate
+    from .xtls import (
+        XTLSUser, XTLSUserCreate, XTLSUserBase, XTLSConfig, XTLSStats,
+        XTLSReload, XTLSConnectionInfo, XTLSCertificate
+    )
 
 __all__ = [
-    'BaseModel', 'BaseResponse', 'PaginatedResponse', 'Msg',
+    'BaseModel', 'BaseResponse', 'PaginatedResponse', 'Msg', 'construct_from_orm',
     'Token', 'TokenPayload', 'TokenData', 'RefreshToken', 'TokenCreate', 'TokenResponse',
     'UserBase', 'UserCreate', 'UserUpdate', 'UserInDBBase', 'UserLogin',
     'UserRegister', 'UserPasswordReset', 'UserPasswordResetConfirm',
@@ -34,8 +89,6 @@
     'Node', 'NodeCreate', 'NodeUpdate', 'NodeInDB',
     'Plan', 'PlanCreate', 'PlanUpdate', 'PlanInDB',
     'Subscription', 'SubscriptionCreate', 'SubscriptionUpdate', 'SubscriptionInDB', 'SubscriptionWithPlan',
-    'SubscriptionPlan', 'SubscriptionPlanCreate', 'SubscriptionPlanUpdate',
-    'UserSubscription', 'UserSubscriptionCreate', 'UserSubscriptionUpdate',
     'XrayUserCreate', 'XrayConfigCreate', 'XrayConfigUpdate',
     'XTLSUser', 'XTLSUserCreate', 'XTLSUserBase', 'XTLSConfig', 'XTLSStats',
     'XTLSReload', 'XTLSConnectionInfo', 'XTLSCertificate'
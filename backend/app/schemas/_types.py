@@ -0,0 +1,53 @@
+"""
+Общие аннотированные типы полей схем.
+
+Ограничения описаны один раз и переиспользуются всеми схемами, вместо
+отдельного validator(...) в каждом классе.
+"""
+from typing import Annotated, Any, Dict, Literal
+
+from pydantic import BeforeValidator, Field, PlainSerializer, PlainValidator, StringConstraints, WithJsonSchema
+
+from .base import normalize_ip_address
+
+
+def _lower(value):
+    """Приводит строку к нижнему регистру до проверки Literal."""
+    return value.lower() if isinstance(value, str) else value
+
+
+def _json_object(value: Any) -> Dict[str, Any]:
+    """Проверяет только, что значение — JSON-объект; содержимое не копируется."""
+    if not isinstance(value, dict):
+        raise ValueError("Ожидается JSON-объект")
+    return value
+
+
+# IP-адрес: объекты ipaddress из колонок INET и строки приводятся к строке,
+# некорректный адрес даёт ошибку валидации
+IPAddressStr = Annotated[str, BeforeValidator(normalize_ip_address), Field(max_length=45)]
+
+# Строковые ограничения, общие для схем создания и обновления
+NameStr = Annotated[str, StringConstraints(max_length=100)]  # названия, модель устройства
+ShortStr = Annotated[str, StringConstraints(max_length=50)]  # ОС, версии
+Username = Annotated[str, StringConstraints(min_length=3, max_length=50)]
+Password = Annotated[str, StringConstraints(min_length=8, max_length=100)]
+
+LevelLiteral = Literal["debug", "info", "warning", "error", "critical"]
+SourceLiteral = Literal["system", "xray", "node", "user", "api", "auth", "vpn", "config", "monitor"]
+
+# Уровень и источник события принимаются без учёта регистра, как раньше;
+# сам Literal проверяется в pydantic-core без вызова Python
+EventLevel = Annotated[LevelLiteral, BeforeValidator(_lower)]
+EventSource = Annotated[SourceLiteral, BeforeValidator(_lower)]
+
+# Произвольный JSON-объект (конфигурации Xray, метаданные, детали событий).
+# Dict[str, Any] pydantic-core обходит и копирует рекурсивно при каждой
+# валидации и сериализации; здесь проверяется только верхний уровень,
+# а словарь передаётся как есть
+JsonObject = Annotated[
+    Dict[str, Any],
+    PlainValidator(_json_object),
+    PlainSerializer(lambda value: value),
+    WithJsonSchema({"type": "object", "additionalProperties": True}),
+]
@@ -1,38 +1,167 @@
-from datetime import datetime
-from typing import Optional, TypeVar, Generic, Type, Any, Dict, List
-from pydantic import BaseModel as PydanticBaseModel, Field
-from pydantic.generics import GenericModel
-from uuid import UUID
+import copy
+import ipaddress
+import sys
+from functools import lru_cache
+from typing import Annotated, Optional, TypeVar, Generic, Type, Any, Dict, List, Union, get_args, get_origin
+from pydantic import BaseModel as PydanticBaseModel, ConfigDict, Field
+from pydantic.json_schema import DEFAULT_REF_TEMPLATE, GenerateJsonSchema
+from sqlalchemy import inspect as sa_inspect
+
+from app.models.serialization import FieldLayout, dict_or_empty
 
 # Тип для Generic модели
 ModelType = TypeVar("ModelType")
 
+def normalize_ip_address(value: Any) -> Optional[str]:
+    """
+    Приводит IP-адрес к строке.
+    
+    Колонки ip_address имеют тип INET и возвращают объекты ipaddress;
+    входные строки проверяются, чтобы некорректный адрес давал ошибку
+    валидации, а не ошибку БД.
+    """
+    if value is None:
+        return None
+    return str(ipaddress.ip_address(value))
+
+def _str_or_keep(value: Any) -> Any:
+    """UUID, IP-адрес и т.п. -> строка; строки и None без изменений."""
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _strip_annotated(annotation: Any) -> Any:
+    """Optional[Annotated[str, ...]] -> Optional[str] (см. app.schemas._types)."""
+    origin = get_origin(annotation)
+    if origin is Annotated:
+        return get_args(annotation)[0]
+    if origin is Union:
+        return Union[tuple(_strip_annotated(arg) for arg in get_args(annotation))]
+    return annotation
+
+
+def _field_converter(annotation: Any):
+    """Преобразование значения ORM под тип поля, которое иначе сделала бы валидация."""
+    annotation = _strip_annotated(annotation)
+    if annotation in (str, Optional[str]):
+        return _str_or_keep
+    if annotation is dict or get_origin(annotation) is dict:
+        return dict_or_empty
+    return None
+
+
+@lru_cache(maxsize=None)
+def _orm_layout(schema: Type[PydanticBaseModel], orm_class: type) -> FieldLayout:
+    """Схема чтения полей schema из объектов orm_class; строится один раз на пару классов."""
+    # Колонки, имя которых не совпадает с атрибутом (metadata -> metadata_)
+    attributes = {column.name: key for key, column in sa_inspect(orm_class).columns.items()}
+
+    # Имена полей из тела класса CPython интернирует сам; интернируем явно
+    # на случай имён, собранных динамически (create_model, имена колонок)
+    fields = []
+    for name, field in schema.model_fields.items():
+        attribute = attributes.get(name, name)
+        if hasattr(orm_class, attribute):
+            fields.append((sys.intern(name), sys.intern(attribute), _field_converter(field.annotation)))
+    return FieldLayout(fields)
+
+
+def construct_from_orm(schema: Type[PydanticBaseModel], obj: Any, **values: Any) -> Any:
+    """
+    Собирает схему из ORM-объекта без валидации (model_construct).
+    
+    Только для данных, прочитанных из БД: они уже проверены при записи.
+    Валидаторы схемы не вызываются, поэтому вычисляемые поля нужно
+    передать в values, если у ORM-объекта нет одноимённого атрибута.
+    Для входящих данных API используется обычная валидация.
+    """
+    data = _orm_layout(schema, type(obj)).dump(obj)
+    data.update(values)
+    return schema.model_construct(**data)
+
+@lru_cache(maxsize=None)
+def _cached_json_schema(
+    schema: Type[PydanticBaseModel],
+    by_alias: bool,
+    ref_template: str,
+    mode: str,
+) -> Dict[str, Any]:
+    """JSON-схема класса; строится один раз на класс и набор параметров."""
+    return PydanticBaseModel.model_json_schema.__func__(
+        schema,
+        by_alias=by_alias,
+        ref_template=ref_template,
+        mode=mode,
+    )
+
 class BaseModel(PydanticBaseModel):
     """Базовая схема для всех моделей."""
-    class Config:
-        from_attributes = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat(),
-            UUID: str,
-        }
+    # datetime и UUID pydantic-core сериализует сам, json_encoders не нужны.
+    # defer_build: валидатор схемы строится при первом использовании,
+    # а не при импорте, — большая часть схем в процессе не используется
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
+
+    @classmethod
+    def model_json_schema(
+        cls,
+        by_alias: bool = True,
+        ref_template: str = DEFAULT_REF_TEMPLATE,
+        schema_generator: Type[GenerateJsonSchema] = GenerateJsonSchema,
+        mode: str = "validation",
+        *,
+        union_format: str = "any_of",
+    ) -> Dict[str, Any]:
+        """
+        JSON-схема с кэшированием по классу.
+        
+        Схема не меняется после создания класса, поэтому обход core-схемы
+        выполняется один раз; вызывающему возвращается копия.
+        union_format появился в pydantic 2.12 и передаётся дальше только
+        со значением не по умолчанию, такие вызовы не кэшируются.
+        """
+        if union_format != "any_of":
+            return super().model_json_schema(
+                by_alias=by_alias,
+                ref_template=ref_template,
+                schema_generator=schema_generator,
+                mode=mode,
+                union_format=union_format,
+            )
+        if schema_generator is not GenerateJsonSchema:
+            return super().model_json_schema(
+                by_alias=by_alias,
+                ref_template=ref_template,
+                schema_generator=schema_generator,
+                mode=mode,
+            )
+        return copy.deepcopy(_cached_json_schema(cls, by_alias, ref_template, mode))
+
+    @classmethod
+    def from_orm_trusted(cls, obj: Any, **values: Any):
+        """Схема из ORM-объекта без валидации, см. construct_from_orm."""
+        return construct_from_orm(cls, obj, **values)
 
 class BaseResponse(BaseModel):
     """Базовая схема для ответов API."""
     success: bool = True
     message: Optional[str] = None
 
-class PaginatedResponse(GenericModel, Generic[ModelType]):
-    """Схема для постраничного вывода."""
+class PaginatedResponse(BaseModel, Generic[ModelType]):
+    """
+    Схема для постраничного вывода.
+    
+    Конкретные списки объявляются подклассом один раз на уровне модуля
+    (class DeviceList(PaginatedResponse[Device])), а не параметризуются
+    в маршрутах.
+    """
+
     items: List[ModelType]
     total: int
     page: int
     size: int
     pages: int
 
-    class Config:
-        from_attributes = True
-
 class Msg(BaseModel):
     """Схема для простых сообщений."""
     msg: str
@@ -3,9 +3,12 @@
 """
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field, validator, HttpUrl
+from pydantic import ConfigDict, Field, validator, HttpUrl
+
+from ._types import JsonObject, ShortStr
+from .base import BaseModel, PaginatedResponse
 
 class ConfigStatus(str, Enum):
     """Статус конфигурации."""
@@ -14,12 +17,16 @@ class ConfigStatus(str, Enum):
     DEPRECATED = "deprecated"  # Устарела
     ARCHIVED = "archived"    # Архивирована
 
+# Тип поля схемы: Literal проверяется в pydantic-core поиском по строке,
+# без преобразования в Enum; значения совпадают с ConfigStatus
+ConfigStatusT = Literal["draft", "active", "deprecated", "archived"]
+
 class ConfigBase(BaseModel):
     """Базовая схема конфигурации."""
-    version: str = Field(..., max_length=50, description="Версия конфигурации")
+    version: ShortStr = Field(..., description="Версия конфигурации")
     description: Optional[str] = Field(None, description="Описание изменений")
-    config: Dict[str, Any] = Field(..., description="Конфигурация в формате JSON")
-    status: ConfigStatus = Field(default=ConfigStatus.DRAFT, description="Статус конфигурации")
+    config: JsonObject = Field(..., description="Конфигурация в формате JSON")
+    status: ConfigStatusT = Field(default=ConfigStatus.DRAFT.value, description="Статус конфигурации")
     is_default: bool = Field(default=False, description="Является ли конфигурация конфигурацией по умолчанию")
 
 class ConfigCreate(ConfigBase):
@@ -29,8 +36,8 @@ class ConfigCreate(ConfigBase):
 class ConfigUpdate(BaseModel):
     """Схема для обновления конфигурации."""
     description: Optional[str] = None
-    config: Optional[Dict[str, Any]] = None
-    status: Optional[ConfigStatus] = None
+    config: Optional[JsonObject] = None
+    status: Optional[ConfigStatusT] = None
     is_default: Optional[bool] = None
 
 class ConfigInDBBase(ConfigBase):
@@ -41,24 +48,14 @@ class ConfigInDBBase(ConfigBase):
     updated_at: datetime
     created_by_id: Optional[int] = None
     
-    class Config:
-        from_attributes = True
-
-class Config(ConfigInDBBase):
-    """Схема для возврата данных о конфигурации."""
-    pass
+    model_config = ConfigDict(from_attributes=True)
 
-class ConfigInDB(ConfigInDBBase):
-    """Схема для конфигурации в БД."""
-    pass
+# Схемы для ответа API и для БД не добавляют полей — один класс на все
+Config = ConfigInDBBase
+ConfigInDB = ConfigInDBBase
 
-class ConfigList(BaseModel):
+class ConfigList(PaginatedResponse[Config]):
     """Схема для списка конфигураций с пагинацией."""
-    items: List[Config] = []
-    total: int = 0
-    page: int = 1
-    size: int = 50
-    pages: int = 1
 
 class ConfigSyncStatus(str, Enum):
     """Статус синхронизации конфигурации."""
@@ -68,11 +65,13 @@ class ConfigSyncStatus(str, Enum):
     FAILED = "failed"
     OUTDATED = "outdated"
 
+ConfigSyncStatusT = Literal["pending", "in_progress", "completed", "failed", "outdated"]
+
 class NodeSyncStatus(BaseModel):
     """Статус синхронизации конфигурации на ноде."""
     node_id: int
     node_name: str
-    status: ConfigSyncStatus
+    status: ConfigSyncStatusT
     last_sync: Optional[datetime] = None
     last_attempt: Optional[datetime] = None
     error_message: Optional[str] = None
@@ -84,7 +83,7 @@ class ConfigSyncResponse(BaseModel):
     """Ответ о статусе синхронизации конфигурации."""
     config_id: int
     config_version: str
-    status: ConfigSyncStatus
+    status: ConfigSyncStatusT
     nodes: List[NodeSyncStatus] = []
     created_at: datetime
     updated_at: datetime
@@ -105,8 +104,8 @@ class ConfigTemplate(BaseModel):
     """Шаблон конфигурации Xray."""
     name: str = Field(..., description="Название шаблона")
     description: Optional[str] = Field(None, description="Описание шаблона")
-    template: Dict[str, Any] = Field(..., description="Шаблон конфигурации")
-    variables: Dict[str, Any] = Field(default_factory=dict, description="Переменные шаблона")
+    template: JsonObject = Field(..., description="Шаблон конфигурации")
+    variables: JsonObject = Field(default_factory=dict, description="Переменные шаблона")
 
 class ConfigValidationError(BaseModel):
     """Ошибка валидации конфигурации."""
@@ -160,8 +159,8 @@ class ConfigTemplateUpdate(BaseModel):
     """Схема для обновления шаблона конфигурации."""
     name: Optional[str] = None
     description: Optional[str] = None
-    template: Optional[Dict[str, Any]] = None
-    variables: Optional[Dict[str, Any]] = None
+    template: Optional[JsonObject] = None
+    variables: Optional[JsonObject] = None
 
 class ConfigTemplateResponse(ConfigTemplate):
     """Ответ с данными шаблона конфигурации."""
@@ -170,5 +169,4 @@ class ConfigTemplateResponse(ConfigTemplate):
     updated_at: datetime
     created_by_id: Optional[int] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
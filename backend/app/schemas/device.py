@@ -2,20 +2,26 @@
 Pydantic-схемы для управления устройствами пользователей.
 """
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 
-from pydantic import BaseModel, Field, validator
+from pydantic import ConfigDict, Field, computed_field
+
+from app.core.clock import utcnow
+from app.models.device import ONLINE_TIMEOUT
+
+from ._types import IPAddressStr, JsonObject, NameStr, ShortStr
+from .base import BaseModel, PaginatedResponse
 
 class DeviceBase(BaseModel):
     """Базовая схема устройства."""
-    name: str = Field(..., max_length=100, description="Название устройства")
-    device_model: Optional[str] = Field(None, max_length=100, description="Модель устройства")
-    os_name: Optional[str] = Field(None, max_length=50, description="Название ОС")
-    os_version: Optional[str] = Field(None, max_length=50, description="Версия ОС")
-    app_version: Optional[str] = Field(None, max_length=50, description="Версия приложения")
-    ip_address: Optional[str] = Field(None, max_length=45, description="IP-адрес устройства")
+    name: NameStr = Field(..., description="Название устройства")
+    device_model: Optional[NameStr] = Field(None, description="Модель устройства")
+    os_name: Optional[ShortStr] = Field(None, description="Название ОС")
+    os_version: Optional[ShortStr] = Field(None, description="Версия ОС")
+    app_version: Optional[ShortStr] = Field(None, description="Версия приложения")
+    ip_address: Optional[IPAddressStr] = Field(None, description="IP-адрес устройства")
     is_trusted: bool = Field(False, description="Доверенное ли устройство")
-    metadata: Dict[str, Any] = Field(default_factory=dict, description="Дополнительные метаданные")
+    metadata: JsonObject = Field(default_factory=dict, description="Дополнительные метаданные")
 
 class DeviceCreate(DeviceBase):
     """Схема для создания устройства."""
@@ -24,10 +30,10 @@ class DeviceCreate(DeviceBase):
 
 class DeviceUpdate(BaseModel):
     """Схема для обновления устройства."""
-    name: Optional[str] = Field(None, max_length=100, description="Новое название устройства")
+    name: Optional[NameStr] = Field(None, description="Новое название устройства")
     is_trusted: Optional[bool] = Field(None, description="Сделать устройство доверенным")
     is_active: Optional[bool] = Field(None, description="Активно ли устройство")
-    metadata: Optional[Dict[str, Any]] = Field(None, description="Дополнительные метаданные")
+    metadata: Optional[JsonObject] = Field(None, description="Дополнительные метаданные")
 
 class DeviceInDBBase(DeviceBase):
     """Базовая схема устройства в БД."""
@@ -39,31 +45,27 @@ class DeviceInDBBase(DeviceBase):
     user_id: int
     vpn_user_id: Optional[int] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Device(DeviceInDBBase):
     """Схема для возврата данных об устройстве."""
-    is_online: bool = False
     
-    @validator('is_online', pre=True, always=True)
-    def set_is_online(cls, v, values):
-        """Вычисляет, активно ли устройство."""
-        if 'last_active' not in values or not values['last_active']:
-            return False
-        return (datetime.utcnow() - values['last_active']).total_seconds() < 300  # 5 минут
+    @computed_field
+    @property
+    def is_online(self) -> bool:
+        """
+        Было ли устройство в сети не позднее 5 минут назад.
+        
+        Вычисляется только при чтении/сериализации; время берётся из
+        clock.utcnow(), то есть одно на весь запрос.
+        """
+        return self.last_active is not None and self.last_active > utcnow() - ONLINE_TIMEOUT
 
-class DeviceInDB(DeviceInDBBase):
-    """Схема для устройства в БД."""
-    pass
+# Схема устройства в БД не добавляет полей
+DeviceInDB = DeviceInDBBase
 
-class DeviceList(BaseModel):
+class DeviceList(PaginatedResponse[Device]):
     """Схема для списка устройств с пагинацией."""
-    items: List[Device] = []
-    total: int = 0
-    page: int = 1
-    size: int = 50
-    pages: int = 1
 
 class DeviceActivity(BaseModel):
     """Схема для активности устройства."""
@@ -81,23 +83,22 @@ class DeviceStats(BaseModel):
     devices_by_os: Dict[str, int] = {}
     devices_by_model: Dict[str, int] = {}
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "total_devices": 42,
-                "active_devices": 35,
-                "online_devices": 12,
-                "trusted_devices": 15,
-                "devices_by_os": {
-                    "Android": 15,
-                    "iOS": 12,
-                    "Windows": 10,
-                    "macOS": 5
-                },
-                "devices_by_model": {
-                    "iPhone 12": 5,
-                    "Samsung Galaxy S21": 4,
-                    "Google Pixel 5": 3
-                }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "total_devices": 42,
+            "active_devices": 35,
+            "online_devices": 12,
+            "trusted_devices": 15,
+            "devices_by_os": {
+                "Android": 15,
+                "iOS": 12,
+                "Windows": 10,
+                "macOS": 5
+            },
+            "devices_by_model": {
+                "iPhone 12": 5,
+                "Samsung Galaxy S21": 4,
+                "Google Pixel 5": 3
             }
         }
+    })
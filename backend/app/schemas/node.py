@@ -1,12 +1,15 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import ConfigDict
+
+from ._types import IPAddressStr
+from .base import BaseModel
 
 class NodeBase(BaseModel):
     """Базовая схема ноды"""
     name: str
     fqdn: str
-    ip_address: str
+    ip_address: IPAddressStr
     api_address: str = "localhost"
     api_port: int = 8080
     api_tag: str = "api"
@@ -27,9 +30,7 @@ class NodeInDB(NodeBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
-class Node(NodeInDB):
-    """Схема ноды для API"""
-    pass
\ No newline at end of file
+# Схема ноды для API совпадает со схемой в БД
+Node = NodeInDB
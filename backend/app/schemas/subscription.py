@@ -3,16 +3,18 @@
 """
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field
-from decimal import Decimal
+from pydantic import ConfigDict, Field, computed_field
+
+from ._types import JsonObject, NameStr
+from .base import BaseModel
 
 
 # Схемы для тарифных планов
 class PlanBase(BaseModel):
     """Базовая схема тарифного плана."""
-    name: str = Field(..., max_length=100)
+    name: NameStr
     description: Optional[str] = None
-    price: Decimal = Field(..., ge=0)
+    price_cents: int = Field(..., ge=0, description="Цена в центах")
     duration_days: int = Field(..., gt=0)
     traffic_limit: Optional[int] = Field(None, ge=0, description="Лимит трафика в ГБ, None = безлимит")
     device_limit: int = Field(5, ge=1, description="Максимальное количество устройств")
@@ -26,9 +28,9 @@ class PlanCreate(PlanBase):
 
 class PlanUpdate(BaseModel):
     """Схема для обновления тарифного плана."""
-    name: Optional[str] = Field(None, max_length=100)
+    name: Optional[NameStr] = None
     description: Optional[str] = None
-    price: Optional[Decimal] = Field(None, ge=0)
+    price_cents: Optional[int] = Field(None, ge=0, description="Цена в центах")
     duration_days: Optional[int] = Field(None, gt=0)
     traffic_limit: Optional[int] = Field(None, ge=0)
     device_limit: Optional[int] = Field(None, ge=1)
@@ -41,13 +43,17 @@ class PlanInDB(PlanBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+    
+    @computed_field
+    @property
+    def price(self) -> str:
+        """Цена в виде строки с двумя знаками ("19.99") для совместимости API."""
+        return f"{self.price_cents // 100}.{self.price_cents % 100:02d}"
 
 
-class Plan(PlanInDB):
-    """Схема тарифного плана для API."""
-    pass
+# Схемы для API совпадают со схемами в БД
+Plan = PlanInDB
 
 
 # Схемы для подписок
@@ -78,17 +84,14 @@ class SubscriptionInDB(SubscriptionBase):
     start_date: datetime
     end_date: Optional[datetime] = None
     data_used: int = 0
-    settings: dict = {}
+    settings: JsonObject = {}
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-class Subscription(SubscriptionInDB):
-    """Схема подписки для API."""
-    pass
+Subscription = SubscriptionInDB
 
 
 class SubscriptionWithPlan(Subscription):
@@ -96,7 +99,8 @@ class SubscriptionWithPlan(Subscription):
     plan: Plan
 
 
-# Алиасы для совместимости
+# Алиасы для совместимости: те же классы, а не подклассы, чтобы не строить
+# одинаковые схемы дважды. В маршрутах используются основные имена
 SubscriptionPlan = Plan
 SubscriptionPlanCreate = PlanCreate
 SubscriptionPlanUpdate = PlanUpdate
@@ -2,36 +2,23 @@
 Pydantic схемы для системных событий.
 """
 from datetime import datetime
-from typing import Any, Dict, Optional
-from pydantic import BaseModel, Field, validator
+from typing import Dict, Optional
+from pydantic import ConfigDict, Field
+
+from ._types import EventLevel, EventSource, IPAddressStr, JsonObject
+from .base import BaseModel
 
 
 class SystemEventBase(BaseModel):
     """Базовая схема для системного события."""
-    level: str = Field(..., description="Уровень события (debug, info, warning, error, critical)")
+    level: EventLevel = Field(..., description="Уровень события (debug, info, warning, error, critical)")
     message: str = Field(..., description="Сообщение о событии")
-    source: str = Field(..., description="Источник события (system, xray, node, user, api, auth)")
+    source: EventSource = Field(..., description="Источник события (system, xray, node, user, api, auth)")
     category: Optional[str] = Field(None, description="Категория события")
     user_id: Optional[int] = Field(None, description="ID пользователя")
     node_id: Optional[int] = Field(None, description="ID ноды")
-    ip_address: Optional[str] = Field(None, description="IP-адрес")
-    details: Optional[Dict[str, Any]] = Field(None, description="Дополнительные детали")
-    
-    @validator('level')
-    def validate_level(cls, v):
-        """Валидация уровня события."""
-        allowed_levels = ['debug', 'info', 'warning', 'error', 'critical']
-        if v.lower() not in allowed_levels:
-            raise ValueError(f'Уровень должен быть одним из: {", ".join(allowed_levels)}')
-        return v.lower()
-    
-    @validator('source')
-    def validate_source(cls, v):
-        """Валидация источника события."""
-        allowed_sources = ['system', 'xray', 'node', 'user', 'api', 'auth', 'vpn', 'config', 'monitor']
-        if v.lower() not in allowed_sources:
-            raise ValueError(f'Источник должен быть одним из: {", ".join(allowed_sources)}')
-        return v.lower()
+    ip_address: Optional[IPAddressStr] = Field(None, description="IP-адрес")
+    details: Optional[JsonObject] = Field(None, description="Дополнительные детали")
 
 
 class SystemEventCreate(SystemEventBase):
@@ -41,14 +28,14 @@ class SystemEventCreate(SystemEventBase):
 
 class SystemEventUpdate(BaseModel):
     """Схема для обновления системного события."""
-    level: Optional[str] = None
+    level: Optional[EventLevel] = None
     message: Optional[str] = None
-    source: Optional[str] = None
+    source: Optional[EventSource] = None
     category: Optional[str] = None
     user_id: Optional[int] = None
     node_id: Optional[int] = None
-    ip_address: Optional[str] = None
-    details: Optional[Dict[str, Any]] = None
+    ip_address: Optional[IPAddressStr] = None
+    details: Optional[JsonObject] = None
 
 
 class SystemEvent(SystemEventBase):
@@ -58,8 +45,7 @@ class SystemEvent(SystemEventBase):
     timestamp: datetime
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SystemEventInDB(SystemEvent):
@@ -86,8 +72,8 @@ class SystemEventStats(BaseModel):
 
 class SystemEventFilter(BaseModel):
     """Схема для фильтрации событий."""
-    level: Optional[str] = Field(None, description="Фильтр по уровню")
-    source: Optional[str] = Field(None, description="Фильтр по источнику")
+    level: Optional[EventLevel] = Field(None, description="Фильтр по уровню")
+    source: Optional[EventSource] = Field(None, description="Фильтр по источнику")
     category: Optional[str] = Field(None, description="Фильтр по категории")
     user_id: Optional[int] = Field(None, description="Фильтр по пользователю")
     node_id: Optional[int] = Field(None, description="Фильтр по ноде")
@@ -98,11 +84,11 @@ class SystemEventFilter(BaseModel):
 
 class CreateSystemEventRequest(BaseModel):
     """Схема запроса для создания события через API."""
-    level: str = Field(..., description="Уровень события")
+    level: EventLevel = Field(..., description="Уровень события")
     message: str = Field(..., description="Сообщение о событии")
-    source: str = Field(..., description="Источник события")
+    source: EventSource = Field(..., description="Источник события")
     category: Optional[str] = Field(None, description="Категория события")
-    details: Optional[Dict[str, Any]] = Field(None, description="Дополнительные детали")
+    details: Optional[JsonObject] = Field(None, description="Дополнительные детали")
 
 
 class SystemEventSummary(BaseModel):
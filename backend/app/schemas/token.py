@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import ConfigDict, Field, EmailStr
+
+from .base import BaseModel
 
 class Token(BaseModel):
     """Схема для JWT токена."""
@@ -38,5 +40,4 @@ class TokenResponse(BaseModel):
     refresh_token: Optional[str] = None
     user: dict
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
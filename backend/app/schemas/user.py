@@ -1,12 +1,12 @@
 from datetime import datetime, date
 from typing import Optional, List
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import ConfigDict, EmailStr, Field, validator
 from uuid import UUID
 
-from .base import BaseModel as BaseSchema
+from .base import BaseModel
 
 # Базовые схемы
-class UserBase(BaseSchema):
+class UserBase(BaseModel):
     """Базовая схема пользователя."""
     email: Optional[EmailStr] = None
     username: Optional[str] = None
@@ -47,8 +47,7 @@ class UserInDBBase(UserBase):
     updated_at: Optional[datetime] = None
     last_login: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Дополнительные схемы для различных сценариев
 class UserLogin(BaseModel):
@@ -108,8 +107,7 @@ class UserList(BaseModel):
     items: List[User]
     total: int
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserVerifyEmail(BaseModel):
     """Схема для подтверждения email."""
@@ -3,13 +3,16 @@
 """
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import ConfigDict, EmailStr, Field
+
+from ._types import Password, Username
+from .base import BaseModel
 
 
 class VPNUserBase(BaseModel):
     """Базовая схема VPN пользователя."""
     email: EmailStr
-    username: str = Field(..., min_length=3, max_length=50)
+    username: Username
     is_active: bool = True
     traffic_limit: int = Field(0, ge=0, description="Лимит трафика в байтах, 0 = безлимит")
     xtls_enabled: bool = False
@@ -17,30 +20,18 @@ class VPNUserBase(BaseModel):
 
 class VPNUserCreate(VPNUserBase):
     """Схема для создания VPN пользователя."""
-    password: str = Field(..., min_length=8, max_length=100)
-    
-    @validator('password')
-    def validate_password(cls, v):
-        if len(v) < 8:
-            raise ValueError('Пароль должен содержать минимум 8 символов')
-        return v
+    password: Password
 
 
 class VPNUserUpdate(BaseModel):
     """Схема для обновления VPN пользователя."""
     email: Optional[EmailStr] = None
-    username: Optional[str] = Field(None, min_length=3, max_length=50)
-    password: Optional[str] = Field(None, min_length=8, max_length=100)
+    username: Optional[Username] = None
+    password: Optional[Password] = None
     is_active: Optional[bool] = None
     traffic_limit: Optional[int] = Field(None, ge=0)
     xtls_enabled: Optional[bool] = None
     status: Optional[str] = None
-    
-    @validator('password')
-    def validate_password(cls, v):
-        if v is not None and len(v) < 8:
-            raise ValueError('Пароль должен содержать минимум 8 символов')
-        return v
 
 
 class VPNUserInDBBase(VPNUserBase):
@@ -55,13 +46,11 @@ class VPNUserInDBBase(VPNUserBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-class VPNUser(VPNUserInDBBase):
-    """Схема VPN пользователя для API ответов."""
-    pass
+# Схема VPN пользователя для API ответов не добавляет полей
+VPNUser = VPNUserInDBBase
 
 
 class VPNUserInDB(VPNUserInDBBase):
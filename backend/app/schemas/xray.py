@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional
+
+from ._types import JsonObject
+from .base import BaseModel
 
 class XrayUserCreate(BaseModel):
     email: str
@@ -8,10 +10,10 @@ class XrayUserCreate(BaseModel):
 
 class XrayConfigCreate(BaseModel):
     name: str
-    config: Dict[str, Any]
+    config: JsonObject
     description: Optional[str] = None
 
 class XrayConfigUpdate(BaseModel):
     name: Optional[str] = None
-    config: Optional[Dict[str, Any]] = None
+    config: Optional[JsonObject] = None
     description: Optional[str] = None
\ No newline at end of file
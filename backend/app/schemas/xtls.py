@@ -5,7 +5,10 @@
 """
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import Field
+
+from ._types import JsonObject
+from .base import BaseModel
 
 class XTLSCertificate(BaseModel):
     """Schema for XTLS certificate information."""
@@ -27,13 +30,10 @@ class XTLSUserCreate(XTLSUserBase):
 class XTLSUser(XTLSUserBase):
     """Schema for XTLS user information."""
     certificate: XTLSCertificate = Field(..., description="Certificate information")
-    
-    class Config:
-        from_attributes = True
 
 class XTLSConfig(BaseModel):
     """Schema for XTLS configuration."""
-    config: Dict[str, Any] = Field(..., description="Xray configuration")
+    config: JsonObject = Field(..., description="Xray configuration")
     certificates_dir: str = Field(..., description="Directory containing XTLS certificates")
 
 class XTLSStats(BaseModel):
@@ -1,24 +1,168 @@
+import base64
+import hashlib
+import hmac
 import logging
-import uuid
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Tuple
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import jwt
+import orjson
+from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 
+from app.core.clock import utcnow
 from app.core.config import settings
 from app.core.security import verify_password, get_password_hash, generate_password_reset_token, verify_password_reset_token
+from app.core.ttl_cache import TTLCache
 from app.models.user import User
-from app.schemas.token import TokenPayload, Token, TokenData
-from app.schemas.user import UserCreate, UserInDB, User as UserSchema, UserResetPassword, UserUpdatePassword
+from app.schemas.user import UserCreate
 from app.services.email import EmailService
 
 logger = logging.getLogger(__name__)
 
-# Контекст для хеширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Кэш проверенных токенов: SHA-256 токена -> payload.
+# Подпись одного и того же токена повторно не проверяется в течение
+# TOKEN_CACHE_TTL секунд (но не дольше exp). Сами токены не хранятся
+#
+# Блокировка на ключ (single-flight) не нужна: verify_token синхронный и
+# ничего не ожидает, поэтому в цикле событий проверка одного токена
+# выполняется целиком, и следующая корутина уже находит его в кэше.
+# Из потоков threadpool возможна лишь повторная проверка HMAC за единицы
+# микросекунд, что дешевле блокировки
+TOKEN_CACHE_TTL = 30
+TOKEN_CACHE_SIZE = 10000
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+# HMAC-алгоритмы, для которых токен собирается без jwt.encode
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+@lru_cache(maxsize=None)
+def _jwt_header(algorithm: str) -> bytes:
+    """Закодированный заголовок JWT; одинаков для всех токенов алгоритма."""
+    return _b64url(orjson.dumps({"alg": algorithm, "typ": "JWT"}))
+
+
+def _claim_default(value: Any) -> Any:
+    """Даты в claims (exp, iat и т.п.) кодируются секундами Unix, как требует JWT."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return str(value)
+
+
+def _dump_claims(claims: Dict[str, Any]) -> bytes:
+    return orjson.dumps(
+        claims,
+        default=_claim_default,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+@lru_cache(maxsize=4)
+def _hmac_signer(algorithm: str, secret_key: str) -> "hmac.HMAC":
+    """HMAC-объект с уже подготовленным ключом; для подписи берётся его copy()."""
+    return hmac.new(secret_key.encode(), digestmod=_HMAC_DIGESTS[algorithm])
+
+
+def _encode_jwts(*claims_sets: Dict[str, Any]) -> List[str]:
+    """
+    Подписывает несколько наборов claims одним ключом.
+    
+    Для HS* заголовок и ключ HMAC подготавливаются один раз, payload
+    сериализуется orjson; остальные алгоритмы — через PyJWT.
+    Значения datetime переводятся в секунды Unix (см. _claim_default).
+    """
+    if settings.ALGORITHM not in _HMAC_DIGESTS:
+        return [
+            jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+            for claims in claims_sets
+        ]
+    
+    header = _jwt_header(settings.ALGORITHM) + b"."
+    signer = _hmac_signer(settings.ALGORITHM, settings.SECRET_KEY)
+    tokens = []
+    for claims in claims_sets:
+        signing_input = header + _b64url(_dump_claims(claims))
+        mac = signer.copy()
+        mac.update(signing_input)
+        tokens.append((signing_input + b"." + _b64url(mac.digest())).decode())
+    return tokens
+
+
+def _encode_jwt(claims: Dict[str, Any]) -> str:
+    """Подписывает один набор claims (см. _encode_jwts)."""
+    return _encode_jwts(claims)[0]
+
+
+# Часть JWT в base64url без дополнения '='
+_B64URL_SEGMENT = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def _b64url_decode(data: str) -> bytes:
+    """
+    Строго декодирует часть JWT.
+    
+    base64.urlsafe_b64decode молча пропускает символы вне алфавита, поэтому
+    токен с дописанным мусором разбирался бы как исходный.
+    
+    Raises:
+        ValueError: символы вне base64url, дополнение или неверная длина
+    """
+    if not _B64URL_SEGMENT.fullmatch(data):
+        raise ValueError("Invalid base64url segment")
+    return base64.b64decode(data + "=" * (-len(data) % 4), altchars=b"-_", validate=True)
+
+
+def _peek_claims(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Читает claims без проверки подписи.
+    
+    Только для раннего отказа (неверный тип токена, мусор на входе): доверять
+    значениям можно лишь после _decode_jwt.
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        claims = orjson.loads(_b64url_decode(parts[1]))
+    except (ValueError, orjson.JSONDecodeError):
+        return None
+    return claims if isinstance(claims, dict) else None
+
+
+def _decode_jwt(token: str) -> Dict[str, Any]:
+    """
+    Проверяет подпись и срок действия токена (PyJWT) и возвращает claims.
+    
+    Части токена предварительно проверяются на строгий base64url, а подпись —
+    на каноническую запись: PyJWT декодирует их нестрого, и разные строки
+    с одной подписью проходили бы проверку и попадали в кэш отдельно.
+    
+    Raises:
+        jwt.PyJWTError: неверный формат, подпись или истёкший токен
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        raise jwt.DecodeError("Not enough segments")
+    try:
+        for part in parts[:2]:
+            _b64url_decode(part)
+        signature = _b64url_decode(parts[2])
+    except ValueError:
+        raise jwt.DecodeError("Invalid token encoding")
+    if _b64url(signature).decode() != parts[2]:
+        raise jwt.DecodeError("Non-canonical signature encoding")
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
 
 class AuthService:
     """Сервис для аутентификации и авторизации пользователей."""
@@ -29,7 +173,8 @@ def create_access_token(
         subject: str, 
         user_id: int,
         is_superuser: bool = False,
-        expires_delta: Optional[timedelta] = None
+        expires_delta: Optional[timedelta] = None,
+        now: Optional[datetime] = None
     ) -> str:
         """
         Создает JWT токен доступа.
@@ -39,38 +184,33 @@ def create_access_token(
             user_id: ID пользователя в БД
             is_superuser: Является ли пользователь администратором
             expires_delta: Время жизни токена
+            now: Момент выдачи; по умолчанию время текущего запроса
             
         Returns:
             str: Закодированный JWT токен
         """
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(
+        if not expires_delta:
+            expires_delta = timedelta(
                 minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
             )
             
         to_encode = {
-            "exp": expire,
+            "exp": (now or utcnow()) + expires_delta,
             "sub": str(subject),
             "user_id": user_id,
             "is_superuser": is_superuser,
             "type": "access"
         }
         
-        encoded_jwt = jwt.encode(
-            to_encode, 
-            settings.SECRET_KEY, 
-            algorithm=settings.ALGORITHM
-        )
-        return encoded_jwt
+        return _encode_jwt(to_encode)
     
     @classmethod
     def create_refresh_token(
         cls, 
         subject: str,
         user_id: int,
-        expires_delta: Optional[timedelta] = None
+        expires_delta: Optional[timedelta] = None,
+        now: Optional[datetime] = None
     ) -> str:
         """
         Создает refresh токен.
@@ -79,30 +219,24 @@ def create_refresh_token(
             subject: Идентификатор пользователя (обычно email)
             user_id: ID пользователя в БД
             expires_delta: Время жизни токена
+            now: Момент выдачи; по умолчанию время текущего запроса
             
         Returns:
             str: Закодированный JWT refresh токен
         """
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(
+        if not expires_delta:
+            expires_delta = timedelta(
                 days=settings.REFRESH_TOKEN_EXPIRE_DAYS
             )
             
         to_encode = {
-            "exp": expire,
+            "exp": (now or utcnow()) + expires_delta,
             "sub": str(subject),
             "user_id": user_id,
             "type": "refresh"
         }
         
-        encoded_jwt = jwt.encode(
-            to_encode, 
-            settings.SECRET_KEY, 
-            algorithm=settings.ALGORITHM
-        )
-        return encoded_jwt
+        return _encode_jwt(to_encode)
     
     @classmethod
     def verify_token(cls, token: str) -> Optional[Dict[str, Any]]:
@@ -115,16 +249,32 @@ def verify_token(cls, token: str) -> Optional[Dict[str, Any]]:
         Returns:
             Optional[Dict[str, Any]]: Полезная нагрузка токена или None, если токен невалидный
         """
+        key = hashlib.sha256(token.encode()).digest()
+        cached = _token_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            payload = jwt.decode(
-                token, 
-                settings.SECRET_KEY, 
-                algorithms=[settings.ALGORITHM]
-            )
-            return payload
-        except JWTError as e:
+            payload = _decode_jwt(token)
+        except jwt.PyJWTError as e:
+            # ExpiredSignatureError — подкласс PyJWTError: просроченный токен
+            # и неверная подпись обрабатываются одной веткой
             logger.error(f"Ошибка при верификации токена: {str(e)}")
             return None
+        
+        exp = payload.get("exp")
+        _token_cache.set(key, payload, expires_at=exp if isinstance(exp, (int, float)) else None)
+        return dict(payload)
+    
+    @classmethod
+    def forget_user_tokens(cls, user_id: int) -> None:
+        """
+        Удаляет из кэша проверенные токены пользователя.
+        
+        Вызывается при смене пароля, чтобы кэш не продлевал
+        действие уже выданных токенов.
+        """
+        _token_cache.pop_where(lambda payload: payload.get("user_id") == user_id)
     
     @classmethod
     async def authenticate(
@@ -153,10 +303,16 @@ async def authenticate(
         if not verify_password(password, user.hashed_password):
             return None
             
-        # Обновляем время последнего входа
-        user.last_login = datetime.utcnow()
+        # Обновляем время последнего входа; RETURNING возвращает актуальную
+        # строку тем же запросом, без отдельного refresh
+        result = await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(last_login=utcnow())
+            .returning(User)
+        )
+        user = result.scalar_one()
         await db.commit()
-        await db.refresh(user)
         
         return user
     
@@ -176,19 +332,20 @@ async def register_user(
         Returns:
             User: Созданный пользователь
         """
-        # Проверяем, существует ли пользователь с таким email
-        existing_user = await User.get_by_email(db, email=user_in.email)
-        if existing_user:
-            raise ValueError("Пользователь с таким email уже зарегистрирован")
-            
-        # Создаем нового пользователя
         user_data = user_in.dict(exclude={"password"})
         user_data["hashed_password"] = get_password_hash(user_in.password)
         user = User(**user_data)
         
+        # Уникальность email и username проверяет БД: отдельный SELECT
+        # перед INSERT не нужен и не защищает от одновременной регистрации
         db.add(user)
-        await db.commit()
-        await db.refresh(user)
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if "username" in str(e.orig):
+                raise ValueError("Пользователь с таким именем уже существует")
+            raise ValueError("Пользователь с таким email уже зарегистрирован")
         
         return user
     
@@ -208,6 +365,28 @@ async def create_tokens(
         Returns:
             Dict[str, str]: Словарь с access и refresh токенами
         """
+        return (await cls.create_tokens_bulk([user], remember_me=remember_me))[0]
+    
+    @classmethod
+    async def create_tokens_bulk(
+        cls,
+        users: List[User],
+        remember_me: bool = False
+    ) -> List[Dict[str, str]]:
+        """
+        Создает access и refresh токены для нескольких пользователей.
+        
+        Для массовых операций (приглашения, сброс сессий): все токены
+        подписываются одним вызовом _encode_jwts с общими заголовком и
+        подготовленным ключом HMAC.
+        
+        Args:
+            users: Пользователи
+            remember_me: Запомнить пользователей на длительный срок
+            
+        Returns:
+            List[Dict[str, str]]: Токены в порядке users
+        """
         # Определяем время жизни токенов
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         
@@ -216,26 +395,39 @@ async def create_tokens(
         else:
             refresh_token_expires = timedelta(hours=12)
         
-        # Создаем токены
-        access_token = cls.create_access_token(
-            subject=user.email,
-            user_id=user.id,
-            is_superuser=user.is_superuser,
-            expires_delta=access_token_expires
-        )
-        
-        refresh_token = cls.create_refresh_token(
-            subject=user.email,
-            user_id=user.id,
-            expires_delta=refresh_token_expires
-        )
-        
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer",
-            "expires_at": (datetime.utcnow() + access_token_expires).isoformat()
-        }
+        # Сроки действия всех токенов отсчитываются от одного момента
+        now = utcnow()
+        access_expire = now + access_token_expires
+        refresh_expire = now + refresh_token_expires
+        
+        claims = []
+        for user in users:
+            subject = str(user.email)
+            claims.append({
+                "exp": access_expire,
+                "sub": subject,
+                "user_id": user.id,
+                "is_superuser": user.is_superuser,
+                "type": "access"
+            })
+            claims.append({
+                "exp": refresh_expire,
+                "sub": subject,
+                "user_id": user.id,
+                "type": "refresh"
+            })
+        tokens = _encode_jwts(*claims)
+        
+        expires_at = access_expire.isoformat()
+        return [
+            {
+                "access_token": tokens[i],
+                "refresh_token": tokens[i + 1],
+                "token_type": "bearer",
+                "expires_at": expires_at
+            }
+            for i in range(0, len(tokens), 2)
+        ]
     
     @classmethod
     async def refresh_tokens(
@@ -256,6 +448,11 @@ async def refresh_tokens(
         Raises:
             ValueError: Если refresh токен невалидный или пользователь не найден
         """
+        # Токен другого типа или не JWT отклоняем до проверки подписи
+        claims = _peek_claims(refresh_token)
+        if not claims or claims.get("type") != "refresh":
+            raise ValueError("Невалидный refresh токен")
+        
         # Верифицируем refresh токен
         payload = cls.verify_token(refresh_token)
         if not payload or payload.get("type") != "refresh":
@@ -278,7 +475,8 @@ async def refresh_tokens(
     async def request_password_reset(
         cls,
         db: AsyncSession,
-        email: str
+        email: str,
+        background_tasks: Optional[BackgroundTasks] = None
     ) -> bool:
         """
         Запрашивает сброс пароля для пользователя.
@@ -286,6 +484,8 @@ async def request_password_reset(
         Args:
             db: Асинхронная сессия БД
             email: Email пользователя
+            background_tasks: Если передан, письмо отправляется после ответа
+                на запрос, без ожидания SMTP
             
         Returns:
             bool: True, если запрос на сброс пароля обработан
@@ -305,11 +505,16 @@ async def request_password_reset(
         reset_token = generate_password_reset_token(email=email)
         
         # Отправляем письмо с инструкциями
-        await EmailService.send_reset_password_email(
+        send = EmailService.send_reset_password_email
+        kwargs = dict(
             email_to=user.email,
-            username=user.username or user.email.split('@')[0],
+            username=user.display_name,
             token=reset_token
         )
+        if background_tasks is not None:
+            background_tasks.add_task(send, **kwargs)
+        else:
+            await send(**kwargs)
         
         return True
     
@@ -339,21 +544,23 @@ async def reset_password(
         if not email:
             raise ValueError("Неверный или истекший токен сброса пароля")
         
-        # Находим пользователя по email
+        # Находим пользователя по email; email из токена сравнивается
+        # за постоянное время
         user = await User.get_by_email(db, email=email)
-        if not user:
+        if not user or not hmac.compare_digest(user.email.encode(), email.encode()):
             raise ValueError("Пользователь не найден")
         
-        # Обновляем пароль
-        user.hashed_password = get_password_hash(new_password)
-        user.updated_at = datetime.utcnow()
-        
-        # Сбрасываем токены, если есть
-        if hasattr(user, 'refresh_token'):
-            user.refresh_token = None
-        
+        # Обновляем пароль одним UPDATE; перечитывать строку не нужно
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                hashed_password=get_password_hash(new_password),
+                updated_at=utcnow()
+            )
+        )
         await db.commit()
-        await db.refresh(user)
+        cls.forget_user_tokens(user.id)
         
         return True
     
@@ -361,7 +568,8 @@ async def reset_password(
     async def send_email_verification(
         cls,
         db: AsyncSession,
-        email: str
+        email: str,
+        background_tasks: Optional[BackgroundTasks] = None
     ) -> bool:
         """
         Отправляет письмо для подтверждения email.
@@ -369,9 +577,11 @@ async def send_email_verification(
         Args:
             db: Асинхронная сессия БД
             email: Email пользователя
+            background_tasks: Если передан, письмо отправляется после ответа
+                на запрос, без ожидания SMTP
             
         Returns:
-            bool: True, если письмо успешно отправлено
+            bool: True, если письмо успешно отправлено (или поставлено в очередь)
             
         Raises:
             ValueError: Если пользователь с таким email не найден или email уже подтвержден
@@ -392,11 +602,16 @@ async def send_email_verification(
         token = generate_email_verification_token(email=email)
         
         # Отправляем письмо с подтверждением
-        return await EmailService.send_email_verification(
+        send = EmailService.send_email_verification
+        kwargs = dict(
             email_to=user.email,
-            username=user.username or user.email.split('@')[0],
+            username=user.display_name,
             token=token
         )
+        if background_tasks is not None:
+            background_tasks.add_task(send, **kwargs)
+            return True
+        return await send(**kwargs)
     
     @classmethod
     async def verify_email(
@@ -424,9 +639,10 @@ async def verify_email(
         if not email:
             raise ValueError("Неверный или истекший токен подтверждения email")
         
-        # Находим пользователя по email
+        # Находим пользователя по email; email из токена сравнивается
+        # за постоянное время
         user = await User.get_by_email(db, email=email)
-        if not user:
+        if not user or not hmac.compare_digest(user.email.encode(), email.encode()):
             raise ValueError("Пользователь не найден")
             
         # Проверяем, не подтвержден ли уже email
@@ -434,9 +650,9 @@ async def verify_email(
             return True
             
         # Обновляем статус подтверждения email
-        user.is_verified = True
-        user.verified_at = datetime.utcnow()
+        await db.execute(
+            update(User).where(User.id == user.id).values(is_verified=True)
+        )
         await db.commit()
-        await db.refresh(user)
         
         return True
@@ -0,0 +1,191 @@
+"""
+Базовый класс фоновой пакетной записи в БД.
+
+Записи копятся в очереди и сбрасываются фоновой задачей пачками по
+batch_size или раз в flush_interval секунд. Остановка не отменяет задачу,
+а ставит в очередь маркер: задача дописывает уже собранную пачку и
+завершается, после чего остаток очереди сбрасывается в stop().
+"""
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Попытки записи пачки и базовая задержка между ними (растёт вдвое)
+WRITE_ATTEMPTS = 3
+WRITE_BACKOFF_BASE = 0.5
+
+# Маркер остановки фоновой задачи в очереди
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Очередь записей с фоновой пакетной записью.
+
+    Наследники задают description (родительный падеж множественного числа,
+    для логов) и реализуют _write_batch.
+    """
+
+    description = "записей"
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        max_queue_size: int
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._writer_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._is_running = False
+        self._stopping = False
+
+    @property
+    def is_running(self) -> bool:
+        """Запущена ли фоновая запись."""
+        return self._is_running
+
+    async def start(self) -> None:
+        """Запускает фоновую запись."""
+        if self._is_running:
+            logger.warning(f"Запись {self.description} уже запущена")
+            return
+
+        self._is_running = True
+        self._stopping = False
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        logger.info(f"Фоновая запись {self.description} запущена")
+
+    async def stop(self) -> None:
+        """Останавливает фоновую запись и сбрасывает остаток очереди."""
+        if not self._is_running:
+            return
+
+        self._is_running = False
+        if self._writer_task:
+            # Задача дописывает собранную пачку и выходит, дойдя до маркера
+            await self._queue.put(_STOP)
+            await self._writer_task
+            self._writer_task = None
+
+        await self.flush()
+        logger.info(f"Фоновая запись {self.description} остановлена")
+
+    async def flush(self) -> int:
+        """
+        Немедленно записывает то, что накопилось в очереди к моменту вызова.
+
+        Returns:
+            Количество записанных строк
+        """
+        written = 0
+        remaining = self._queue.qsize()
+        while remaining > 0:
+            batch = self._drain(min(self.batch_size, remaining))
+            if not batch:
+                break
+            remaining -= len(batch)
+            written += await self._write(batch)
+        return written
+
+    def _put(self, item: Any) -> bool:
+        """Ставит запись в очередь; False, если очередь переполнена."""
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            logger.warning(f"Очередь {self.description} переполнена")
+            return False
+        return True
+
+    async def _writer_loop(self) -> None:
+        """Сбрасывает очередь при наборе batch_size записей или по таймеру."""
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size and not self._stopping:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    self._stopping = True
+                    break
+                batch.append(item)
+                batch.extend(self._drain(self.batch_size - len(batch)))
+
+            await self._write(batch)
+
+    def _drain(self, limit: int) -> List[Any]:
+        """Забирает из очереди до limit записей без ожидания."""
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is _STOP:
+                self._stopping = True
+                break
+            batch.append(item)
+        return batch
+
+    async def _write(self, batch: List[Any]) -> int:
+        """
+        Записывает пачку, повторяя попытку при ошибке.
+
+        Если все попытки не удались, пачка возвращается в очередь
+        (пока запись запущена), иначе теряется с записью в лог.
+
+        Returns:
+            Количество записанных строк
+        """
+        if not batch:
+            return 0
+
+        async with self._write_lock:
+            for attempt in range(WRITE_ATTEMPTS):
+                try:
+                    return await self._write_batch(batch)
+                except Exception as e:
+                    logger.error(
+                        f"Ошибка записи {len(batch)} {self.description} "
+                        f"(попытка {attempt + 1} из {WRITE_ATTEMPTS}): {e}"
+                    )
+                if attempt + 1 < WRITE_ATTEMPTS:
+                    await asyncio.sleep(WRITE_BACKOFF_BASE * 2 ** attempt)
+
+        if self._is_running:
+            self._requeue(batch)
+        else:
+            logger.error(f"Не удалось записать {len(batch)} {self.description}, данные потеряны")
+        return 0
+
+    def _requeue(self, batch: List[Any]) -> None:
+        """Возвращает незаписанную пачку в очередь, насколько хватает места."""
+        for index, item in enumerate(batch):
+            try:
+                self._queue.put_nowait(item)
+            except asyncio.QueueFull:
+                logger.error(
+                    f"Очередь {self.description} переполнена, "
+                    f"{len(batch) - index} записей потеряно"
+                )
+                return
+
+    async def _write_batch(self, batch: List[Any]) -> int:
+        """
+        Записывает пачку в одной транзакции.
+
+        Returns:
+            Количество записанных строк; при ошибке бросает исключение
+        """
+        raise NotImplementedError
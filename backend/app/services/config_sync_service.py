@@ -2,19 +2,28 @@
 Сервис для синхронизации конфигурации между нодами.
 """
 import asyncio
-import hashlib
-import json
 import logging
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple, Union
+import random
+import time
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, List, Optional, Set, Tuple, Union
 
 import aiohttp
+import orjson
 from fastapi import HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+try:
+    import zstandard
+except ImportError:  # необязательная зависимость, см. CONFIG_SYNC_ZSTD
+    zstandard = None
+
 from app import crud, models, schemas
+from app.core.clock import reset_now, set_now, utcnow
 from app.core.config import settings
 from app.crud.crud_config import config as crud_config
+from app.database import async_session_factory
 from app.models.config_sync import ConfigSync, SyncStatus
 from app.models.config_version import ConfigVersion
 from app.models.node import Node, NodeStatus
@@ -22,6 +31,57 @@
 
 logger = logging.getLogger(__name__)
 
+# Повторы отправки конфигурации на ноду при сетевых ошибках, таймаутах и
+# ответах 5xx. Каждая попытка ограничена SYNC_ATTEMPT_TIMEOUT секунд, все
+# попытки вместе — SYNC_DEADLINE; пауза перед повтором выбирается случайно
+# от 0 до min(SYNC_BACKOFF_CAP, SYNC_BACKOFF_BASE * 2 ** попытка)
+SYNC_ATTEMPTS = 3
+SYNC_ATTEMPT_TIMEOUT = 10.0
+SYNC_CONNECT_TIMEOUT = 2.0
+SYNC_DEADLINE = 20.0
+SYNC_BACKOFF_BASE = 0.5
+SYNC_BACKOFF_CAP = 5.0
+
+# Начало кадра zstd: по нему видно, что тело сжато (JSON так начинаться не может)
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_zstd_compressor = zstandard.ZstdCompressor(level=3) if zstandard is not None else None
+
+# Блокировки по нодам: одновременные развёртывания (например, отложенная
+# синхронизация и развёртывание через API) не отправляют конфигурацию на одну
+# ноду параллельно, а разные ноды друг друга не ждут
+_node_locks: DefaultDict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+# Общая HTTP-сессия для запросов к нодам. ConfigSyncService создаётся на
+# каждый запрос API, поэтому пул соединений живёт на уровне модуля:
+# соединения с нодами (TCP/TLS, DNS) переиспользуются между развёртываниями.
+# Закрывается при остановке приложения (см. main.py)
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Вернуть общую HTTP-сессию, создав её при первом обращении."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=4,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            ),
+            timeout=aiohttp.ClientTimeout(total=30, connect=5)
+        )
+    return _http_session
+
+
+async def close_http_session() -> None:
+    """Закрыть общую HTTP-сессию."""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
 class ConfigSyncService:
     """Сервис для синхронизации конфигурации между нодами."""
     
@@ -67,31 +127,22 @@ async def deploy_config(
                 detail="Нет доступных нод для развертывания"
             )
         
-        # Создаем задачи синхронизации для каждой ноды
-        sync_tasks = []
-        for node in db_nodes:
-            task = asyncio.create_task(
-                self._sync_config_to_node(
-                    config=db_config,
-                    node=node,
-                    force=force,
-                    restart_services=restart_services,
-                    user_id=current_user.id if current_user else None
-                )
-            )
-            sync_tasks.append(task)
-        
-        # Запускаем все задачи асинхронно
-        await asyncio.gather(*sync_tasks, return_exceptions=True)
+        await self._sync_config_to_nodes(
+            config=db_config,
+            nodes=db_nodes,
+            force=force,
+            restart_services=restart_services,
+            user_id=current_user.id if current_user else None
+        )
         
         # Получаем сводную информацию о синхронизации
         summary = await crud_config.get_config_sync_summary(self.db, config_id=db_config.id)
         
         return ConfigDeployResponse(
-            job_id=f"deploy_{db_config.id}_{int(datetime.utcnow().timestamp())}",
+            job_id=f"deploy_{db_config.id}_{time.time_ns() // 1_000_000_000}",
             status=summary["sync_status"],
             message=f"Развертывание конфигурации {db_config.version} запущено на {len(db_nodes)} нодах",
-            started_at=datetime.utcnow()
+            started_at=utcnow()
         )
     
     async def sync_all_nodes(
@@ -138,31 +189,38 @@ async def sync_all_nodes(
                 detail="Нет доступных нод для синхронизации"
             )
         
-        # Создаем задачи синхронизации для каждой ноды
-        sync_tasks = []
-        for node in db_nodes:
-            task = asyncio.create_task(
-                self._sync_config_to_node(
-                    config=db_config,
-                    node=node,
-                    force=force,
-                    restart_services=restart_services,
-                    user_id=current_user.id if current_user else None
-                )
+        # Серия сохранений подряд даёт одну рассылку после паузы
+        if settings.CONFIG_SYNC_DEBOUNCE_MS > 0:
+            _schedule_sync(
+                config_id=db_config.id,
+                force=force,
+                restart_services=restart_services,
+                user_id=current_user.id if current_user else None,
+                delay=settings.CONFIG_SYNC_DEBOUNCE_MS / 1000
+            )
+            return ConfigDeployResponse(
+                job_id=f"sync_all_{db_config.id}_{time.time_ns() // 1_000_000_000}",
+                status="pending",
+                message=f"Синхронизация конфигурации {db_config.version} запланирована на {len(db_nodes)} нодах",
+                started_at=utcnow()
             )
-            sync_tasks.append(task)
         
-        # Запускаем все задачи асинхронно
-        await asyncio.gather(*sync_tasks, return_exceptions=True)
+        await self._sync_config_to_nodes(
+            config=db_config,
+            nodes=db_nodes,
+            force=force,
+            restart_services=restart_services,
+            user_id=current_user.id if current_user else None
+        )
         
         # Получаем сводную информацию о синхронизации
         summary = await crud_config.get_config_sync_summary(self.db, config_id=db_config.id)
         
         return ConfigDeployResponse(
-            job_id=f"sync_all_{db_config.id}_{int(datetime.utcnow().timestamp())}",
+            job_id=f"sync_all_{db_config.id}_{time.time_ns() // 1_000_000_000}",
             status=summary["sync_status"],
             message=f"Синхронизация конфигурации {db_config.version} запущена на {len(db_nodes)} нодах",
-            started_at=datetime.utcnow()
+            started_at=utcnow()
         )
     
     async def get_sync_status(
@@ -190,19 +248,26 @@ async def get_sync_status(
             self.db, config_id=db_config.id, node_id=node_id
         )
         
+        # Последнее состояние всех нод — одним запросом (ноды уже загружены
+        # вместе с записями синхронизации)
+        node_states = await crud.node.get_latest_statuses(
+            self.db, node_ids=[sync.node_id for sync in sync_statuses]
+        )
+        
         # Преобразуем в формат ответа API
         result = []
-        for status in sync_statuses:
+        for sync in sync_statuses:
+            node_state = node_states.get(sync.node_id)
             result.append({
-                "node_id": status.node_id,
-                "node_name": status.node.name if status.node else None,
-                "status": status.status,
-                "last_sync": status.last_sync,
-                "last_attempt": status.last_attempt,
-                "error_message": status.error_message,
-                "retry_count": status.retry_count,
-                "is_online": status.node.is_online if status.node else False,
-                "node_status": status.node.status if status.node else None
+                "node_id": sync.node_id,
+                "node_name": sync.node.name if sync.node else None,
+                "status": sync.status,
+                "last_sync": sync.last_sync,
+                "last_attempt": sync.last_attempt,
+                "error_message": sync.error_message,
+                "retry_count": sync.retry_count,
+                "is_online": node_state is not None and node_state.status == "online",
+                "node_status": node_state.status if node_state else None
             })
         
         return result
@@ -228,10 +293,56 @@ async def get_config_sync_summary(
         
         return await crud_config.get_config_sync_summary(self.db, config_id=db_config.id)
     
+    async def _sync_config_to_nodes(
+        self,
+        config: ConfigVersion,
+        nodes: List[Node],
+        force: bool = False,
+        restart_services: bool = True,
+        user_id: Optional[int] = None
+    ) -> None:
+        """
+        Синхронизировать конфигурацию с несколькими нодами.
+        
+        Одновременно обрабатывается не более CONFIG_SYNC_MAX_CONCURRENCY
+        нод, чтобы большой парк нод не открывал сотни соединений разом.
+        Все запросы идут через общий пул соединений.
+        """
+        # Записи о синхронизации для всех нод — одним запросом до рассылки,
+        # а не отдельным запросом в каждой задаче
+        syncs = await crud_config.get_or_create_sync_statuses(
+            self.db, config_id=config.id, node_ids=[node.id for node in nodes]
+        )
+        # Полная конфигурация одинакова для всех нод — сериализуем и сжимаем
+        # её один раз
+        body = self._compress_body(self._full_sync_body(config, force, restart_services))
+        session = get_http_session()
+        semaphore = asyncio.Semaphore(settings.CONFIG_SYNC_MAX_CONCURRENCY)
+        
+        async def bounded(node: Node) -> bool:
+            # Ожидание блокировки ноды не занимает слот семафора
+            async with _node_locks[node.id], semaphore:
+                return await self._sync_config_to_node(
+                    config=config,
+                    node=node,
+                    session=session,
+                    sync=syncs[node.id],
+                    body=body,
+                    force=force,
+                    restart_services=restart_services,
+                    user_id=user_id
+                )
+        
+        # gather сам оборачивает корутины в задачи
+        await asyncio.gather(*(bounded(node) for node in nodes), return_exceptions=True)
+    
     async def _sync_config_to_node(
         self,
         config: ConfigVersion,
         node: Node,
+        session: aiohttp.ClientSession,
+        sync: Optional[ConfigSync] = None,
+        body: Optional[bytes] = None,
         force: bool = False,
         restart_services: bool = True,
         user_id: Optional[int] = None
@@ -242,6 +353,10 @@ async def _sync_config_to_node(
         Args:
             config: Объект конфигурации
             node: Объект ноды
+            session: HTTP-сессия (см. get_http_session)
+            sync: Запись о синхронизации; если не передана, ищется или создаётся
+            body: Сериализованный (и, возможно, сжатый) запрос с конфигурацией
+                целиком (см. _full_sync_body); если не передан, строится здесь
             force: Принудительная синхронизация, даже если версия совпадает
             restart_services: Перезапускать ли сервисы после синхронизации
             user_id: ID пользователя, инициировавшего синхронизацию
@@ -249,73 +364,71 @@ async def _sync_config_to_node(
         Returns:
             True, если синхронизация прошла успешно, иначе False
         """
-        # Создаем или получаем запись о синхронизации
-        sync = await self._get_or_create_sync(config.id, node.id)
+        # Создаем или получаем запись о синхронизации (один UPSERT)
+        if sync is None:
+            syncs = await crud_config.get_or_create_sync_statuses(
+                self.db, config_id=config.id, node_ids=[node.id]
+            )
+            sync = syncs[node.id]
         
+        # Статус записывается один раз, по итогу синхронизации
         try:
-            # Обновляем статус на "в процессе"
-            await crud_config.update_sync_status(
-                self.db,
-                sync_id=sync.id,
-                status=SyncStatus.IN_PROGRESS,
-                error_message=None
-            )
+            # URL и заголовки ноды вычисляются один раз на объект Node
+            node_api_url = node.api_url
+            headers = node.auth_headers
             
-            # Проверяем, нужно ли обновлять конфигурацию
-            if not force and sync.status == SyncStatus.COMPLETED:
+            # Если на ноде уже эта конфигурация (совпала контрольная сумма),
+            # саму конфигурацию не передаём. Статус COMPLETED в БД для этого
+            # не годится: после отката на старую версию её запись остаётся
+            # COMPLETED, хотя нода работает на новой
+            if not force and await self._node_checksum(session, node_api_url, headers) == config.checksum:
+                await self._set_sync_status(sync, SyncStatus.COMPLETED)
                 logger.info(
-                    f"Конфигурация {config.version} уже синхронизирована с нодой {node.name} "
-                    f"(ID: {node.id}), пропускаем"
+                    f"Нода {node.name} (ID: {node.id}) уже использует конфигурацию "
+                    f"{config.version}, пропускаем отправку"
                 )
                 return True
             
-            # Получаем URL API ноды
-            node_api_url = node.api_url.rstrip('/')
-            sync_url = f"{node_api_url}/api/v1/config/sync"
-            
-            # Подготавливаем данные для отправки
-            payload = {
-                "version": config.version,
-                "config": config.config,
-                "checksum": config.checksum,
-                "restart_services": restart_services,
-                "force": force
-            }
+            # Если нода сообщает хеши разделов, отправляем только изменившиеся
+            # разделы и список удалённых; иначе — конфигурацию целиком
+            node_sections = None
+            if not force:
+                node_sections = await self._node_section_hashes(session, node_api_url, headers)
+            diff = self._diff_sections(config, node_sections) if node_sections is not None else None
+            if diff is not None:
+                changed, removed = diff
+                data = self._compress_body(orjson.dumps({
+                    "version": config.version,
+                    "checksum": config.checksum,
+                    "restart_services": restart_services,
+                    "force": force,
+                    "sections": {key: config.config[key] for key in changed},
+                    "removed_sections": removed
+                }))
+            else:
+                data = body
+                if data is None:
+                    data = self._compress_body(self._full_sync_body(config, force, restart_services))
+            if data.startswith(ZSTD_MAGIC):
+                headers = {**headers, "Content-Encoding": "zstd"}
             
             # Отправляем запрос на синхронизацию
-            headers = {
-                "Authorization": f"Bearer {node.auth_token}",
-                "Content-Type": "application/json"
-            }
+            status_code, response_body = await self._post_sync(session, node.sync_url, data, headers)
+            if status_code != 200:
+                raise HTTPException(
+                    status_code=status_code,
+                    detail=f"Ошибка при синхронизации с нодой {node.name}: {response_body.decode(errors='replace')}"
+                )
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    sync_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=30
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise HTTPException(
-                            status_code=response.status,
-                            detail=f"Ошибка при синхронизации с нодой {node.name}: {error_text}"
-                        )
-                    
-                    result = await response.json()
-                    if not result.get("success", False):
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=result.get("message", "Неизвестная ошибка при синхронизации")
-                        )
+            result = orjson.loads(response_body)
+            if not result.get("success", False):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=result.get("message", "Неизвестная ошибка при синхронизации")
+                )
             
             # Обновляем статус на "завершено"
-            await crud_config.update_sync_status(
-                self.db,
-                sync_id=sync.id,
-                status=SyncStatus.COMPLETED,
-                error_message=None
-            )
+            await self._set_sync_status(sync, SyncStatus.COMPLETED)
             
             logger.info(
                 f"Конфигурация {config.version} успешно синхронизирована с нодой {node.name} "
@@ -333,44 +446,180 @@ async def _sync_config_to_node(
             )
             
             # Обновляем статус на "ошибка"
+            await self._set_sync_status(sync, SyncStatus.FAILED, error_message=error_msg)
+            
+            return False
+    
+    async def _post_sync(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        data: bytes,
+        headers: Dict[str, str]
+    ) -> Tuple[int, bytes]:
+        """
+        Отправить запрос синхронизации с повторами (см. SYNC_ATTEMPTS).
+        
+        Returns:
+            Код ответа и тело последнего ответа
+            
+        Raises:
+            aiohttp.ClientConnectionError, asyncio.TimeoutError: если нода
+            не ответила ни на одну попытку
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SYNC_DEADLINE
+        
+        for attempt in range(SYNC_ATTEMPTS):
+            timeout = aiohttp.ClientTimeout(
+                total=min(SYNC_ATTEMPT_TIMEOUT, deadline - loop.time()),
+                connect=SYNC_CONNECT_TIMEOUT
+            )
+            try:
+                async with session.post(url, data=data, headers=headers, timeout=timeout) as response:
+                    outcome = response.status, await response.read()
+                if outcome[0] < 500:
+                    return outcome
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                outcome = e
+            
+            pause = random.uniform(0, min(SYNC_BACKOFF_CAP, SYNC_BACKOFF_BASE * 2 ** attempt))
+            if attempt == SYNC_ATTEMPTS - 1 or loop.time() + pause >= deadline:
+                break
+            logger.debug(f"Повтор синхронизации {url} через {pause:.2f} с: {outcome}")
+            await asyncio.sleep(pause)
+        
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    async def _set_sync_status(
+        self, sync: ConfigSync, status: SyncStatus, error_message: Optional[str] = None
+    ) -> None:
+        """
+        Записать итоговый статус синхронизации ноды.
+        
+        Задачи рассылки работают параллельно, а AsyncSession не допускает
+        одновременных запросов, поэтому запись идёт под _sync_lock. Эта
+        блокировка защищает сессию, а не ноду, и держится только на время
+        одного UPDATE (см. _node_locks).
+        """
+        async with self._sync_lock:
             await crud_config.update_sync_status(
                 self.db,
                 sync_id=sync.id,
-                status=SyncStatus.FAILED,
-                error_message=error_msg,
-                increment_retry=True
+                status=status,
+                error_message=error_message,
+                increment_retry=status == SyncStatus.FAILED
             )
-            
-            return False
     
-    async def _get_or_create_sync(
-        self, config_id: int, node_id: int
-    ) -> ConfigSync:
+    async def _node_checksum(
+        self,
+        session: aiohttp.ClientSession,
+        node_api_url: str,
+        headers: Dict[str, str]
+    ) -> Optional[str]:
         """
-        Получить или создать запись о синхронизации.
+        Узнать контрольную сумму конфигурации, применённой на ноде.
         
         Args:
-            config_id: ID конфигурации
-            node_id: ID ноды
+            session: HTTP-сессия
+            node_api_url: Базовый URL API ноды
+            headers: Заголовки запроса (авторизация)
             
         Returns:
-            Объект ConfigSync
+            Контрольная сумма или None, если нода её не сообщила
+            (старая версия агента, ошибка, таймаут) — тогда конфигурация
+            отправляется как обычно
         """
-        # Пытаемся найти существующую запись
-        sync_statuses = await crud_config.get_sync_status(
-            self.db, config_id=config_id, node_id=node_id
-        )
+        try:
+            async with session.get(
+                f"{node_api_url}/api/v1/config/checksum",
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                if response.status != 200:
+                    return None
+                result = await response.json(loads=orjson.loads)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug(f"Не удалось получить контрольную сумму конфигурации с {node_api_url}: {e}")
+            return None
         
-        if sync_statuses:
-            return sync_statuses[0]
+        checksum = result.get("checksum") if isinstance(result, dict) else None
+        return checksum if isinstance(checksum, str) else None
+    
+    async def _node_section_hashes(
+        self,
+        session: aiohttp.ClientSession,
+        node_api_url: str,
+        headers: Dict[str, str]
+    ) -> Optional[Dict[str, str]]:
+        """
+        Получить хеши разделов конфигурации, применённой на ноде.
         
-        # Если запись не найдена, создаем новую
-        return await crud_config.create_sync_status(
-            self.db,
-            config_id=config_id,
-            node_id=node_id,
-            status=SyncStatus.PENDING
-        )
+        Returns:
+            Словарь раздел -> хеш или None, если нода не поддерживает
+            частичную синхронизацию или не ответила
+        """
+        try:
+            async with session.get(
+                f"{node_api_url}/api/v1/config/section-hashes",
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                if response.status != 200:
+                    return None
+                result = await response.json(loads=orjson.loads)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug(f"Не удалось получить хеши разделов конфигурации с {node_api_url}: {e}")
+            return None
+        
+        if not isinstance(result, dict) or not all(isinstance(value, str) for value in result.values()):
+            return None
+        return result
+    
+    @staticmethod
+    def _full_sync_body(config: ConfigVersion, force: bool, restart_services: bool) -> bytes:
+        """Тело запроса синхронизации с конфигурацией целиком (JSON)."""
+        return orjson.dumps({
+            "version": config.version,
+            "checksum": config.checksum,
+            "restart_services": restart_services,
+            "force": force,
+            "config": config.config
+        })
+    
+    @staticmethod
+    def _compress_body(data: bytes) -> bytes:
+        """
+        Сжать тело запроса zstd, если это включено (CONFIG_SYNC_ZSTD),
+        пакет zstandard установлен и тело больше CONFIG_SYNC_COMPRESS_MIN_BYTES.
+        """
+        if (
+            not settings.CONFIG_SYNC_ZSTD
+            or _zstd_compressor is None
+            or len(data) <= settings.CONFIG_SYNC_COMPRESS_MIN_BYTES
+        ):
+            return data
+        return _zstd_compressor.compress(data)
+    
+    @staticmethod
+    def _diff_sections(
+        config: ConfigVersion, node_sections: Dict[str, str]
+    ) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        Сравнить хеши разделов конфигурации с хешами на ноде.
+        
+        Returns:
+            (изменённые или новые разделы, удалённые разделы) или None, если
+            изменились все разделы и частичная отправка ничего не даёт
+        """
+        section_hashes = config.section_hashes or ConfigVersion.compute_section_hashes(config.config)
+        changed = [key for key, digest in section_hashes.items() if node_sections.get(key) != digest]
+        removed = [key for key in node_sections if key not in section_hashes]
+        if len(changed) == len(section_hashes):
+            return None
+        return changed, removed
     
     async def _get_config_version(
         self, config_version: Union[str, int, ConfigVersion]
@@ -416,14 +665,98 @@ async def _get_nodes_to_sync(
             )
             return result.scalars().all()
         
-        # Преобразуем список ID/объектов в список объектов Node
+        # Ноды, заданные по ID, загружаются одним запросом
+        ids = [node for node in nodes if isinstance(node, int)]
+        by_id: Dict[int, Node] = {}
+        if ids:
+            result = await self.db.execute(
+                select(Node).where(Node.id.in_(ids), Node.is_active.is_(True))
+            )
+            by_id = {db_node.id: db_node for db_node in result.scalars()}
+        
+        # Порядок нод сохраняется как в запросе
         db_nodes = []
         for node in nodes:
             if isinstance(node, Node):
                 db_nodes.append(node)
-            elif isinstance(node, int):
-                db_node = await self.db.get(Node, node)
-                if db_node and db_node.is_active:
-                    db_nodes.append(db_node)
+            elif isinstance(node, int) and node in by_id:
+                db_nodes.append(by_id[node])
         
         return db_nodes
+
+
+# Отложенная синхронизация всех нод (см. CONFIG_SYNC_DEBOUNCE_MS): вызовы
+# sync_all_nodes в пределах окна схлопываются в одну рассылку последней
+# запрошенной версии. Рассылка идёт в своей сессии БД, так как сессия
+# запроса к этому моменту уже закрыта
+_pending_sync: Optional[Dict[str, Any]] = None
+_pending_timer: Optional[asyncio.TimerHandle] = None
+_pending_tasks: Set[asyncio.Task] = set()
+
+
+def _schedule_sync(
+    config_id: int,
+    force: bool,
+    restart_services: bool,
+    user_id: Optional[int],
+    delay: float
+) -> None:
+    """Запланировать синхронизацию всех нод, перезапустив окно ожидания."""
+    global _pending_sync, _pending_timer
+    previous = _pending_sync or {}
+    _pending_sync = {
+        "config_id": config_id,
+        # Флаги схлопнутых вызовов не теряются
+        "force": force or previous.get("force", False),
+        "restart_services": restart_services or previous.get("restart_services", False),
+        "user_id": user_id
+    }
+    if _pending_timer is not None:
+        _pending_timer.cancel()
+    _pending_timer = asyncio.get_running_loop().call_later(delay, _start_pending_sync)
+
+
+def _start_pending_sync() -> None:
+    """Запустить запланированную синхронизацию в фоновой задаче."""
+    global _pending_sync, _pending_timer
+    pending, _pending_sync, _pending_timer = _pending_sync, None, None
+    if pending is None:
+        return
+    task = asyncio.create_task(_run_sync(**pending))
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
+
+
+async def _run_sync(
+    config_id: int, force: bool, restart_services: bool, user_id: Optional[int]
+) -> None:
+    """Синхронизировать конфигурацию на всех активных нодах в отдельной сессии БД."""
+    # Как и в запросе API, время фиксируется один раз на всю рассылку
+    token = set_now()
+    try:
+        async with async_session_factory() as db:
+            service = ConfigSyncService(db)
+            db_config = await crud_config.get(db, id=config_id)
+            db_nodes = await service._get_nodes_to_sync()
+            if db_config is None or not db_nodes:
+                return
+            await service._sync_config_to_nodes(
+                config=db_config,
+                nodes=db_nodes,
+                force=force,
+                restart_services=restart_services,
+                user_id=user_id
+            )
+    except Exception as e:
+        logger.error(f"Ошибка отложенной синхронизации конфигурации {config_id}: {e}", exc_info=True)
+    finally:
+        reset_now(token)
+
+
+async def flush_pending_sync() -> None:
+    """Запустить отложенную синхронизацию без ожидания окна и дождаться рассылок."""
+    if _pending_timer is not None:
+        _pending_timer.cancel()
+    _start_pending_sync()
+    if _pending_tasks:
+        await asyncio.gather(*_pending_tasks, return_exceptions=True)
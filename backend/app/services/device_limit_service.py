@@ -1,5 +1,4 @@
 import logging
-import hashlib
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
@@ -9,7 +8,8 @@
 from app.core.config import settings
 from app.models.device import Device
 from app.models.user import User
-from app.crud.crud_device import crud_device
+from app.crud.crud_device import device as crud_device
+from app.services.device_service import forget_device_state, get_active_device_state
 
 logger = logging.getLogger(__name__)
 
@@ -43,11 +43,7 @@ def generate_device_id(self, request: Request, user_agent: str) -> str:
         ip = request.client.host if request.client else "unknown"
         accept_language = request.headers.get("accept-language", "")
         
-        # Создаем строку для хеширования
-        device_info = f"{ip}:{user_agent}:{accept_language}"
-        
-        # Генерируем хеш
-        return hashlib.sha256(device_info.encode()).hexdigest()
+        return Device.compute_device_id(ip, user_agent, accept_language)
     
     async def check_device_limit(
         self, 
@@ -81,13 +77,9 @@ async def check_device_limit(
         if not device_limit or device_limit <= 0:
             return {"allowed": True, "message": "No device limit set for user"}
         
-        # Получаем все активные устройства пользователя
-        devices = await crud_device.get_multi_by_owner(
-            db, owner_id=user.id, is_active=True
-        )
-        
-        # Проверяем, есть ли уже такое устройство
-        device_exists = any(device.device_id == device_id for device in devices)
+        # Число активных устройств и наличие среди них этого — одним запросом,
+        # без загрузки самих устройств; повторные проверки берутся из кэша
+        current_devices, device_exists = await get_active_device_state(db, user.id, device_id)
         
         # Если устройство уже существует, разрешаем доступ
         if device_exists:
@@ -95,16 +87,16 @@ async def check_device_limit(
                 "allowed": True, 
                 "message": "Device already registered",
                 "device_limit": device_limit,
-                "current_devices": len(devices)
+                "current_devices": current_devices
             }
         
         # Проверяем, не превышен ли лимит
-        if len(devices) >= device_limit:
+        if current_devices >= device_limit:
             # Если есть запрос, логируем попытку превышения лимита
             if request:
                 logger.warning(
                     f"User {user.id} ({user.email}) reached device limit. "
-                    f"Current devices: {len(devices)}, Limit: {device_limit}"
+                    f"Current devices: {current_devices}, Limit: {device_limit}"
                 )
             
             # Возвращаем ошибку с сообщением
@@ -114,7 +106,7 @@ async def check_device_limit(
                     "message": self.max_devices_message,
                     "code": "device_limit_reached",
                     "device_limit": device_limit,
-                    "current_devices": len(devices)
+                    "current_devices": current_devices
                 }
             )
         
@@ -122,7 +114,7 @@ async def check_device_limit(
             "allowed": True,
             "message": "Device limit not reached",
             "device_limit": device_limit,
-            "current_devices": len(devices) + 1  # +1 для нового устройства
+            "current_devices": current_devices + 1  # +1 для нового устройства
         }
     
     async def register_device(
@@ -157,7 +149,7 @@ async def register_device(
         
         if existing_device:
             # Если устройство уже зарегистрировано, обновляем информацию
-            return await crud_device.update(
+            device = await crud_device.update(
                 db, 
                 db_obj=existing_device, 
                 obj_in={
@@ -167,6 +159,8 @@ async def register_device(
                     **device_info
                 }
             )
+            forget_device_state(user.id)
+            return device
         
         # Создаем новое устройство
         device_in = {
@@ -185,7 +179,9 @@ async def register_device(
             }
         }
         
-        return await crud_device.create(db, obj_in=device_in)
+        device = await crud_device.create(db, obj_in=device_in)
+        forget_device_state(user.id)
+        return device
     
     async def get_user_devices(
         self, 
@@ -244,7 +240,9 @@ async def remove_device(
                 detail="Not enough permissions to remove this device"
             )
         
-        return await crud_device.remove(db, id=device_id)
+        device = await crud_device.remove(db, id=device_id)
+        forget_device_state(device.user_id)
+        return device
 
 # Создаем экземпляр сервиса
 device_limit_service = DeviceLimitService()
@@ -4,7 +4,6 @@
 import logging
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple, Union
-import hashlib
 
 from fastapi import HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,10 +11,39 @@
 from app import crud, models, schemas
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
+from app.core.ttl_cache import TTLCache
 from app.models.device import Device
 
 logger = logging.getLogger(__name__)
 
+# (user_id, device_id) -> (user_id, число активных устройств). Кэшируются
+# только уже зарегистрированные устройства: для них проверка лимита всегда
+# проходит. Кэш локален для процесса, поэтому состояние «не зарегистрировано»
+# не кэшируется — иначе другие воркеры принимали бы новые устройства по
+# устаревшему счётчику и превышали лимит
+_device_state_cache = TTLCache(maxsize=10000, ttl=settings.HWID_DEVICE_LIMIT_CACHE_TTL)
+
+
+async def get_active_device_state(db: AsyncSession, user_id: int, device_id: str) -> Tuple[int, bool]:
+    """Состояние устройств пользователя для проверки лимита (с кэшем для известных устройств)."""
+    key = (user_id, device_id)
+    cached = _device_state_cache.get(key)
+    if cached is not None:
+        return cached[1], True
+
+    current_devices, device_exists = await crud.device.get_active_device_state(
+        db, user_id=user_id, device_id=device_id
+    )
+    if device_exists:
+        _device_state_cache.set(key, (user_id, current_devices))
+    return current_devices, device_exists
+
+
+def forget_device_state(user_id: int) -> None:
+    """Сбросить кэш состояния устройств пользователя после их изменения."""
+    _device_state_cache.pop_where(lambda state: state[0] == user_id)
+
+
 class DeviceService:
     """
     Сервис для управления устройствами пользователей.
@@ -47,11 +75,7 @@ def generate_device_id(self, request: Request, user_agent: str) -> str:
         ip = request.client.host if request.client else "unknown"
         accept_language = request.headers.get("accept-language", "")
         
-        # Создаем строку для хеширования
-        device_info = f"{ip}:{user_agent}:{accept_language}"
-        
-        # Генерируем хеш
-        return hashlib.sha256(device_info.encode()).hexdigest()
+        return Device.compute_device_id(ip, user_agent, accept_language)
     
     async def check_device_limit(
         self, 
@@ -90,25 +114,23 @@ async def check_device_limit(
         if not device_limit or device_limit <= 0:
             return True
         
-        # Получаем все активные устройства пользователя
-        devices = await crud.device.get_multi_by_owner(
-            self.db, user_id=user_id, is_active=True
+        # Число активных устройств и наличие среди них этого — одним запросом,
+        # без загрузки самих устройств; повторные проверки берутся из кэша
+        current_devices, device_exists = await get_active_device_state(
+            self.db, user_id, device_id
         )
         
-        # Проверяем, есть ли уже такое устройство
-        device_exists = any(device.device_id == device_id for device in devices)
-        
         # Если устройство уже существует, разрешаем доступ
         if device_exists:
             return True
         
         # Проверяем, не превышен ли лимит
-        if len(devices) >= device_limit:
+        if current_devices >= device_limit:
             # Если есть запрос, логируем попытку превышения лимита
             if request:
                 logger.warning(
                     f"Пользователь {user.id} ({user.email}) достиг лимита устройств. "
-                    f"Текущие устройства: {len(devices)}, Лимит: {device_limit}"
+                    f"Текущие устройства: {current_devices}, Лимит: {device_limit}"
                 )
             
             # Возвращаем ошибку с сообщением
@@ -118,7 +140,7 @@ async def check_device_limit(
                     "message": self.max_devices_message,
                     "code": "device_limit_reached",
                     "device_limit": device_limit,
-                    "current_devices": len(devices)
+                    "current_devices": current_devices
                 }
             )
         
@@ -178,7 +200,6 @@ async def register_device(
                 device_data = device_in.dict()
                 device_data["user_id"] = user.id
                 device_data["ip_address"] = ip_address
-                device_data["created_at"] = datetime.utcnow()
                 device_data["last_active"] = datetime.utcnow()
                 device_data["is_active"] = True
                 
@@ -189,6 +210,7 @@ async def register_device(
                 device = await crud.device.create(self.db, obj_in=device_data)
             
             await self.db.commit()
+            forget_device_state(user.id)
             await self.db.refresh(device)
             
             return schemas.Device.from_orm(device)
@@ -257,7 +279,8 @@ async def get_user_devices(
                 "message": self.max_devices_message if self.hwid_enabled and device_limit > 0 and total >= device_limit else None
             }
             
-            return [schemas.Device.from_orm(device) for device in devices], total, limit_info
+            # Строки прочитаны из БД — собираем схемы без повторной валидации
+            return [schemas.construct_from_orm(schemas.Device, device) for device in devices], total, limit_info
             
         except HTTPException:
             raise
@@ -353,6 +376,7 @@ async def update_device(
             )
             
             await self.db.commit()
+            forget_device_state(device.user_id)
             await self.db.refresh(device)
             
             return schemas.Device.from_orm(device)
@@ -399,6 +423,7 @@ async def delete_device(
             # Удаляем устройство
             await crud.device.remove(self.db, id=device_id)
             await self.db.commit()
+            forget_device_state(device.user_id)
             
             return schemas.Device.from_orm(device)
             
@@ -437,6 +462,7 @@ async def revoke_device(
                 return None
                 
             await self.db.commit()
+            forget_device_state(device.user_id)
             await self.db.refresh(device)
             
             return schemas.Device.from_orm(device)
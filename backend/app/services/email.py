@@ -1,15 +1,19 @@
 """
 Сервис для отправки электронных писем.
 """
-import smtplib
 import ssl
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Optional
 
+import aiosmtplib
+
 from app.core.config import settings
 from app.core.logging import logger
 
+# Контекст TLS создаётся один раз: создание читает системные сертификаты
+_ssl_context = ssl.create_default_context()
+
 class EmailService:
     """Сервис для отправки электронных писем."""
     
@@ -57,17 +61,20 @@ async def send_email(
         msg.attach(part2)
         
         try:
-            # Создаем безопасное соединение с сервером
-            context = ssl.create_default_context()
-            
-            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
+            # Асинхронный клиент SMTP не блокирует цикл событий на время
+            # соединения, TLS-рукопожатия и передачи письма
+            async with aiosmtplib.SMTP(
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                start_tls=False
+            ) as server:
                 if settings.SMTP_TLS:
-                    server.starttls(context=context)
+                    await server.starttls(tls_context=_ssl_context)
                 
                 if settings.SMTP_USER and settings.SMTP_PASSWORD:
-                    server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+                    await server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
                 
-                server.send_message(msg)
+                await server.send_message(msg)
                 logger.info(f"Email sent to {to_email}")
                 return True
                 
@@ -0,0 +1,141 @@
+"""
+Фоновая пакетная запись системных событий.
+
+Обработчики запросов не ждут записи в БД: события складываются в очередь,
+а фоновая задача сбрасывает их пачками. В PostgreSQL (asyncpg) пачка
+записывается через COPY, в остальных случаях — одним INSERT
+(см. CRUDSystemEvent.create_events).
+"""
+import logging
+import uuid
+from typing import Any, Dict, List, Optional
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import crud
+from app.database import async_session_factory
+from app.models.system_event import SystemEvent
+from app.services.batch_writer import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+# Колонки, заполняемые при COPY; id, timestamp и created_at
+# заполняются значениями по умолчанию на стороне БД
+COPY_COLUMNS = [
+    "uuid",
+    "level",
+    "message",
+    "source",
+    "category",
+    "user_id",
+    "node_id",
+    "ip_address",
+    "details",
+]
+
+
+class SystemEventWriter(BatchWriter):
+    """Буферизованная фоновая запись системных событий."""
+
+    description = "системных событий"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session_factory,
+        batch_size: int = 100,
+        flush_interval: float = 0.1,
+        max_queue_size: int = 10000
+    ):
+        super().__init__(
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue_size=max_queue_size
+        )
+        self._session_factory = session_factory
+        self._copy_supported = True
+
+    def enqueue(
+        self,
+        level: str,
+        message: str,
+        source: str,
+        category: Optional[str] = None,
+        user_id: Optional[int] = None,
+        node_id: Optional[int] = None,
+        ip_address: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Поставить событие в очередь на запись без ожидания БД.
+
+        Returns:
+            False, если запись не запущена или очередь переполнена —
+            в этом случае вызывающий код должен записать событие сам
+        """
+        if not self._is_running:
+            return False
+
+        return self._put({
+            "level": level,
+            "message": message,
+            "source": source,
+            "category": category,
+            "user_id": user_id,
+            "node_id": node_id,
+            "ip_address": ip_address,
+            "details": details or {},
+        })
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """Записывает пачку событий в БД."""
+        async with self._session_factory() as session:
+            if self._copy_supported and await self._copy_events(session, batch):
+                return len(batch)
+            await crud.system_event.create_events(session, events=batch)
+            return len(batch)
+
+    async def _copy_events(self, session: AsyncSession, batch: List[Dict[str, Any]]) -> bool:
+        """
+        Записывает пачку через COPY (только PostgreSQL + asyncpg).
+
+        Returns:
+            True, если пачка записана; False, если COPY недоступен
+        """
+        connection = await session.connection()
+        if connection.dialect.driver != "asyncpg":
+            self._copy_supported = False
+            return False
+
+        records = [
+            (
+                uuid.uuid4(),
+                event["level"],
+                event["message"],
+                event["source"],
+                event["category"],
+                event["user_id"],
+                event["node_id"],
+                event["ip_address"],
+                orjson.dumps(event["details"]).decode(),
+            )
+            for event in batch
+        ]
+
+        try:
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                SystemEvent.__tablename__,
+                records=records,
+                columns=COPY_COLUMNS
+            )
+            await session.commit()
+        except Exception as e:
+            logger.warning(f"COPY системных событий не удался, используем INSERT: {e}")
+            await session.rollback()
+            return False
+        return True
+
+
+# Общий экземпляр для приложения; запускается и останавливается в main.py
+system_event_writer = SystemEventWriter()
@@ -195,7 +195,7 @@ async def _prepare_node_config(self, node: Node) -> Dict:
         return {
             "node_id": node.id,
             "fqdn": node.fqdn,
-            "ip_address": node.ip_address,
+            "ip_address": str(node.ip_address),
             "api_port": node.api_port,
             "api_secret": node.auth_token,
             "config_version": node.config_version,
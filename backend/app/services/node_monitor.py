@@ -253,6 +253,21 @@ async def _log_event(
         details: Optional[Dict[str, Any]] = None
     ) -> None:
         """Логирование событий в системе."""
+        from app.services.event_writer import system_event_writer
+        
+        # Событие пишется в фоне; напрямую — только если фоновая запись не запущена
+        if system_event_writer.enqueue(
+            level=level,
+            message=message,
+            source=source,
+            category=category,
+            node_id=node_id,
+            user_id=user_id,
+            ip_address=ip_address,
+            details=details
+        ):
+            return
+        
         try:
             from app import crud
             await crud.system_event.create_event(
@@ -344,7 +359,7 @@ async def _prepare_node_config(self, node: models.Node) -> Dict[str, Any]:
         config = {
             "node_id": node.id,
             "fqdn": node.fqdn,
-            "ip_address": node.ip_address,
+            "ip_address": str(node.ip_address),
             "location": node.location,
             "is_active": node.is_active,
             "xray_config": xray_config,
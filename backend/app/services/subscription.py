@@ -20,7 +20,7 @@ def __init__(self, db: AsyncSession):
     
     async def create_subscription_plan(
         self,
-        plan_in: schemas.SubscriptionPlanCreate,
+        plan_in: schemas.PlanCreate,
         current_user: models.User
     ) -> models.Plan:
         """Создает новый тарифный план."""
@@ -51,7 +51,7 @@ async def create_subscription_plan(
     async def update_subscription_plan(
         self,
         plan_id: int,
-        plan_in: schemas.SubscriptionPlanUpdate,
+        plan_in: schemas.PlanUpdate,
         current_user: models.User
     ) -> models.Plan:
         """Обновляет тарифный план."""
@@ -0,0 +1,57 @@
+"""
+Буферизованная запись логов трафика.
+
+Логи трафика — самая объёмная таблица: вместо коммита на каждую сессию
+записи копятся в очереди и сбрасываются пачками по batch_size строк
+или раз в flush_interval секунд (см. BatchWriter и TrafficLog.bulk_copy).
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database import async_session_factory
+from app.models.traffic import TrafficLog
+from app.services.batch_writer import BatchWriter
+
+
+class TrafficLogBuffer(BatchWriter):
+    """Очередь логов трафика с фоновой пакетной записью."""
+
+    description = "логов трафика"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session_factory,
+        batch_size: int = 10_000,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 100_000
+    ):
+        super().__init__(
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue_size=max_queue_size
+        )
+        self._session_factory = session_factory
+
+    def append(self, event: Dict[str, Any]) -> bool:
+        """
+        Поставить лог трафика в очередь на запись.
+
+        Args:
+            event: Поля лога в формате TrafficLog.bulk_copy
+
+        Returns:
+            False, если очередь переполнена и лог не принят
+        """
+        return self._put(event)
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """Записывает пачку логов в одной транзакции."""
+        async with self._session_factory() as session:
+            written = await TrafficLog.bulk_copy(session, batch)
+            await session.commit()
+            return written
+
+
+# Общий экземпляр для приложения; запускается и останавливается в main.py
+traffic_buffer = TrafficLogBuffer()
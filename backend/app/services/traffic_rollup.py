@@ -0,0 +1,316 @@
+"""
+Периодическая агрегация логов трафика в TrafficRollup.
+
+Раз в interval секунд пересчитываются почасовые агрегаты, затронутые
+логами, записанными после прошлого запуска, затем из них — дневные
+и месячные, после чего обновляется data_used в активных TrafficLimit.
+Новые логи определяются по курсору TrafficRollupCursor на TrafficLog.id:
+лог длинной сессии может попасть в БД намного позже своего started_at.
+Пересчёт целых корзин с заменой значений идемпотентен, поэтому курсор
+сдвигается с запасом late_window на ещё не зафиксированные транзакции.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import Select, literal, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.sql import func
+
+from app.crud.crud_system_event import system_event as crud_system_event
+from app.database import async_session_factory
+from app.models.traffic import (
+    ROLLUP_PERIODS,
+    TrafficLimit,
+    TrafficLog,
+    TrafficRollup,
+    TrafficRollupCursor,
+)
+
+logger = logging.getLogger(__name__)
+
+# Формат усечения даты для SQLite; совпадает с форматом хранения DateTime
+SQLITE_BUCKET_FORMATS = {
+    'hour': '%Y-%m-%d %H:00:00.000000',
+    'day': '%Y-%m-%d 00:00:00.000000',
+    'month': '%Y-%m-01 00:00:00.000000',
+}
+
+
+def _bucket(dialect_name: str, period_type: str, column):
+    """Выражение начала корзины period_type для колонки времени."""
+    if dialect_name == 'sqlite':
+        return func.strftime(literal_column(f"'{SQLITE_BUCKET_FORMATS[period_type]}'"), column)
+    # Период встраивается в SQL литералом: одинаковое выражение в SELECT
+    # и GROUP BY не должно зависеть от позиций параметров
+    return func.date_trunc(literal_column(f"'{period_type}'"), column)
+
+
+def _truncate(value: datetime, period_type: str) -> datetime:
+    """Начало корзины period_type, в которую попадает value."""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if period_type in ('day', 'month'):
+        value = value.replace(hour=0)
+    if period_type == 'month':
+        value = value.replace(day=1)
+    return value
+
+
+class TrafficRollupAggregator:
+    """Фоновое обновление агрегатов трафика."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session_factory,
+        interval: float = 300,
+        late_window: timedelta = timedelta(hours=1)
+    ):
+        self._session_factory = session_factory
+        self.interval = interval
+        self.late_window = late_window
+        self._aggregator_task: Optional[asyncio.Task] = None
+        self._is_running = False
+
+    @property
+    def is_running(self) -> bool:
+        """Запущена ли фоновая агрегация."""
+        return self._is_running
+
+    async def start(self) -> None:
+        """Запускает периодическую агрегацию."""
+        if self._is_running:
+            logger.warning("Агрегация трафика уже запущена")
+            return
+
+        self._is_running = True
+        self._aggregator_task = asyncio.create_task(self._aggregator_loop())
+        logger.info(f"Агрегация трафика запущена с интервалом {self.interval} секунд")
+
+    async def stop(self) -> None:
+        """Останавливает периодическую агрегацию."""
+        if not self._is_running:
+            return
+
+        self._is_running = False
+        if self._aggregator_task:
+            self._aggregator_task.cancel()
+            try:
+                await self._aggregator_task
+            except asyncio.CancelledError:
+                pass
+
+        logger.info("Агрегация трафика остановлена")
+
+    async def _aggregator_loop(self) -> None:
+        while True:
+            try:
+                await self.ensure_partitions()
+            except Exception as e:
+                logger.error(f"Ошибка создания партиций: {e}")
+
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Ошибка агрегации трафика: {e}")
+
+            await asyncio.sleep(self.interval)
+
+    async def ensure_partitions(self) -> None:
+        """
+        Заранее создаёт партиции traffic_logs и system_events на следующий месяц.
+
+        Агрегатор работает постоянно, поэтому партиции обслуживает он.
+        Партиции создаются в отдельной транзакции: ошибка агрегации
+        не должна откатывать их создание.
+        """
+        async with self._session_factory() as session:
+            await TrafficLog.ensure_partitions(session)
+            await session.commit()
+            await crud_system_event.ensure_partitions(session)
+
+    async def run_once(self) -> Optional[datetime]:
+        """
+        Пересчитывает агрегаты и лимиты в одной транзакции.
+
+        Returns:
+            Начало первой пересчитанной почасовой корзины
+            (None — пересчитана вся история или новых логов нет)
+        """
+        async with self._session_factory() as session:
+            dialect_name = session.bind.dialect.name
+            cursor = await self._get_cursor(session)
+            since, has_logs = await self._get_since(session, cursor)
+
+            if has_logs:
+                # Пересчитываются только пользователи с новыми логами
+                user_ids = None
+                if cursor is not None:
+                    user_ids = (
+                        select(TrafficLog.user_id)
+                        .where(TrafficLog.id > cursor)
+                        .distinct()
+                    )
+                await self._rollup_logs(session, dialect_name, since, user_ids)
+                for period_type in ROLLUP_PERIODS[1:]:
+                    await self._rollup_hours(session, dialect_name, period_type, since, user_ids)
+                await self._save_cursor(session, cursor)
+            await self._refresh_limits(session)
+
+            await session.commit()
+            return since
+
+    async def _get_cursor(self, session: AsyncSession) -> Optional[int]:
+        """TrafficLog.id, до которого логи уже учтены (None — агрегатов ещё нет)."""
+        result = await session.execute(
+            select(TrafficRollupCursor.last_log_id).where(TrafficRollupCursor.id == 1)
+        )
+        return result.scalar_one_or_none()
+
+    async def _get_since(
+        self,
+        session: AsyncSession,
+        cursor: Optional[int]
+    ) -> Tuple[Optional[datetime], bool]:
+        """
+        Начало корзины, с которой нужно пересчитывать почасовые агрегаты.
+
+        Returns:
+            Час самого раннего started_at среди логов после курсора
+            (None — полный пересчёт) и признак наличия таких логов
+        """
+        query = select(func.min(TrafficLog.started_at), func.count(TrafficLog.id))
+        if cursor is None:
+            result = await session.execute(query)
+            return None, result.one()[1] > 0
+
+        result = await session.execute(query.where(TrafficLog.id > cursor))
+        earliest, count = result.one()
+        if not count:
+            return None, False
+        return _truncate(earliest, 'hour'), True
+
+    async def _save_cursor(self, session: AsyncSession, cursor: Optional[int]) -> None:
+        """
+        Сдвигает курсор до последнего лога, записанного раньше late_window.
+
+        Более свежие логи будут пересчитаны ещё раз: id выдаются до фиксации
+        транзакции, и лог с меньшим id может стать видимым позже.
+        """
+        threshold = datetime.now(timezone.utc) - self.late_window
+        result = await session.execute(
+            select(func.max(TrafficLog.id)).where(TrafficLog.created_at < threshold)
+        )
+        last_log_id = result.scalar_one_or_none() or 0
+        if cursor is not None and last_log_id <= cursor:
+            return
+
+        insert = sqlite_insert if session.bind.dialect.name == 'sqlite' else pg_insert
+        stmt = insert(TrafficRollupCursor).values(id=1, last_log_id=last_log_id)
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=['id'],
+                set_={'last_log_id': stmt.excluded.last_log_id, 'updated_at': func.now()}
+            )
+        )
+
+    async def _upsert(self, session: AsyncSession, dialect_name: str, query) -> None:
+        """INSERT ... SELECT с заменой значений существующих корзин."""
+        insert = sqlite_insert if dialect_name == 'sqlite' else pg_insert
+        stmt = insert(TrafficRollup).from_select(
+            ['user_id', 'period_type', 'bucket_start', 'upload', 'download'],
+            query
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'period_type', 'bucket_start'],
+            set_={
+                'upload': stmt.excluded.upload,
+                'download': stmt.excluded.download,
+            }
+        )
+        await session.execute(stmt)
+
+    async def _rollup_logs(
+        self,
+        session: AsyncSession,
+        dialect_name: str,
+        since: Optional[datetime],
+        user_ids: Optional[Select] = None
+    ) -> None:
+        """Почасовые агрегаты из traffic_logs (для user_ids, если заданы)."""
+        bucket = _bucket(dialect_name, 'hour', TrafficLog.started_at)
+        # Условие WHERE нужно и при полном пересчёте: без него SQLite
+        # не разбирает INSERT ... SELECT ... ON CONFLICT
+        conditions = [
+            TrafficLog.started_at.is_not(None)
+            if since is None else TrafficLog.started_at >= since
+        ]
+        if user_ids is not None:
+            conditions.append(TrafficLog.user_id.in_(user_ids))
+        await self._upsert(
+            session,
+            dialect_name,
+            select(
+                TrafficLog.user_id,
+                literal('hour'),
+                bucket,
+                func.coalesce(func.sum(TrafficLog.upload), 0),
+                func.coalesce(func.sum(TrafficLog.download), 0)
+            )
+            .where(*conditions)
+            .group_by(TrafficLog.user_id, bucket)
+        )
+
+    async def _rollup_hours(
+        self,
+        session: AsyncSession,
+        dialect_name: str,
+        period_type: str,
+        since: Optional[datetime],
+        user_ids: Optional[Select] = None
+    ) -> None:
+        """Агрегаты period_type (день, месяц) из почасовых (для user_ids, если заданы)."""
+        bucket = _bucket(dialect_name, period_type, TrafficRollup.bucket_start)
+        conditions = [TrafficRollup.period_type == 'hour']
+        if since is not None:
+            conditions.append(TrafficRollup.bucket_start >= _truncate(since, period_type))
+        if user_ids is not None:
+            conditions.append(TrafficRollup.user_id.in_(user_ids))
+
+        await self._upsert(
+            session,
+            dialect_name,
+            select(
+                TrafficRollup.user_id,
+                literal(period_type),
+                bucket,
+                func.sum(TrafficRollup.upload),
+                func.sum(TrafficRollup.download)
+            )
+            .where(*conditions)
+            .group_by(TrafficRollup.user_id, bucket)
+        )
+
+    async def _refresh_limits(self, session: AsyncSession) -> None:
+        """Обновляет data_used незавершённых лимитов по почасовым агрегатам."""
+        used = (
+            select(func.coalesce(func.sum(TrafficRollup.upload + TrafficRollup.download), 0))
+            .where(
+                TrafficRollup.user_id == TrafficLimit.user_id,
+                TrafficRollup.period_type == 'hour',
+                TrafficRollup.bucket_start >= TrafficLimit.period_start,
+                TrafficRollup.bucket_start < TrafficLimit.period_end
+            )
+            .scalar_subquery()
+        )
+        await session.execute(
+            update(TrafficLimit)
+            .where(TrafficLimit.period_end > datetime.now(timezone.utc))
+            .values(data_used=used)
+            .execution_options(synchronize_session=False)
+        )
+
+# Общий экземпляр для приложения; запускается и останавливается в main.py
+traffic_rollup = TrafficRollupAggregator()
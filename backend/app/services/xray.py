@@ -204,6 +204,18 @@ async def _log_event(
         details: Optional[Dict[str, Any]] = None
     ) -> None:
         """Логирование событий в системе."""
+        from app.services.event_writer import system_event_writer
+        
+        # Событие пишется в фоне; напрямую — только если фоновая запись не запущена
+        if system_event_writer.enqueue(
+            level=level,
+            message=message,
+            source=source,
+            category=category,
+            details=details
+        ):
+            return
+        
         try:
             from app import crud
             await crud.system_event.create_event(
@@ -9,8 +9,8 @@
         "uvicorn[standard]==0.22.0",
         "sqlalchemy[asyncio]==2.0.20",
         "alembic==1.12.0",
-        "python-jose[cryptography]==3.3.0",
-        "passlib[bcrypt]==1.7.4",
+        "PyJWT==2.8.0",
+        "bcrypt==4.1.2",
         "python-multipart==0.0.6",
         "python-dotenv==1.0.0",
         "psycopg2-binary==2.9.6",
@@ -0,0 +1,181 @@
+"""
+Тесты для сервиса аутентификации.
+"""
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.api.deps import get_current_user
+from app.core.security import get_password_hash, get_token_hash, verify_token_hash
+from app.models.user import User
+from app.services import auth
+from app.schemas.user import UserCreate
+from app.services.auth import AuthService
+
+
+class TestVerifyToken:
+    """Тесты проверки JWT токенов."""
+
+    def test_verified_token_is_cached(self, monkeypatch):
+        """Тест: подпись одного токена проверяется один раз."""
+        token = AuthService.create_access_token(subject="user@example.com", user_id=7)
+        calls = []
+        decode = auth._decode_jwt
+        monkeypatch.setattr(auth, "_decode_jwt", lambda *a, **kw: calls.append(1) or decode(*a, **kw))
+
+        first = AuthService.verify_token(token)
+        second = AuthService.verify_token(token)
+
+        assert first == second
+        assert first["user_id"] == 7
+        assert len(calls) == 1
+
+    def test_forget_user_tokens(self, monkeypatch):
+        """Тест: после сброса кэша токен проверяется заново."""
+        token = AuthService.create_access_token(subject="user@example.com", user_id=8)
+        AuthService.verify_token(token)
+        calls = []
+        decode = auth._decode_jwt
+        monkeypatch.setattr(auth, "_decode_jwt", lambda *a, **kw: calls.append(1) or decode(*a, **kw))
+
+        AuthService.forget_user_tokens(8)
+
+        assert AuthService.verify_token(token)["user_id"] == 8
+        assert len(calls) == 1
+
+    def test_invalid_token(self):
+        """Тест: невалидный токен не кэшируется и возвращает None."""
+        assert AuthService.verify_token("not-a-token") is None
+        assert AuthService.verify_token("not-a-token") is None
+
+    def test_tampered_and_expired_tokens(self):
+        """Тест: изменённый и просроченный токены отклоняются."""
+        token = AuthService.create_access_token(subject="user@example.com", user_id=9)
+        header, payload, signature = token.split(".")
+        forged = AuthService.create_access_token(subject="admin@example.com", user_id=1).split(".")[1]
+        expired = AuthService.create_access_token(
+            subject="user@example.com", user_id=9, expires_delta=timedelta(seconds=-1)
+        )
+
+        assert AuthService.verify_token(f"{header}.{forged}.{signature}") is None
+        assert AuthService.verify_token(expired) is None
+        assert auth.jwt.decode(token, auth.settings.SECRET_KEY, algorithms=[auth.settings.ALGORITHM])["user_id"] == 9
+
+    def test_malformed_tokens_rejected(self):
+        """Тест: токен с посторонними символами или неканонической подписью не проходит проверку."""
+        token = AuthService.create_access_token(subject="user@example.com", user_id=13)
+        header, payload, signature = token.split(".")
+        # Последний символ подписи несёт неиспользуемые биты
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+        twin = alphabet[alphabet.index(signature[-1]) ^ 1]
+
+        for bad in (
+            token + "!",
+            token + "==",
+            f"{header}.{payload}.{signature[:-1]}{twin}",
+            f"{header}.{payload}!.{signature}",
+            f"{header}.{payload}",
+        ):
+            assert AuthService.verify_token(bad) is None
+        assert AuthService.verify_token(token)["user_id"] == 13
+
+
+    async def test_create_tokens_bulk(self):
+        """Тест: массовая выдача возвращает токены каждого пользователя по порядку."""
+        users = [User(id=i, email=f"bulk{i}@example.com", is_superuser=False) for i in range(1, 4)]
+
+        result = await AuthService.create_tokens_bulk(users)
+
+        assert [AuthService.verify_token(t["access_token"])["user_id"] for t in result] == [1, 2, 3]
+        assert [AuthService.verify_token(t["refresh_token"])["type"] for t in result] == ["refresh"] * 3
+
+class TestRefreshTokens:
+    """Тесты обновления токенов."""
+
+    async def test_access_token_rejected_without_verification(self, db_session, monkeypatch):
+        """Тест: access токен вместо refresh отклоняется без проверки подписи."""
+        token = AuthService.create_access_token(subject="user@example.com", user_id=10)
+        calls = []
+        monkeypatch.setattr(auth, "_decode_jwt", lambda *a, **kw: calls.append(1))
+
+        for bad in (token, "not-a-token"):
+            with pytest.raises(ValueError):
+                await AuthService.refresh_tokens(db_session, refresh_token=bad)
+        assert calls == []
+
+class TestGetCurrentUser:
+    """Тесты зависимости get_current_user."""
+
+    async def test_uses_verified_token_cache(self, db_session, monkeypatch):
+        """Тест: зависимость проверяет токен через кэш AuthService и принимает только access токены."""
+        user = User(email="deps@example.com", username="deps", hashed_password=get_password_hash("password123"))
+        db_session.add(user)
+        await db_session.commit()
+        tokens = await AuthService.create_tokens(user)
+        calls = []
+        decode = auth._decode_jwt
+        monkeypatch.setattr(auth, "_decode_jwt", lambda *a, **kw: calls.append(1) or decode(*a, **kw))
+
+        def bearer(token):
+            return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        for _ in range(2):
+            current = await get_current_user(db=db_session, credentials=bearer(tokens["access_token"]))
+            assert current.id == user.id
+        assert len(calls) == 1
+
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_user(db=db_session, credentials=bearer(tokens["refresh_token"]))
+        assert exc_info.value.status_code == 401
+
+class TestTokenHash:
+    """Тесты хеширования refresh-токенов для хранения в БД."""
+
+    def test_tokens_with_common_prefix_differ(self):
+        """Тест: JWT с общим префиксом длиннее 72 байт не проходят проверку по чужому хешу."""
+        first = AuthService.create_access_token(subject="user@example.com", user_id=11)
+        second = AuthService.create_access_token(subject="user@example.com", user_id=12)
+
+        assert verify_token_hash(first, get_token_hash(first))
+        assert not verify_token_hash(second, get_token_hash(first))
+        assert not verify_token_hash(first, "")
+
+class TestAuthenticate:
+    """Тесты входа по email и паролю."""
+
+    async def test_updates_last_login(self, db_session):
+        """Тест: last_login обновляется, пользователь возвращается из RETURNING."""
+        user = User(
+            email="login@example.com",
+            username="login",
+            hashed_password=get_password_hash("password123"),
+        )
+        db_session.add(user)
+        await db_session.commit()
+
+        authenticated = await AuthService.authenticate(db_session, "login@example.com", "password123")
+
+        assert authenticated is not None
+        assert authenticated.id == user.id
+        assert authenticated.last_login is not None
+        assert await AuthService.authenticate(db_session, "login@example.com", "wrong") is None
+
+
+class TestRegisterUser:
+    """Тесты регистрации."""
+
+    async def test_duplicate_email(self, db_session):
+        """Тест: повторный email отклоняется ограничением БД, сессия остаётся рабочей."""
+        user_in = UserCreate(email="new@example.com", username="newuser", password="password123")
+        user = await AuthService.register_user(db_session, user_in)
+        user_id = user.id
+        assert user_id is not None
+        assert user.created_at is not None
+
+        duplicate = UserCreate(email="new@example.com", username="other", password="password123")
+        with pytest.raises(ValueError, match="email"):
+            await AuthService.register_user(db_session, duplicate)
+
+        assert await User.get(db_session, user_id) is not None
@@ -0,0 +1,328 @@
+"""
+Тесты для ConfigSyncService.
+"""
+import asyncio
+
+import orjson
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from fastapi import HTTPException
+
+from app.crud.crud_config import config as crud_config
+from app.models.config_sync import SyncStatus
+from app.models.config_version import ConfigVersion
+from app.models.node import Node, NodeStatus
+from app.services import config_sync_service
+from app.services.config_sync_service import ConfigSyncService, close_http_session, get_http_session
+
+
+@pytest.fixture
+async def node_server():
+    """Заглушка API ноды: отдаёт checksum и запоминает запросы синхронизации."""
+    state = {"checksum": None, "sync_requests": [], "sync_failures": 0}
+
+    async def checksum(request):
+        if state["checksum"] is None:
+            return web.json_response({"detail": "Not Found"}, status=404)
+        return web.json_response({"checksum": state["checksum"]})
+
+    async def sync(request):
+        state["sync_requests"].append(await request.json())
+        if state["sync_failures"]:
+            state["sync_failures"] -= 1
+            return web.json_response({"detail": "Unavailable"}, status=503)
+        return web.json_response({"success": True})
+
+    app = web.Application()
+    app.router.add_get("/api/v1/config/checksum", checksum)
+    app.router.add_post("/api/v1/config/sync", sync)
+    server = TestServer(app)
+    await server.start_server()
+    state["url"] = str(server.make_url("")).rstrip("/")
+    yield state
+    await close_http_session()
+    await server.close()
+
+
+class TestNodeChecksum:
+    """Тесты проверки контрольной суммы конфигурации на ноде."""
+
+    async def test_reported_checksum(self, node_server):
+        """Тест: нода сообщает checksum применённой конфигурации."""
+        node_server["checksum"] = "abc"
+        service = ConfigSyncService(db=None)
+
+        assert await service._node_checksum(get_http_session(), node_server["url"], {}) == "abc"
+
+    async def test_unsupported_endpoint(self, node_server):
+        """Тест: без поддержки на ноде конфигурация отправляется как обычно."""
+        service = ConfigSyncService(db=None)
+
+        assert await service._node_checksum(get_http_session(), node_server["url"], {}) is None
+        assert await service._node_checksum(get_http_session(), "http://127.0.0.1:9", {}) is None
+
+
+class TestSyncToNodes:
+    """Тесты рассылки конфигурации по нодам."""
+
+    async def test_full_config_sent(self, node_server, db_session):
+        """Тест: нода без хешей разделов получает конфигурацию целиком по своему URL."""
+        host, port = node_server["url"].rsplit("//", 1)[1].split(":")
+        config = {"inbounds": [{"port": 443}]}
+        version = ConfigVersion(
+            version="fanout-1",
+            config=config,
+            checksum=ConfigVersion.compute_checksum({"fanout": 1}),
+            section_hashes=ConfigVersion.compute_section_hashes(config),
+        )
+        node = Node(
+            name="fanout", fqdn="f.example.com", ip_address="10.0.3.1",
+            api_address=host, api_port=int(port), auth_token="secret",
+        )
+        db_session.add_all([version, node])
+        await db_session.commit()
+
+        await ConfigSyncService(db_session)._sync_config_to_nodes(config=version, nodes=[node])
+
+        assert node.sync_url == f"{node_server['url']}/api/v1/config/sync"
+        assert node_server["sync_requests"] == [{
+            "version": "fanout-1",
+            "checksum": version.checksum,
+            "restart_services": True,
+            "force": False,
+            "config": config,
+        }]
+        syncs = await crud_config.get_sync_status(db_session, config_id=version.id)
+        assert [sync.status for sync in syncs] == [SyncStatus.COMPLETED]
+
+    async def test_rollback_to_completed_version_resent(self, node_server, db_session):
+        """Тест: откат на версию со статусом COMPLETED отправляется, если на ноде другая."""
+        host, port = node_server["url"].rsplit("//", 1)[1].split(":")
+        config = {"inbounds": [{"port": 443}]}
+        version = ConfigVersion(
+            version="rollback-1",
+            config=config,
+            checksum=ConfigVersion.compute_checksum({"rollback": 1}),
+            section_hashes=ConfigVersion.compute_section_hashes(config),
+        )
+        node = Node(
+            name="rollback", fqdn="r.example.com", ip_address="10.0.3.2",
+            api_address=host, api_port=int(port), auth_token="secret",
+        )
+        db_session.add_all([version, node])
+        await db_session.commit()
+        syncs = await crud_config.get_or_create_sync_statuses(
+            db_session, config_id=version.id, node_ids=[node.id]
+        )
+        await crud_config.update_sync_status(
+            db_session, sync_id=syncs[node.id].id, status=SyncStatus.COMPLETED
+        )
+        # На ноде уже развёрнута более новая версия
+        node_server["checksum"] = ConfigVersion.compute_checksum({"rollback": 2})
+
+        await ConfigSyncService(db_session)._sync_config_to_nodes(config=version, nodes=[node])
+
+        assert [request["version"] for request in node_server["sync_requests"]] == ["rollback-1"]
+
+
+class TestPostSync:
+    """Тесты повторов отправки конфигурации на ноду."""
+
+    async def test_retries_server_errors(self, node_server, monkeypatch):
+        """Тест: ответ 5xx повторяется, пока попытки не кончатся."""
+        monkeypatch.setattr(config_sync_service, "SYNC_BACKOFF_BASE", 0)
+        service = ConfigSyncService(db=None)
+        url = f"{node_server['url']}/api/v1/config/sync"
+        body = orjson.dumps({"version": "1"})
+
+        node_server["sync_failures"] = 2
+        status_code, response = await service._post_sync(get_http_session(), url, body, {})
+        assert status_code == 200
+        assert orjson.loads(response) == {"success": True}
+
+        node_server["sync_failures"] = 3
+        status_code, _ = await service._post_sync(get_http_session(), url, body, {})
+        assert status_code == 503
+        assert len(node_server["sync_requests"]) == 6
+
+
+class TestDebounce:
+    """Тесты схлопывания повторных синхронизаций всех нод."""
+
+    async def test_calls_within_window_collapse(self, monkeypatch):
+        """Тест: серия вызовов даёт одну рассылку последней версии с объединёнными флагами."""
+        runs = []
+
+        async def run_sync(**kwargs):
+            runs.append(kwargs)
+
+        monkeypatch.setattr(config_sync_service, "_run_sync", run_sync)
+
+        config_sync_service._schedule_sync(1, force=True, restart_services=False, user_id=1, delay=0.05)
+        config_sync_service._schedule_sync(2, force=False, restart_services=False, user_id=1, delay=0.05)
+        await asyncio.sleep(0.02)
+        config_sync_service._schedule_sync(3, force=False, restart_services=True, user_id=2, delay=0.05)
+        await asyncio.sleep(0.1)
+        await config_sync_service.flush_pending_sync()
+
+        assert runs == [{"config_id": 3, "force": True, "restart_services": True, "user_id": 2}]
+
+    async def test_flush_runs_pending_immediately(self, monkeypatch):
+        """Тест: при остановке запланированная синхронизация не теряется."""
+        runs = []
+
+        async def run_sync(**kwargs):
+            runs.append(kwargs["config_id"])
+
+        monkeypatch.setattr(config_sync_service, "_run_sync", run_sync)
+
+        config_sync_service._schedule_sync(5, force=False, restart_services=True, user_id=None, delay=60)
+        await config_sync_service.flush_pending_sync()
+
+        assert runs == [5]
+
+
+class TestCompression:
+    """Тесты сжатия тела запроса синхронизации."""
+
+    def test_small_or_disabled_body_unchanged(self, monkeypatch):
+        """Тест: без CONFIG_SYNC_ZSTD и для маленьких тел данные не меняются."""
+        data = orjson.dumps({"config": {"inbounds": [{"port": 443}] * 1000}})
+        monkeypatch.setattr(config_sync_service.settings, "CONFIG_SYNC_ZSTD", False)
+        assert ConfigSyncService._compress_body(data) is data
+
+        monkeypatch.setattr(config_sync_service.settings, "CONFIG_SYNC_ZSTD", True)
+        assert ConfigSyncService._compress_body(b"{}") == b"{}"
+
+    def test_large_body_compressed(self, monkeypatch):
+        """Тест: большое тело сжимается zstd и распаковывается без потерь."""
+        zstandard = pytest.importorskip("zstandard")
+        monkeypatch.setattr(config_sync_service.settings, "CONFIG_SYNC_ZSTD", True)
+        data = orjson.dumps({"config": {"inbounds": [{"port": 443}] * 1000}})
+
+        compressed = ConfigSyncService._compress_body(data)
+
+        assert compressed.startswith(config_sync_service.ZSTD_MAGIC)
+        assert len(compressed) < len(data)
+        assert zstandard.ZstdDecompressor().decompress(compressed) == data
+
+
+class TestSectionDiff:
+    """Тесты сравнения разделов конфигурации с нодой."""
+
+    def test_changed_and_removed_sections(self):
+        """Тест: отправляются только изменённые разделы, удалённые перечисляются."""
+        old = {"inbounds": [{"port": 443}], "outbounds": [], "routing": {"rules": []}, "dns": {}}
+        new = {"inbounds": [{"port": 8443}], "outbounds": [], "routing": {"rules": []}}
+        config = ConfigVersion(config=new, section_hashes=ConfigVersion.compute_section_hashes(new))
+
+        changed, removed = ConfigSyncService._diff_sections(config, ConfigVersion.compute_section_hashes(old))
+
+        assert changed == ["inbounds"]
+        assert removed == ["dns"]
+
+    def test_all_sections_changed(self):
+        """Тест: если изменилось всё, отправляется конфигурация целиком."""
+        config = ConfigVersion(config={"inbounds": []}, section_hashes={"inbounds": "x"})
+
+        assert ConfigSyncService._diff_sections(config, {"inbounds": "y"}) is None
+
+
+class TestSyncStatusPrefetch:
+    """Тесты подготовки записей синхронизации перед развёртыванием."""
+
+    async def test_get_or_create_sync_statuses(self, db_session):
+        """Тест: недостающие записи создаются, существующие переиспользуются; статус пишется одним UPDATE."""
+        config = {"inbounds": []}
+        version = ConfigVersion(
+            version="prefetch-1",
+            config=config,
+            checksum=ConfigVersion.compute_checksum({"prefetch": 1}),
+            section_hashes=ConfigVersion.compute_section_hashes(config),
+        )
+        nodes = [Node(name=f"node-{i}", fqdn=f"n{i}.example.com", ip_address=f"10.0.0.{i}") for i in (1, 2)]
+        db_session.add_all([version, *nodes])
+        await db_session.commit()
+        node_ids = [node.id for node in nodes]
+
+        first = await crud_config.get_or_create_sync_statuses(
+            db_session, config_id=version.id, node_ids=node_ids[:1]
+        )
+        second = await crud_config.get_or_create_sync_statuses(
+            db_session, config_id=version.id, node_ids=node_ids
+        )
+
+        assert set(second) == set(node_ids)
+        assert second[node_ids[0]].id == first[node_ids[0]].id
+
+        sync_id = second[node_ids[1]].id
+        for _ in range(2):
+            failed = await crud_config.update_sync_status(
+                db_session, sync_id=sync_id, status=SyncStatus.FAILED, error_message="timeout", increment_retry=True
+            )
+        assert failed.retry_count == 2
+        assert failed.error_message == "timeout"
+
+        completed = await crud_config.update_sync_status(db_session, sync_id=sync_id, status=SyncStatus.COMPLETED)
+        assert completed.retry_count == 0
+        assert completed.error_message is None
+        assert completed.last_sync is not None
+
+        again = await crud_config.get_or_create_sync_statuses(
+            db_session, config_id=version.id, node_ids=node_ids[1:]
+        )
+        assert again[node_ids[1]].status == SyncStatus.COMPLETED
+
+    async def test_nodes_by_id(self, db_session):
+        """Тест: ноды по ID загружаются одним запросом, неактивные пропускаются."""
+        nodes = [
+            Node(name=f"pick-{i}", fqdn=f"p{i}.example.com", ip_address=f"10.0.1.{i}", is_active=i != 2)
+            for i in (1, 2, 3)
+        ]
+        db_session.add_all(nodes)
+        await db_session.commit()
+        service = ConfigSyncService(db=db_session)
+
+        picked = await service._get_nodes_to_sync([nodes[2].id, nodes[1].id, nodes[0], 10 ** 6])
+
+        assert [node.name for node in picked] == ["pick-3", "pick-1"]
+
+
+class TestGetSyncStatus:
+    """Тесты отчёта о синхронизации по нодам."""
+
+    async def test_latest_node_state(self, db_session):
+        """Тест: для каждой ноды берётся последняя запись о состоянии."""
+        config = {"inbounds": []}
+        version = ConfigVersion(
+            version="status-1",
+            config=config,
+            checksum=ConfigVersion.compute_checksum({"status": 1}),
+            section_hashes=ConfigVersion.compute_section_hashes(config),
+        )
+        nodes = [Node(name=f"state-{i}", fqdn=f"s{i}.example.com", ip_address=f"10.0.2.{i}") for i in (1, 2)]
+        db_session.add_all([version, *nodes])
+        await db_session.commit()
+        db_session.add_all([
+            NodeStatus(node_id=nodes[0].id, status="offline"),
+            NodeStatus(node_id=nodes[0].id, status="online"),
+        ])
+        await db_session.commit()
+        await crud_config.get_or_create_sync_statuses(
+            db_session, config_id=version.id, node_ids=[node.id for node in nodes]
+        )
+
+        statuses = await ConfigSyncService(db_session).get_sync_status(version)
+
+        by_name = {item["node_name"]: item for item in statuses}
+        assert by_name["state-1"]["is_online"] is True
+        assert by_name["state-1"]["node_status"] == "online"
+        assert by_name["state-2"]["is_online"] is False
+        assert by_name["state-2"]["node_status"] is None
+
+    async def test_missing_version_not_found(self, db_session):
+        """Тест: для несуществующей версии возвращается 404."""
+        with pytest.raises(HTTPException) as exc_info:
+            await ConfigSyncService(db_session).get_sync_status("missing-version")
+        assert exc_info.value.status_code == 404
@@ -0,0 +1,35 @@
+"""
+Тесты для сервиса устройств.
+"""
+from app.models.device import Device
+from app.models.user import User
+from app.services import device_service
+
+
+class TestDeviceState:
+    """Тесты состояния устройств для проверки лимита."""
+
+    async def test_cached_until_forgotten(self, db_session):
+        """Тест: зарегистрированное устройство берётся из кэша до сброса, новое — всегда из БД."""
+        user = User(email="devices@example.com", username="devices", hashed_password="x")
+        db_session.add(user)
+        await db_session.commit()
+
+        assert await device_service.get_active_device_state(db_session, user.id, "a") == (0, False)
+
+        phone = Device(user_id=user.id, device_id="a", name="phone", is_active=True)
+        db_session.add_all([
+            phone,
+            Device(user_id=user.id, device_id="b", name="laptop", is_active=False),
+        ])
+        await db_session.commit()
+        assert await device_service.get_active_device_state(db_session, user.id, "a") == (1, True)
+        assert await device_service.get_active_device_state(db_session, user.id, "b") == (1, False)
+
+        phone.is_active = False
+        await db_session.commit()
+        assert await device_service.get_active_device_state(db_session, user.id, "a") == (1, True)
+
+        device_service.forget_device_state(user.id)
+
+        assert await device_service.get_active_device_state(db_session, user.id, "a") == (0, False)
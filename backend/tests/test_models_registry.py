@@ -0,0 +1,43 @@
+"""
+Проверка реестра ORM-моделей: каждая модель объявлена ровно один раз.
+"""
+from collections import Counter
+
+from sqlalchemy.orm import configure_mappers
+
+from app.models import Base
+
+# Обновлять при добавлении или удалении моделей
+EXPECTED_MAPPERS = {
+    "ConfigSync",
+    "ConfigVersion",
+    "Device",
+    "Node",
+    "NodeStatus",
+    "Plan",
+    "Subscription",
+    "SystemEvent",
+    "TrafficLimit",
+    "TrafficLog",
+    "TrafficRollup",
+    "TrafficRollupCursor",
+    "User",
+    "VPNUser",
+    "XrayConfig",
+}
+
+
+def test_models_are_mapped_once():
+    """Ни одна модель не объявлена повторно в другом модуле."""
+    configure_mappers()
+    names = Counter(mapper.class_.__name__ for mapper in Base.registry.mappers)
+
+    duplicates = {name for name, count in names.items() if count > 1}
+    assert not duplicates
+    assert set(names) == EXPECTED_MAPPERS
+
+
+def test_tables_are_declared_once():
+    """Каждой таблице соответствует ровно один маппер."""
+    tables = Counter(mapper.local_table.name for mapper in Base.registry.mappers)
+    assert all(count == 1 for count in tables.values())
@@ -0,0 +1,54 @@
+"""
+Тесты для Pydantic-схем.
+"""
+import ipaddress
+from datetime import datetime
+
+from app import models, schemas
+
+
+class TestConstructFromOrm:
+    """Тесты сборки схем из ORM-объектов без валидации."""
+    
+    def test_device(self):
+        """Тест: имена колонок и типы приводятся так же, как при валидации."""
+        now = datetime.utcnow()
+        device = models.Device(
+            id=1,
+            name="Телефон",
+            device_id="hwid-1",
+            ip_address=ipaddress.ip_address("10.0.0.1"),
+            metadata_={"os": "android"},
+            is_active=True,
+            is_trusted=False,
+            user_id=3,
+            created_at=now,
+            last_active=now,
+        )
+        
+        trusted = schemas.construct_from_orm(schemas.Device, device)
+        validated = schemas.Device.model_validate(device.to_dict(now=now))
+        
+        assert trusted.ip_address == "10.0.0.1"
+        assert trusted.metadata == {"os": "android"}
+        assert trusted.model_dump() == validated.model_dump()
+
+
+class TestJsonSchemaCache:
+    """Тесты кэширования JSON-схем."""
+    
+    def test_returns_independent_copies(self):
+        """Тест: изменение полученной схемы не портит кэш."""
+        first = schemas.Device.model_json_schema()
+        first["properties"].clear()
+        
+        second = schemas.Device.model_json_schema()
+        
+        assert "ip_address" in second["properties"]
+        assert second == schemas.Device.model_json_schema()
+
+
+def test_subscription_aliases_are_identical():
+    """Тест: алиасы совместимости не создают отдельных схем."""
+    assert schemas.SubscriptionPlan is schemas.Plan
+    assert schemas.UserSubscription is schemas.Subscription
@@ -1,6 +1,8 @@
 """
 Тесты для системы событий (SystemEvent).
 """
+import asyncio
+
 import pytest
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,6 +10,7 @@
 from app.models.system_event import SystemEvent, SystemEventLevel, SystemEventSource
 from app.crud.crud_system_event import system_event
 from app.schemas.system_event import SystemEventCreate
+from app.services.event_writer import SystemEventWriter
 
 
 class TestSystemEvent:
@@ -70,6 +73,69 @@ async def test_create_event(self, db_session: AsyncSession):
         assert event.source == SystemEventSource.SYSTEM
         assert event.category == "test"
     
+    async def test_create_events_bulk(self, db_session: AsyncSession):
+        """Тест пакетного создания событий."""
+        ids = await system_event.create_events(
+            db=db_session,
+            events=[
+                {
+                    "level": SystemEventLevel.INFO,
+                    "message": f"Пакетное событие {i}",
+                    "source": SystemEventSource.SYSTEM,
+                }
+                for i in range(3)
+            ] + [
+                {
+                    "level": SystemEventLevel.ERROR,
+                    "message": "Пакетная ошибка",
+                    "source": SystemEventSource.API,
+                    "category": "test",
+                    "details": {"code": 500},
+                }
+            ]
+        )
+        
+        assert len(ids) == 4
+        assert len(set(ids)) == 4
+        
+        created = await system_event.get(db_session, id=ids[-1])
+        assert created.level == SystemEventLevel.ERROR
+        assert created.category == "test"
+        assert created.details == {"code": 500}
+    
+    async def test_create_events_empty(self, db_session: AsyncSession):
+        """Тест пакетного создания без событий."""
+        assert await system_event.create_events(db=db_session, events=[]) == []
+    
+    async def test_stream_events(self, db_session: AsyncSession):
+        """Тест потоковой выдачи событий без ORM-объектов."""
+        await system_event.create_events(
+            db=db_session,
+            events=[
+                {
+                    "level": level,
+                    "message": f"Потоковое событие {i}",
+                    "source": SystemEventSource.SYSTEM,
+                }
+                for i, level in enumerate([SystemEventLevel.INFO, SystemEventLevel.ERROR, SystemEventLevel.INFO])
+            ]
+        )
+        
+        rows = [
+            row
+            async for row in system_event.stream_events(
+                db=db_session,
+                start_time=datetime.utcnow() - timedelta(hours=1),
+                level=SystemEventLevel.INFO,
+                yield_per=1
+            )
+        ]
+        
+        messages = [row["message"] for row in rows if row["message"].startswith("Потоковое")]
+        assert messages == ["Потоковое событие 0", "Потоковое событие 2"]
+        assert all(row["level"] == SystemEventLevel.INFO for row in rows)
+        assert "details" not in rows[0]
+    
     async def test_get_recent_events(self, db_session: AsyncSession):
         """Тест получения последних событий."""
         # Создаем несколько тестовых событий
@@ -190,4 +256,62 @@ def test_event_sources(self):
         assert SystemEventSource.NODE == "node"
         assert SystemEventSource.USER == "user"
         assert SystemEventSource.API == "api"
-        assert SystemEventSource.AUTH == "auth"
\ No newline at end of file
+        assert SystemEventSource.AUTH == "auth"
+
+@pytest.mark.asyncio
+class TestSystemEventWriter:
+    """Тесты для фоновой записи системных событий."""
+    
+    async def test_enqueue_requires_running_writer(self, test_session_factory):
+        """Тест: без запуска записи событие не принимается в очередь."""
+        writer = SystemEventWriter(session_factory=test_session_factory)
+        
+        assert writer.enqueue(
+            level=SystemEventLevel.INFO,
+            message="Не принято",
+            source=SystemEventSource.SYSTEM
+        ) is False
+    
+    async def test_events_flushed_on_stop(self, test_session_factory, db_session: AsyncSession):
+        """Тест: события из очереди записываются при остановке."""
+        writer = SystemEventWriter(session_factory=test_session_factory, flush_interval=0.01)
+        await writer.start()
+        
+        for i in range(3):
+            assert writer.enqueue(
+                level=SystemEventLevel.WARNING,
+                message=f"Фоновое событие {i}",
+                source=SystemEventSource.MONITOR,
+                category="writer-test"
+            )
+        
+        await writer.stop()
+        
+        events = await system_event.get_recent_events(
+            db=db_session,
+            category="writer-test"
+        )
+        assert len(events) == 3
+    
+    async def test_in_flight_batch_flushed_on_stop(self, test_session_factory, db_session: AsyncSession):
+        """Тест: события, уже забранные фоновой задачей из очереди, записываются при остановке."""
+        writer = SystemEventWriter(session_factory=test_session_factory, flush_interval=60)
+        await writer.start()
+        
+        for i in range(3):
+            assert writer.enqueue(
+                level=SystemEventLevel.INFO,
+                message=f"Событие в пачке {i}",
+                source=SystemEventSource.MONITOR,
+                category="in-flight-test"
+            )
+        await asyncio.sleep(0.05)
+        assert writer._queue.empty()
+        
+        await writer.stop()
+        
+        events = await system_event.get_recent_events(
+            db=db_session,
+            category="in-flight-test"
+        )
+        assert len(events) == 3
@@ -0,0 +1,218 @@
+"""
+Тесты для модели TrafficLog.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.traffic import TrafficLog, TrafficRollup
+from app.services import batch_writer
+from app.services.traffic_buffer import TrafficLogBuffer
+from app.services.traffic_rollup import TrafficRollupAggregator
+
+
+class TestTrafficLog:
+    """Тесты для модели TrafficLog."""
+    
+    @pytest.mark.parametrize("size,expected", [
+        (0, "0 Б"),
+        (512, "512.0 Б"),
+        (1023, "1023.0 Б"),
+        (1024, "1.0 КБ"),
+        (1536, "1.5 КБ"),
+        (5 * 1024 ** 3, "5.0 ГБ"),
+        (1024 ** 5, "1.0 ПБ"),
+        (3 * 1024 ** 6, "3072.0 ПБ"),
+    ])
+    def test_format_bytes(self, size, expected):
+        """Тест форматирования размера в байтах."""
+        assert TrafficLog.format_bytes(size) == expected
+    
+    def test_cached_total_traffic_invalidated_on_set(self):
+        """Тест: кеш суммарного трафика сбрасывается при изменении колонок."""
+        log = TrafficLog(user_id=1, upload=1024, download=0)
+        assert log.formatted_total_traffic == "1.0 КБ"
+        
+        log.download = 1024
+        assert log.total_traffic == 2048
+        assert log.formatted_total_traffic == "2.0 КБ"
+
+
+@pytest.mark.asyncio
+class TestTrafficLogBulk:
+    """Тесты пакетной записи логов трафика."""
+    
+    async def test_bulk_copy(self, db_session: AsyncSession):
+        """Тест пакетной записи (в SQLite — через INSERT executemany)."""
+        written = await TrafficLog.bulk_copy(
+            db_session,
+            [
+                {
+                    "user_id": 1,
+                    "device_id": "bulk-device",
+                    "upload": i,
+                    "download": 2 * i,
+                    "remote_ip": "10.0.0.1",
+                    "metadata": {"batch": i},
+                }
+                for i in range(3)
+            ]
+        )
+        await db_session.commit()
+        
+        assert written == 3
+        
+        result = await db_session.execute(
+            select(TrafficLog)
+            .where(TrafficLog.device_id == "bulk-device")
+            .order_by(TrafficLog.upload)
+        )
+        logs = result.scalars().all()
+        assert [log.download for log in logs] == [0, 2, 4]
+        assert logs[1].metadata_ == {"batch": 1}
+        assert logs[0].uuid is not None
+        assert logs[0].started_at is not None
+    
+    async def test_bulk_copy_empty(self, db_session: AsyncSession):
+        """Тест пакетной записи без строк."""
+        assert await TrafficLog.bulk_copy(db_session, []) == 0
+
+
+@pytest.mark.asyncio
+class TestTrafficLogBuffer:
+    """Тесты буферизованной записи логов трафика."""
+    
+    async def test_flush_writes_in_batches(self, test_session_factory, db_session: AsyncSession):
+        """Тест: flush записывает накопленные логи пачками по batch_size."""
+        buffer = TrafficLogBuffer(session_factory=test_session_factory, batch_size=2)
+        
+        for i in range(5):
+            assert buffer.append({"user_id": 1, "device_id": "buffer-device", "upload": i})
+        
+        assert await buffer.flush() == 5
+        
+        result = await db_session.execute(
+            select(TrafficLog).where(TrafficLog.device_id == "buffer-device")
+        )
+        assert len(result.scalars().all()) == 5
+    
+    async def test_append_rejects_when_full(self, test_session_factory):
+        """Тест: переполненная очередь не принимает новые логи."""
+        buffer = TrafficLogBuffer(session_factory=test_session_factory, max_queue_size=1)
+        
+        assert buffer.append({"user_id": 1}) is True
+        assert buffer.append({"user_id": 1}) is False
+    
+    async def test_stop_writes_in_flight_batch(self, test_session_factory, db_session: AsyncSession):
+        """Тест: остановка дописывает пачку, уже забранную фоновой задачей из очереди."""
+        buffer = TrafficLogBuffer(session_factory=test_session_factory, flush_interval=60)
+        await buffer.start()
+        
+        for i in range(3):
+            assert buffer.append({"user_id": 1, "device_id": "in-flight-device", "upload": i})
+        await asyncio.sleep(0.05)
+        assert buffer._queue.empty()
+        
+        await buffer.stop()
+        
+        result = await db_session.execute(
+            select(TrafficLog).where(TrafficLog.device_id == "in-flight-device")
+        )
+        assert len(result.scalars().all()) == 3
+    
+    async def test_failed_batch_requeued(self, test_session_factory, db_session: AsyncSession, monkeypatch):
+        """Тест: пачка, которую не удалось записать, возвращается в очередь."""
+        monkeypatch.setattr(batch_writer, "WRITE_ATTEMPTS", 1)
+        bulk_copy = TrafficLog.bulk_copy
+        failures = [RuntimeError("БД недоступна")]
+        
+        async def flaky_bulk_copy(session, batch):
+            if failures:
+                raise failures.pop()
+            return await bulk_copy(session, batch)
+        
+        monkeypatch.setattr(TrafficLog, "bulk_copy", flaky_bulk_copy)
+        buffer = TrafficLogBuffer(session_factory=test_session_factory, flush_interval=0.01)
+        await buffer.start()
+        
+        assert buffer.append({"user_id": 1, "device_id": "requeued-device"})
+        await asyncio.sleep(0.1)
+        await buffer.stop()
+        
+        assert not failures
+        result = await db_session.execute(
+            select(TrafficLog).where(TrafficLog.device_id == "requeued-device")
+        )
+        assert len(result.scalars().all()) == 1
+
+
+@pytest.mark.asyncio
+class TestTrafficRollup:
+    """Тесты агрегации логов трафика."""
+    
+    async def test_run_once_is_idempotent(self, test_session_factory, db_session: AsyncSession):
+        """Тест: повторная агрегация пересчитывает корзины, а не суммирует их."""
+        await TrafficLog.bulk_copy(
+            db_session,
+            [
+                {"user_id": 77, "upload": 100, "download": 1, "started_at": datetime(2024, 3, 1, 10, 5)},
+                {"user_id": 77, "upload": 200, "download": 2, "started_at": datetime(2024, 3, 1, 10, 55)},
+                {"user_id": 77, "upload": 400, "download": 4, "started_at": datetime(2024, 3, 2, 8, 0)},
+            ]
+        )
+        await db_session.commit()
+        
+        aggregator = TrafficRollupAggregator(session_factory=test_session_factory)
+        await aggregator.run_once()
+        await aggregator.run_once()
+        
+        usage = {
+            period_type: await TrafficRollup.get_usage(
+                db_session,
+                user_id=77,
+                start=datetime(2024, 3, 1),
+                end=datetime(2024, 4, 1),
+                period_type=period_type
+            )
+            for period_type in ("hour", "day", "month")
+        }
+        assert usage == {"hour": 707, "day": 707, "month": 707}
+        
+        first_hour = await TrafficRollup.get_usage(
+            db_session,
+            user_id=77,
+            start=datetime(2024, 3, 1, 10),
+            end=datetime(2024, 3, 1, 11)
+        )
+        assert first_hour == 303
+    
+    async def test_late_log_with_old_started_at_counted(self, test_session_factory, db_session: AsyncSession):
+        """Тест: лог длинной сессии, записанный после агрегации, попадает в свою старую корзину."""
+        await TrafficLog.bulk_copy(
+            db_session,
+            [{"user_id": 78, "upload": 100, "download": 0, "started_at": datetime(2024, 3, 5, 12, 0)}]
+        )
+        await db_session.commit()
+        
+        aggregator = TrafficRollupAggregator(session_factory=test_session_factory, late_window=timedelta(0))
+        await aggregator.run_once()
+        
+        # Сессия началась за много часов до последней корзины
+        await TrafficLog.bulk_copy(
+            db_session,
+            [{"user_id": 78, "upload": 50, "download": 0, "started_at": datetime(2024, 3, 4, 6, 0)}]
+        )
+        await db_session.commit()
+        await aggregator.run_once()
+        
+        usage = await TrafficRollup.get_usage(
+            db_session,
+            user_id=78,
+            start=datetime(2024, 3, 1),
+            end=datetime(2024, 4, 1),
+            period_type="month"
+        )
+        assert usage == 150